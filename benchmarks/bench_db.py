@@ -0,0 +1,577 @@
+"""
+Benchmark: the app's database paths against synthetic data in a throwaway schema.
+
+For each size, creates a fresh schema in the database at ``--dsn`` with the
+``client``, ``building``, ``client_requirements`` and ``client_schedule``
+tables, bulk-loads synthetic rows, applies sql/*.sql on top (so indexes and
+triggers match production), then times through the app's own code:
+
+- client list paging (``fetch_client_block``: first block, keyset blocks
+  deep into the list, sorted by name, filtered by stage);
+- client search (``search_clients``: name, email, phone, id, no match);
+- the client-list DataFrame transforms (``derive_client_columns``);
+- requirement saves (``save_to_db`` enqueue, ``apply_requirement`` write);
+- tour saves (the ``save_schedule_to_db`` enqueue, ``insert_tour`` write);
+- the outbox replaying the queued saves.
+
+Results go to a JSON file named after the current commit, so runs on two
+commits can be compared with ``--baseline``. The schema is dropped at the
+end unless ``--keep`` is given.
+
+Point ``--dsn`` (or ``BENCH_DATABASE_URL``) at a disposable local Postgres;
+the production ``DATABASE_URL`` is never used.
+
+Usage:
+    python -m benchmarks.bench_db --dsn postgresql://localhost/bench [--sizes 10000,100000,1000000]
+        [--repeat 20] [--output benchmarks/results/db_<commit>.json] [--baseline old.json] [--keep]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+LOAD_CHUNK_ROWS = 100_000
+DEEP_BLOCKS = 20
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Karen",
+    "Wei", "Priya", "Mohammed", "Olga", "Kenji", "Fatima", "Luis", "Aisha", "Dmitri", "Mei",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Chen", "Patel", "Kim", "Nguyen", "Cohen", "Ivanova", "Tanaka", "Okafor", "Rossi", "Novak",
+]
+STAGES = ["New Lead", "Contacted", "Requirements", "Touring", "Applied", "Closed", "Dead"]
+STAGE_WEIGHTS = [0.25, 0.2, 0.15, 0.15, 0.08, 0.07, 0.1]
+NEIGHBORHOODS = ["Astoria", "Bushwick", "Chelsea", "Harlem", "Midtown", "Park Slope", "SoHo", "Williamsburg"]
+REPS = [f"{first} {last}" for first, last in zip(FIRST_NAMES[:12], LAST_NAMES[::3])]
+TOUR_STATUSES = ["Pending", "Confirmed", "Done", "Cancelled"]
+
+# Tables as they were before sql/001; the migrations then add the rest
+BASE_SCHEMA = """
+    CREATE TABLE client (
+        id                     BIGSERIAL PRIMARY KEY,
+        fullname               TEXT,
+        email                  TEXT,
+        phone                  TEXT,
+        stage                  TEXT,
+        lastactivity           TIMESTAMPTZ,
+        created                TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        assigned_employee_name TEXT
+    );
+    CREATE TABLE building (
+        id           BIGSERIAL PRIMARY KEY,
+        name         TEXT NOT NULL,
+        address      TEXT,
+        neighborhood TEXT
+    );
+    CREATE TABLE client_requirements (
+        id                     BIGSERIAL PRIMARY KEY,
+        client_id              BIGINT NOT NULL,
+        move_in_date           DATE,
+        move_in_date_max       DATE,
+        budget                 NUMERIC,
+        budget_max             NUMERIC,
+        beds                   SMALLINT,
+        baths                  NUMERIC,
+        sqft                   INTEGER,
+        sqft_max               INTEGER,
+        parking                TEXT,
+        pets                   TEXT,
+        washer_dryer           TEXT,
+        zip                    TEXT[],
+        neighborhood           TEXT[],
+        amenities              TEXT[],
+        comment                TEXT,
+        pets_comment           TEXT,
+        parking_comment        TEXT,
+        moving_reason          TEXT,
+        work_location          TEXT,
+        commuting              TEXT,
+        people_living          SMALLINT,
+        building_must_haves    TEXT,
+        unit_must_haves        TEXT,
+        special_needs          TEXT,
+        preference             TEXT,
+        personality            TEXT,
+        another_broker         BOOLEAN,
+        another_broker_comment TEXT,
+        confirm_tour           BOOLEAN,
+        tour_person            TEXT,
+        availability           TEXT,
+        lease_term             SMALLINT,
+        section8               BOOLEAN,
+        monthly_income         NUMERIC,
+        credit_score           INTEGER,
+        cosigner               BOOLEAN,
+        cosigner_comment       TEXT,
+        neighborhood_specific  BOOLEAN,
+        tour_date              DATE
+    );
+    CREATE TABLE client_schedule (
+        id                  BIGSERIAL PRIMARY KEY,
+        client_id           BIGINT NOT NULL,
+        building_name       TEXT,
+        unit_number         TEXT,
+        price               NUMERIC,
+        tour_date           DATE,
+        tour_time           TIME,
+        tour_type           TEXT,
+        status              TEXT,
+        booked_via          TEXT,
+        touring_rep         TEXT,
+        selected_by         TEXT,
+        leasing_agent_name  TEXT,
+        leasing_agent_email TEXT,
+        leasing_agent_phone TEXT,
+        comment             TEXT,
+        close_confidence    INTEGER,
+        created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+"""
+
+
+def _pg_array(values):
+    return "{" + ",".join(f'"{value}"' for value in values) + "}"
+
+
+def make_clients(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, rows + 1)
+    first = rng.choice(FIRST_NAMES, rows)
+    last = rng.choice(LAST_NAMES, rows)
+    now = pd.Timestamp.now(tz="UTC")
+    created = now - pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 60, rows), unit="m")
+    # Activity after creation, mostly recent; some clients never had any
+    since = (now - created).total_seconds().to_numpy()
+    lastactivity = now - pd.to_timedelta(since * rng.random(rows) ** 3, unit="s")
+    lastactivity = lastactivity.where(rng.random(rows) > 0.05)
+    return pd.DataFrame({
+        "id": ids,
+        "fullname": np.char.add(np.char.add(first, " "), last),
+        "email": [f"{f.lower()}.{l.lower()}{i}@example.com" for f, l, i in zip(first, last, ids)],
+        "phone": [f"({a}) {b}-{c:04d}" for a, b, c in zip(
+            rng.choice([212, 347, 646, 718, 917, 929], rows), rng.integers(200, 1000, rows), rng.integers(0, 10000, rows)
+        )],
+        "stage": rng.choice(STAGES, rows, p=STAGE_WEIGHTS),
+        "lastactivity": lastactivity,
+        "created": created,
+        "assigned_employee_name": rng.choice(REPS + [None], rows),
+    })
+
+
+def make_buildings(rows, seed=0):
+    from utils.requirements import AMENITY_OPTIONS
+
+    rng = np.random.default_rng(seed + 1)
+    return pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "name": [f"{street} {kind}" for street, kind in zip(
+            rng.choice(LAST_NAMES, rows), rng.choice(["Tower", "House", "Lofts", "Court", "Plaza", "Residences"], rows)
+        )],
+        "address": [f"{n} {s} St" for n, s in zip(rng.integers(1, 999, rows), rng.choice(LAST_NAMES, rows))],
+        "neighborhood": rng.choice(NEIGHBORHOODS, rows),
+        "zip": rng.integers(10001, 10041, rows).astype(str),
+        "amenities": [_pg_array(rng.choice(AMENITY_OPTIONS, rng.integers(0, 5), replace=False)) for _ in range(rows)],
+        "latitude": 40.70 + rng.random(rows) * 0.12,
+        "longitude": -74.02 + rng.random(rows) * 0.12,
+    })
+
+
+def make_requirements(client_ids, seed=0):
+    from utils.requirements import AMENITY_OPTIONS, WEEKDAYS
+
+    rng = np.random.default_rng(seed + 2)
+    rows = len(client_ids)
+    move_in = pd.Timestamp.today().normalize() + pd.to_timedelta(rng.integers(-60, 120, rows), unit="D")
+    budget = rng.integers(15, 100, rows) * 100
+    availability = [
+        json.dumps({
+            day: {"available": bool(available), "start": "09:00", "end": "18:00" if day in WEEKDAYS[:5] else "14:00"}
+            for day, available in zip(WEEKDAYS, rng.random(7) < 0.6)
+        })
+        for _ in range(rows)
+    ]
+    return pd.DataFrame({
+        "client_id": client_ids,
+        "move_in_date": move_in.date,
+        "move_in_date_max": (move_in + pd.Timedelta(days=30)).date,
+        "budget": budget,
+        "budget_max": budget + rng.integers(0, 10, rows) * 100,
+        "beds": rng.integers(0, 4, rows),
+        "baths": rng.choice([1, 1.5, 2], rows),
+        "parking": rng.choice(["0", "1", "3", "5"], rows),
+        "pets": rng.choice(["-1", "4", "1", "2"], rows),
+        "washer_dryer": rng.choice(["0", "1", "3"], rows),
+        "zip": [_pg_array(rng.integers(10001, 10041, rng.integers(0, 3)).astype(str)) for _ in range(rows)],
+        "neighborhood": [_pg_array(rng.choice(NEIGHBORHOODS, rng.integers(0, 3), replace=False)) for _ in range(rows)],
+        "amenities": [_pg_array(rng.choice(AMENITY_OPTIONS, rng.integers(0, 3), replace=False)) for _ in range(rows)],
+        "comment": "Synthetic requirement",
+        "people_living": rng.integers(1, 5, rows),
+        "preference": rng.choice(["Rental", "Condo"], rows),
+        "availability": availability,
+        "lease_term": rng.choice([12, 12, 12, 18, 24], rows),
+        "monthly_income": budget * 40 // 12,
+        "credit_score": rng.integers(550, 820, rows),
+    })
+
+
+def make_schedules(client_ids, buildings, seed=0):
+    rng = np.random.default_rng(seed + 3)
+    rows = len(client_ids)
+    picks = rng.integers(0, len(buildings), rows)
+    return pd.DataFrame({
+        "client_id": client_ids,
+        "building_id": buildings["id"].to_numpy()[picks],
+        "building_name": buildings["name"].to_numpy()[picks],
+        "unit_number": rng.integers(1, 40, rows).astype(str),
+        "price": rng.integers(15, 100, rows) * 100,
+        "tour_date": (pd.Timestamp.today().normalize() + pd.to_timedelta(rng.integers(-365, 14, rows), unit="D")).date,
+        "tour_time": [f"{h:02d}:{m:02d}" for h, m in zip(rng.integers(9, 19, rows), rng.choice([0, 15, 30, 45], rows))],
+        "tour_type": rng.choice(["Any", "In-Person", "Virtual", "Self Guided"], rows),
+        "status": rng.choice(TOUR_STATUSES, rows, p=[0.2, 0.3, 0.4, 0.1]),
+        "booked_via": rng.choice(["Phone", "Email", "Online"], rows),
+        "touring_rep": rng.choice(REPS, rows),
+        "selected_by": rng.choice(["Sales Rep", "Client", "Property"], rows),
+        "close_confidence": rng.integers(0, 101, rows),
+    })
+
+
+def copy_frame(cur, table, df):
+    """Bulk-load ``df`` into ``table`` with COPY, in chunks."""
+    for start in range(0, len(df), LOAD_CHUNK_ROWS):
+        chunk = df.iloc[start:start + LOAD_CHUNK_ROWS]
+        buffer = io.StringIO()
+        chunk.to_csv(buffer, index=False, header=False, na_rep="")
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {table} ({', '.join(chunk.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def apply_migrations(cur):
+    for path in sorted(SQL_DIR.glob("*.sql")):
+        # Nothing else uses the throwaway schema, and CONCURRENTLY can't run
+        # in the implicit transaction of a multi-statement query
+        cur.execute(path.read_text().replace(" CONCURRENTLY", ""))
+
+
+def create_schema(conn, schema, clients, seed):
+    """Create and fill ``schema``; returns the sample data the timings pick from."""
+    timings = {}
+    started = time.perf_counter()
+    client_df = make_clients(clients, seed)
+    building_df = make_buildings(max(clients // 50, 200), seed)
+    with_requirements = client_df["id"].sample(frac=0.7, random_state=seed).sort_values().to_numpy()
+    requirement_df = make_requirements(with_requirements, seed)
+    toured = np.random.default_rng(seed).choice(client_df["id"].to_numpy(), int(clients * 0.9))
+    schedule_df = make_schedules(np.sort(toured), building_df, seed)
+    timings["generate_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path = {schema}, public")
+        cur.execute(BASE_SCHEMA)
+        copy_frame(cur, "client", client_df)
+        copy_frame(cur, "building", building_df[["id", "name", "address", "neighborhood"]])
+        copy_frame(cur, "client_requirements", requirement_df)
+        copy_frame(cur, "client_schedule", schedule_df.drop(columns=["building_id"]))
+        for table in ("client", "building", "client_requirements", "client_schedule"):
+            cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+        timings["load_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        apply_migrations(cur)
+        cur.execute(
+            "UPDATE building b SET zip = v.zip, amenities = v.amenities::text[], latitude = v.lat, longitude = v.lon "
+            "FROM (SELECT * FROM unnest(%s::bigint[], %s::text[], %s::text[], %s::float8[], %s::float8[])) "
+            "AS v (id, zip, amenities, lat, lon) WHERE b.id = v.id",
+            (
+                building_df["id"].tolist(), building_df["zip"].tolist(), building_df["amenities"].tolist(),
+                building_df["latitude"].tolist(), building_df["longitude"].tolist(),
+            ),
+        )
+        cur.execute("ANALYZE")
+        timings["migrate_s"] = time.perf_counter() - started
+    return timings, client_df, building_df
+
+
+def measure(fn, repeat, setup=None):
+    """Call ``fn`` ``repeat`` times (after one warm-up) and summarize the latencies."""
+    samples = []
+    for attempt in range(repeat + 1):
+        args = (setup(attempt),) if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        if attempt:
+            samples.append(time.perf_counter() - started)
+    ms = np.array(samples) * 1000
+    return {
+        "n": len(ms),
+        "min_ms": round(float(ms.min()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def reset_app_state():
+    """Drop the app's process-wide pool and outbox so the next size gets fresh connections."""
+    from utils.client_search import has_trigram_support
+    from utils.db import current_pool, get_pool
+    from utils.metrics import get_metrics
+    from utils.outbox import current_outbox, get_outbox
+    from utils.query_cache import get_query_cache
+
+    outbox = current_outbox()
+    if outbox is not None:
+        outbox.stop()
+        get_outbox.clear()
+    pool = current_pool()
+    if pool is not None:
+        pool.closeall()
+        get_pool.clear()
+    has_trigram_support.clear()
+    get_query_cache().clear()
+    get_metrics().reset()
+
+
+def run_operations(client_df, building_df, repeat, seed):
+    from utils.client_grid import DEFAULT_SORT, GRID_BLOCK_SIZE, GRID_COLUMNS, block_cursor, fetch_client_block
+    from utils.client_search import SEARCH_PAGE_SIZE, search_clients
+    from utils.db import get_connection
+    from utils.formatting import derive_client_columns
+    from utils.metrics import get_metrics
+    from utils.outbox import get_outbox
+    from utils.query_cache import get_query_cache
+    from utils.requirements import apply_requirement
+    from utils.schedules import insert_tour
+    from pages.save_to_db import save_to_db
+
+    rng = np.random.default_rng(seed + 4)
+    results = {}
+    no_filter = json.dumps({}, sort_keys=True)
+
+    # Database timings bypass the shared query cache; its hit path is timed separately
+    def uncached_block(sort_expr, direction, filter_json, cursor=None):
+        get_query_cache().clear()
+        return fetch_client_block(sort_expr, direction, filter_json, cursor, GRID_BLOCK_SIZE)
+
+    results["fetch_client_block.first"] = measure(lambda: uncached_block(*DEFAULT_SORT, no_filter), repeat)
+    results["fetch_client_block.cached"] = measure(
+        lambda: fetch_client_block(*DEFAULT_SORT, no_filter, None, GRID_BLOCK_SIZE), repeat
+    )
+
+    cursors = [None]
+    for _ in range(DEEP_BLOCKS):
+        block = uncached_block(*DEFAULT_SORT, no_filter, cursors[-1])
+        cursors.append(block_cursor(block.head(GRID_BLOCK_SIZE)))
+    results[f"fetch_client_block.block_{DEEP_BLOCKS}"] = measure(
+        lambda: uncached_block(*DEFAULT_SORT, no_filter, cursors[-1]), repeat
+    )
+    results["fetch_client_block.sort_name"] = measure(
+        lambda: uncached_block(GRID_COLUMNS["Client Name"]["sort"], "asc", no_filter), repeat
+    )
+    stage_filter = json.dumps({"Stage": {"filterType": "text", "type": "equals", "filter": "Touring"}}, sort_keys=True)
+    results["fetch_client_block.filter_stage"] = measure(
+        lambda: uncached_block(*DEFAULT_SORT, stage_filter), repeat
+    )
+
+    sample = client_df.iloc[int(rng.integers(0, len(client_df)))]
+    terms = {
+        "name": sample["fullname"].split()[1][:4],
+        "full_name": sample["fullname"],
+        "email": sample["email"].split("@")[0],
+        "phone": "".join(ch for ch in sample["phone"] if ch.isdigit())[-7:],
+        "id": str(sample["id"]),
+        "miss": "zzqxv",
+    }
+    for label, term in terms.items():
+        results[f"search_clients.{label}"] = measure(
+            lambda term: search_clients(term, SEARCH_PAGE_SIZE + 1), repeat,
+            setup=lambda _, term=term: get_query_cache().clear() or term,
+        )
+
+    block = uncached_block(*DEFAULT_SORT, no_filter).head(GRID_BLOCK_SIZE).drop(columns=["sort_key"])
+    results["derive_client_columns.block"] = measure(lambda: derive_client_columns(block.copy()), repeat)
+    frame = client_df[["id", "fullname", "stage", "lastactivity", "created", "assigned_employee_name"]]
+    results[f"derive_client_columns.{len(frame)}_rows"] = measure(
+        lambda: derive_client_columns(frame.copy()), max(repeat // 5, 1)
+    )
+
+    # Saves go through the outbox like on the pages; the replay is timed after
+    outbox = get_outbox()
+    client_ids = client_df["id"].to_numpy()
+    saves = {"queued": 0}
+
+    def requirement_form(_):
+        saves["queued"] += 1
+        return {
+            "client_id": int(rng.choice(client_ids)),
+            "budget": float(rng.integers(15, 100) * 100),
+            "beds": int(rng.integers(0, 4)),
+            "comment": f"Benchmark save {saves['queued']}",
+        }
+
+    results["save_to_db.enqueue"] = measure(save_to_db, repeat, setup=requirement_form)
+
+    def tour_payload(_):
+        saves["queued"] += 1
+        picks = building_df.sample(5, random_state=int(rng.integers(1 << 31)))
+        client_id = int(rng.choice(client_ids))
+        return {
+            "client_id": client_id,
+            "close_confidence": 50,
+            "buildings": [
+                {
+                    "client_id": client_id, "building_id": int(b.id), "building": b.name, "unit_number": "1A",
+                    "price": 3000.0, "tour_date": str(datetime.now().date() + timedelta(days=3)),
+                    "tour_time": f"{10 + i}:00:00", "tour_type": "In-Person", "status": "Pending",
+                    "booked_via": "Phone", "touring_rep": REPS[0], "selected_by": "Sales Rep",
+                    "leasing_agent": "", "leasing_agent_email": "", "leasing_agent_phone": "", "comment": "",
+                }
+                for i, b in enumerate(picks.itertuples())
+            ],
+        }
+
+    # save_schedule_to_db on pages/client_schedule.py is this enqueue
+    results["save_schedule_to_db.enqueue"] = measure(
+        lambda payload: outbox.enqueue("tour", payload), repeat, setup=tour_payload
+    )
+
+    started = time.perf_counter()
+    outbox.wake()
+    while outbox.depth():
+        if time.perf_counter() - started > 600:
+            raise RuntimeError(f"Outbox did not drain: {outbox.stats()}")
+        time.sleep(0.05)
+    drained = time.perf_counter() - started
+    results["outbox.replay"] = {
+        "n": saves["queued"],
+        "total_s": round(drained, 3),
+        "per_write_ms": round(drained * 1000 / max(saves["queued"], 1), 3),
+    }
+    outbox.stop()
+
+    def write_requirement(form):
+        with get_connection() as conn:
+            apply_requirement(conn, {"client_id": form["client_id"], "changes": form}, None)
+            conn.commit()
+
+    results["apply_requirement"] = measure(write_requirement, repeat, setup=requirement_form)
+    results["insert_tour.5_buildings"] = measure(
+        lambda payload: insert_tour(payload["client_id"], payload["buildings"], payload["close_confidence"]),
+        repeat,
+        setup=tour_payload,
+    )
+    return results, get_metrics().queries()[:20]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nvs {baseline_path} ({baseline.get('commit')}), p50:")
+    for size, run in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {}).get("operations", {})
+        for name, stats in run["operations"].items():
+            if "p50_ms" in stats and "p50_ms" in before.get(name, {}):
+                ratio = stats["p50_ms"] / before[name]["p50_ms"] if before[name]["p50_ms"] else float("inf")
+                flag = "  <-- slower" if ratio > 1.2 else ""
+                print(f"  {size:>9} {name:<40} {before[name]['p50_ms']:9.2f} -> {stats['p50_ms']:9.2f} ms ({ratio:.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Disposable Postgres to create the benchmark schemas in")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated client counts")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/db_<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the schemas for inspection")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("pass --dsn or set BENCH_DATABASE_URL to a disposable database")
+
+    output = Path(args.output).resolve() if args.output else None
+    baseline = Path(args.baseline).resolve() if args.baseline else None
+    # The app modules read these at import time: point them at the benchmark
+    # database and a scratch outbox before anything imports utils.db. Running
+    # from the scratch directory also keeps the outbox away from a real
+    # client_schedules.json.
+    scratch = tempfile.mkdtemp(prefix="bench_db_")
+    os.environ["DATABASE_URL"] = args.dsn
+    os.environ.setdefault("DATABASE_SSLMODE", "prefer")
+    os.environ["OUTBOX_PATH"] = os.path.join(scratch, "outbox.sqlite3")
+    os.chdir(scratch)
+    import psycopg2
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    admin = psycopg2.connect(args.dsn, sslmode=os.environ["DATABASE_SSLMODE"])
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute("SHOW server_version")
+        results["postgres"] = cur.fetchone()[0]
+
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            schema = f"bench_{size}_{os.getpid()}"
+            print(f"{size:,} clients in schema {schema}")
+            try:
+                setup, client_df, building_df = create_schema(admin, schema, size, args.seed)
+                print("  " + ", ".join(f"{k} {v:.1f}" for k, v in setup.items()))
+                # Every pooled connection starts with the benchmark schema first
+                os.environ["PGOPTIONS"] = f"-c search_path={schema},public"
+                reset_app_state()
+                operations, queries = run_operations(client_df, building_df, args.repeat, args.seed)
+                for name, stats in operations.items():
+                    print(f"  {name:<40} " + " ".join(f"{k}={v}" for k, v in stats.items()))
+                results["sizes"][str(size)] = {"setup": setup, "operations": operations, "queries": queries}
+            finally:
+                reset_app_state()
+                if not args.keep:
+                    with admin.cursor() as cur:
+                        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    finally:
+        admin.close()
+
+    output = output or RESULTS_DIR / f"db_{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str) + "\n")
+    print(f"Wrote {output}")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: matching requirements against a synthetic unit inventory.
+
+Reports index build time and per-requirement latency of ``UnitIndex.match``.
+
+Usage:
+    python -m benchmarks.bench_matching [--units 50000] [--requirements 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.matching import UnitIndex
+from utils.requirements import AMENITY_OPTIONS
+
+NEIGHBORHOODS = ["Astoria", "Bushwick", "Chelsea", "Harlem", "Midtown", "Park Slope", "SoHo", "Williamsburg"]
+
+
+def make_units(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    buildings = rng.integers(1, max(rows // 40, 2), rows)
+    amenities = [
+        list(rng.choice(AMENITY_OPTIONS, rng.integers(0, 5), replace=False))
+        for _ in range(rows)
+    ]
+    return pd.DataFrame({
+        "unit_id": np.arange(1, rows + 1),
+        "building_id": buildings,
+        "building_name": [f"Building {b}" for b in buildings],
+        "unit_number": rng.integers(1, 400, rows).astype(str),
+        "price": rng.integers(1500, 12000, rows).astype(float),
+        "beds": rng.integers(0, 5, rows),
+        "baths": rng.choice([1.0, 1.5, 2.0, 2.5, 3.0], rows),
+        "sqft": rng.integers(350, 2500, rows).astype(float),
+        "available_date": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 180, rows), unit="D"),
+        "cats_allowed": rng.random(rows) < 0.6,
+        "dogs_allowed": rng.random(rows) < 0.4,
+        "parking": rng.random(rows) < 0.3,
+        "washer_dryer": rng.random(rows) < 0.5,
+        "zip": (10001 + buildings % 90).astype(str),
+        "neighborhood": np.array(NEIGHBORHOODS)[buildings % len(NEIGHBORHOODS)],
+        "amenities": amenities,
+    })
+
+
+def make_requirements(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    budget = rng.integers(2000, 9000, rows).astype(float)
+    move_in = pd.Timestamp("2026-01-15") + pd.to_timedelta(rng.integers(0, 120, rows), unit="D")
+    return pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "client_id": np.arange(1, rows + 1),
+        "budget": budget,
+        "budget_max": budget * rng.choice([1.0, 1.1, 1.25], rows),
+        "beds": rng.integers(0, 4, rows),
+        "baths": rng.choice([1.0, 1.5, 2.0], rows),
+        "sqft": rng.choice([0, 500, 700, 900], rows),
+        "sqft_max": rng.choice([0, 1200, 1600], rows),
+        "pets": rng.choice(["-1", "4", "1", "2"], rows).astype(object),
+        "parking": rng.choice(["0", "1", "3"], rows).astype(object),
+        "washer_dryer": rng.choice(["0", "1"], rows).astype(object),
+        "zip": [[str(10001 + z)] for z in rng.integers(0, 90, rows)],
+        "neighborhood": [list(rng.choice(NEIGHBORHOODS, 2, replace=False)) for _ in range(rows)],
+        "amenities": [list(rng.choice(AMENITY_OPTIONS, 2, replace=False)) for _ in range(rows)],
+        "move_in_date": move_in,
+        "move_in_date_max": move_in + pd.Timedelta(days=30),
+        "neighborhood_specific": rng.random(rows) < 0.3,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, default=50_000)
+    parser.add_argument("--requirements", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=20)
+    args = parser.parse_args()
+
+    units = make_units(args.units)
+    requirements = make_requirements(args.requirements)
+
+    start = time.perf_counter()
+    index = UnitIndex(units)
+    build_time = time.perf_counter() - start
+
+    latencies = []
+    for requirement in requirements.to_dict("records"):
+        start = time.perf_counter()
+        index.match(requirement, args.k)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+
+    print(f"units: {args.units:,}  requirements: {args.requirements:,}  k: {args.k}")
+    print(f"index build:    {build_time * 1000:8.1f} ms")
+    print(f"match p50:      {np.percentile(latencies, 50):8.2f} ms")
+    print(f"match p95:      {np.percentile(latencies, 95):8.2f} ms")
+    print(f"match all:      {latencies.sum():8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Load test: concurrent simulated sessions clicking through the app.
+
+Each simulated user is a Streamlit ``AppTest`` session (its own session state
+and widgets) running in a thread of this process, so the sessions share the
+connection pool, query cache, outbox and metrics the way the sessions of one
+``streamlit run`` server do. Every session repeats the flow:
+
+1. list: open pages/2_Client.py (first block of the client grid);
+2. search: type a client's name into the global search;
+3. open schedule: open pages/client_schedule.py for that client;
+4. submit: pick a building, touring rep and time, and submit the tour.
+
+Each step is one script run, timed end to end, so it includes the page's own
+Python work, not only the database. Meanwhile a monitor samples the pool
+(connections in use, waits for a free one) and ``pg_stat_activity``. The
+report gives flows per second, per-step p50/p95/p99, errors, connection peaks
+and how long the outbox took to replay the submitted tours; rerun with other
+``--sessions`` and ``--pool-max`` to size ``DB_POOL_MAX`` and the server.
+
+Uses the same throwaway schema as benchmarks/bench_db.py: a fresh one with
+``--clients`` synthetic clients, or an existing one kept by
+``bench_db --keep`` with ``--schema``. Point ``--dsn`` (or
+``BENCH_DATABASE_URL``) at a disposable local Postgres.
+
+Usage:
+    python -m benchmarks.load_test --dsn postgresql://localhost/bench [--sessions 20] [--flows 5]
+        [--think 1.0] [--pool-max 10] [--clients 100000 | --schema bench_100000_1234]
+        [--output benchmarks/results/load_<commit>.json] [--keep]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, time as dtime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_db import REPS, RESULTS_DIR, create_schema, git_commit, reset_app_state
+
+PAGES_DIR = Path(__file__).resolve().parent.parent / "pages"
+STEPS = ("list", "search", "open_schedule", "submit")
+# Seconds one script run may take before AppTest gives up on it
+RUN_TIMEOUT = 120
+MONITOR_INTERVAL = 0.1
+SAMPLE_CLIENTS = 1000
+
+
+def sample_clients(conn, rows, seed):
+    """Random existing clients the sessions search for and schedule."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT setseed(%s)", (seed % 1000 / 1000,))
+        cur.execute(
+            "SELECT id, fullname FROM client WHERE fullname IS NOT NULL ORDER BY random() LIMIT %s", (rows,)
+        )
+        return cur.fetchall()
+
+
+def sample_buildings(conn, rows):
+    with conn.cursor() as cur:
+        cur.execute("SELECT name FROM building ORDER BY id LIMIT %s", (rows,))
+        return [name for (name,) in cur.fetchall()]
+
+
+class Monitor:
+    """Samples pool usage and server connections until stopped."""
+
+    def __init__(self, admin_dsn, sslmode):
+        import psycopg2
+
+        self._conn = psycopg2.connect(admin_dsn, sslmode=sslmode)
+        self._conn.autocommit = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-monitor", daemon=True)
+        self.in_use = []
+        self.backends = []
+
+    def _run(self):
+        from utils.db import current_pool
+
+        while not self._stop.is_set():
+            pool = current_pool()
+            if pool is not None:
+                self.in_use.append(pool.stats()["in_use"])
+            with self._conn.cursor() as cur:
+                # Minus this monitor's own connection
+                cur.execute(
+                    "SELECT count(*) - 1 FROM pg_stat_activity WHERE datname = current_database()"
+                )
+                self.backends.append(cur.fetchone()[0])
+            self._stop.wait(MONITOR_INTERVAL)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._conn.close()
+
+    def summary(self):
+        from utils.db import current_pool
+
+        pool = current_pool()
+        in_use = np.array(self.in_use or [0])
+        return {
+            "samples": len(self.in_use),
+            "pool_in_use_peak": int(in_use.max()),
+            "pool_in_use_mean": round(float(in_use.mean()), 2),
+            "pool_in_use_p95": round(float(np.percentile(in_use, 95)), 2),
+            "server_connections_peak": max(self.backends, default=0),
+            "pool": pool.stats() if pool is not None else None,
+        }
+
+
+@contextmanager
+def shared_runtime():
+    """
+    One Streamlit runtime for every session in this process, as on a server.
+
+    ``AppTest`` installs a mock runtime (and its ``global.appTest`` config
+    override) at the start of each run and removes it at the end, which
+    breaks the runs still going in other threads. Inside this block its
+    per-run install is redirected to a subclass and the process keeps one.
+    The pages are also compiled once into a shared script cache: a server
+    does the same, and Python 3.11 can fail compiling in several threads at once.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+
+    class SessionRuntime(Runtime):
+        """Receives ``AppTest``'s per-run ``_instance`` instead of ``Runtime``."""
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    script_cache = ScriptCache()
+    app_test.Runtime = SessionRuntime
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    Runtime._instance = runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        app_test.Runtime = Runtime
+        app_test.ScriptCache = local_script_runner.ScriptCache = ScriptCache
+        Runtime._instance = None
+
+
+def _check(at, step):
+    """Raise if the run failed or the page showed an error."""
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].value}")
+    if at.error:
+        raise RuntimeError(f"{step}: " + " ".join(str(error.value) for error in at.error))
+
+
+def _book_anyway(at):
+    """Tick the page's "Book anyway" box if it shows one; True if it did."""
+    for checkbox in at.checkbox:
+        if checkbox.label.startswith("Book anyway") and not checkbox.value:
+            checkbox.check()
+            return True
+    return False
+
+
+def _button(at, label):
+    for button in at.button:
+        if label in button.label:
+            return button
+    raise LookupError(f"No '{label}' button on the page")
+
+
+class Session:
+    """One simulated user running the flow ``flows`` times."""
+
+    def __init__(self, number, clients, buildings, flows, think, seed):
+        self.number = number
+        self.clients = clients
+        self.buildings = buildings
+        self.flows = flows
+        self.think = think
+        self.rng = np.random.default_rng(seed + number)
+        self.samples = []  # (step, seconds, failed)
+        self.errors = []
+        self.completed = 0
+        self.clashes = 0
+
+    def _pause(self):
+        if self.think:
+            time.sleep(self.rng.exponential(self.think))
+
+    def _step(self, name, at, action=None):
+        started = time.perf_counter()
+        try:
+            (action or at.run)()
+            _check(at, name)
+        except Exception as e:
+            self.samples.append((name, time.perf_counter() - started, True))
+            self.errors.append(f"{type(e).__name__}: {e}")
+            return False
+        self.samples.append((name, time.perf_counter() - started, False))
+        return True
+
+    def flow(self):
+        from streamlit.testing.v1 import AppTest
+
+        client_id, fullname = self.clients[int(self.rng.integers(len(self.clients)))]
+
+        at = AppTest.from_file(str(PAGES_DIR / "2_Client.py"), default_timeout=RUN_TIMEOUT)
+        # The keyup component only runs in a browser; the plain input runs the same search
+        at.session_state["search_as_you_type"] = False
+        if not self._step("list", at):
+            return False
+        self._pause()
+        if not self._step("search", at, at.text_input(key="global_search").input(fullname).run):
+            return False
+        self._pause()
+
+        at = AppTest.from_file(str(PAGES_DIR / "client_schedule.py"), default_timeout=RUN_TIMEOUT)
+        at.query_params["client_id"] = str(client_id)
+        if not self._step("open_schedule", at):
+            return False
+        self._pause()
+
+        building = self.buildings[int(self.rng.integers(len(self.buildings)))]
+        if any(widget.key == "building_query_0" for widget in at.text_input):
+            at.text_input(key="building_query_0").set_value(building)
+        else:
+            at.text_input(key="building_0").set_value(building)
+        at.text_input(key="touring_rep_0").set_value(REPS[int(self.rng.integers(len(REPS)))])
+        at.time_input(key="time_0").set_value(dtime(int(self.rng.integers(9, 19)), int(self.rng.choice([0, 30]))))
+        at.run()
+        # Reps book over a clash rather than give up on the tour
+        _book_anyway(at)
+
+        def submit():
+            _button(at, "Submit Schedule").click().run()
+            # Another session took the slot after this form was filled
+            if any("already has a tour" in str(error.value) for error in at.error) and _book_anyway(at):
+                self.clashes += 1
+                _button(at, "Submit Schedule").click().run()
+
+        if not self._step("submit", at, submit):
+            return False
+        if not any("saved successfully" in str(message.value) for message in at.success):
+            self.errors.append("submit: no confirmation shown")
+            return False
+        return True
+
+    def run(self):
+        for _ in range(self.flows):
+            try:
+                self.completed += self.flow()
+            except Exception as e:
+                self.errors.append(f"{type(e).__name__}: {e}")
+            self._pause()
+        return self
+
+
+def summarize(samples):
+    by_step = {}
+    for step in STEPS:
+        seconds = np.array([s for name, s, failed in samples if name == step and not failed])
+        failures = sum(1 for name, _, failed in samples if name == step and failed)
+        if not len(seconds):
+            by_step[step] = {"n": 0, "errors": failures}
+            continue
+        ms = seconds * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99]).tolist()
+        by_step[step] = {
+            "n": len(ms),
+            "errors": failures,
+            "p50_ms": round(p50, 1),
+            "p95_ms": round(p95, 1),
+            "p99_ms": round(p99, 1),
+            "max_ms": round(float(ms.max()), 1),
+        }
+    return by_step
+
+
+def run_load(clients, buildings, args):
+    from utils.metrics import get_metrics
+    from utils.outbox import get_outbox
+
+    sessions = [
+        Session(number, clients, buildings, args.flows, args.think, args.seed) for number in range(args.sessions)
+    ]
+    monitor = Monitor(args.dsn, os.environ["DATABASE_SSLMODE"])
+    monitor.start()
+    started = time.perf_counter()
+    try:
+        with shared_runtime(), ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="session") as executor:
+            futures = []
+            for session in sessions:
+                futures.append(executor.submit(session.run))
+                # Users don't all arrive in the same instant
+                time.sleep(args.ramp_up / max(args.sessions, 1))
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        # The submits only queued their tours; time the replay into Postgres
+        outbox = get_outbox()
+        drain_started = time.perf_counter()
+        outbox.wake()
+        while outbox.depth():
+            if time.perf_counter() - drain_started > 600:
+                raise RuntimeError(f"Outbox did not drain: {outbox.stats()}")
+            time.sleep(0.05)
+        drained = time.perf_counter() - drain_started
+    finally:
+        monitor.stop()
+
+    samples = [sample for session in sessions for sample in session.samples]
+    errors = [error for session in sessions for error in session.errors]
+    completed = sum(session.completed for session in sessions)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "flows_completed": completed,
+        "flows_attempted": args.sessions * args.flows,
+        "flows_per_s": round(completed / elapsed, 3) if elapsed else 0.0,
+        # Tours resubmitted because another session booked the rep's slot first
+        "clashes": sum(session.clashes for session in sessions),
+        "steps": summarize(samples),
+        "connections": monitor.summary(),
+        "outbox_drain_s": round(drained, 3),
+        "errors": sorted(set(errors))[:20],
+        "error_count": len(errors),
+        "spans": get_metrics().spans()[:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Disposable Postgres to run against")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--flows", type=int, default=5, help="Times each user runs list → search → schedule → submit")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between steps in seconds (0 for none)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which the sessions start")
+    parser.add_argument("--pool-max", type=int, help="DB_POOL_MAX for this run (default: the environment's)")
+    parser.add_argument("--clients", type=int, default=100_000, help="Synthetic clients for a fresh schema")
+    parser.add_argument("--schema", help="Existing schema to use instead, e.g. one kept by bench_db --keep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/load_<commit>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep the fresh schema for later runs")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("pass --dsn or set BENCH_DATABASE_URL to a disposable database")
+
+    output = Path(args.output).resolve() if args.output else None
+    # As in bench_db: the app reads these at import time, and the outbox and
+    # legacy schedule file stay in a scratch directory
+    scratch = tempfile.mkdtemp(prefix="load_test_")
+    os.environ["DATABASE_URL"] = args.dsn
+    os.environ.setdefault("DATABASE_SSLMODE", "prefer")
+    os.environ["OUTBOX_PATH"] = os.path.join(scratch, "outbox.sqlite3")
+    if args.pool_max:
+        os.environ["DB_POOL_MAX"] = str(args.pool_max)
+    os.chdir(scratch)
+    import psycopg2
+
+    admin = psycopg2.connect(args.dsn, sslmode=os.environ["DATABASE_SSLMODE"])
+    admin.autocommit = True
+    schema = args.schema or f"load_{args.clients}_{os.getpid()}"
+    try:
+        if args.schema:
+            print(f"Using schema {schema}")
+        else:
+            print(f"{args.clients:,} clients in schema {schema}")
+            setup, _, _ = create_schema(admin, schema, args.clients, args.seed)
+            print("  " + ", ".join(f"{k} {v:.1f}" for k, v in setup.items()))
+        with admin.cursor() as cur:
+            cur.execute(f"SET search_path = {schema}, public")
+        clients = sample_clients(admin, SAMPLE_CLIENTS, args.seed)
+        buildings = sample_buildings(admin, SAMPLE_CLIENTS)
+        os.environ["PGOPTIONS"] = f"-c search_path={schema},public"
+        reset_app_state()
+        from utils.db import DB_POOL_MAX
+
+        print(f"{args.sessions} sessions x {args.flows} flows, pool max {DB_POOL_MAX}")
+        results = {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "schema": schema,
+            "sessions": args.sessions,
+            "flows": args.flows,
+            "think_s": args.think,
+            "pool_max": DB_POOL_MAX,
+            **run_load(clients, buildings, args),
+        }
+    finally:
+        reset_app_state()
+        if not args.schema and not args.keep:
+            with admin.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        admin.close()
+
+    print(f"  {results['flows_completed']}/{results['flows_attempted']} flows in {results['elapsed_s']:.1f}s "
+          f"({results['flows_per_s']:.2f}/s), {results['error_count']} errors, {results['clashes']} clashes")
+    for step, stats in results["steps"].items():
+        print(f"  {step:<14} " + " ".join(f"{k}={v}" for k, v in stats.items()))
+    connections = results["connections"]
+    print(f"  pool in use: peak {connections['pool_in_use_peak']}, p95 {connections['pool_in_use_p95']}; "
+          f"server connections peak {connections['server_connections_peak']}")
+    if connections["pool"]:
+        print(f"  pool waits {connections['pool']['waits']}, timeouts {connections['pool']['timeouts']}")
+    print(f"  outbox drained in {results['outbox_drain_s']:.2f}s")
+    for error in results["errors"][:5]:
+        print(f"  ! {error}")
+
+    output = output or RESULTS_DIR / f"load_{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str) + "\n")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
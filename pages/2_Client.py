@@ -1,57 +1,20 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
 import webbrowser
-from datetime import datetime, timezone
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-DB_URL = os.getenv("DATABASE_URL")
-
-@st.cache_data(show_spinner=True)
-def fetch_clients(offset=0, limit=20):
-    try:
-        conn = psycopg2.connect(DB_URL, sslmode='require')
-        st.success("Database connection established successfully.")
-    except Exception as e:
-        st.error(f"Database connection failed: {e}")
-        return pd.DataFrame()
-    query = f'''
-        SELECT id, fullname, stage, lastactivity, created, assigned_employee_name
-        FROM client
-        ORDER BY created DESC
-        OFFSET {offset} LIMIT {limit}
-    '''
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
-def human_readable_time_diff(dt):
-    now = datetime.now(timezone.utc)
-    diff = now - dt
-    minutes = int(diff.total_seconds() // 60)
-    if minutes < 60:
-        return f"{minutes} minutes ago"
-    hours = minutes // 60
-    if hours < 24:
-        return f"{hours} hours ago"
-    days = hours // 24
-    return f"{days} days ago"
+import json
+from utils.client_grid import (
+    fetch_client_block, block_cursor, resolve_sort, grid_models, GRID_BLOCK_SIZE
+)
+from utils.client_search import SEARCH_PAGE_SIZE, SEARCH_MAX_RESULTS
+from utils.live_search import get_live_search, SEARCH_DEBOUNCE_MS
+from utils.formatting import derive_client_columns
+from utils.metrics import dataframe_bytes, span
 
-def calc_age(created):
-    now = datetime.now(timezone.utc)
-    diff = now - created
-    minutes = int(diff.total_seconds() // 60)
-    if minutes < 60:
-        return f"{minutes} minutes"
-    hours = minutes // 60
-    if hours < 24:
-        return f"{hours} hours"
-    days = hours // 24
-    return f"{days} days"
+try:
+    from st_keyup import st_keyup
+except ImportError:  # streamlit-keyup is optional; fall back to search-on-enter
+    st_keyup = None
 
 st.markdown("""
     <style>
@@ -74,46 +37,68 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 st.title("👤 Client List")
-search_query = st.text_input("Global Search", "", key="global_search")
+search_as_you_type = st_keyup is not None and st.toggle(
+    "Search as you type", value=True, key="search_as_you_type"
+)
+if search_as_you_type:
+    # Only sends the term once typing pauses for SEARCH_DEBOUNCE_MS
+    search_query = st_keyup("Global Search", key="global_search_live", debounce=SEARCH_DEBOUNCE_MS)
+else:
+    search_query = st.text_input("Global Search", "", key="global_search")
+search_query = (search_query or "").strip()
 
-page_size = 30
 # If search is active, fetch from DB directly for accurate results
 if search_query:
-    if search_query.isdigit():
-        query = f"""
-            SELECT id, fullname, stage, lastactivity, created, assigned_employee_name
-            FROM client
-            WHERE id = {int(search_query)}
-            ORDER BY created DESC
-        """
-    else:
-        query = f"""
-            SELECT id, fullname, stage, lastactivity, created, assigned_employee_name
-            FROM client
-            WHERE LOWER(fullname) LIKE '%{search_query.lower()}%'
-            ORDER BY created DESC
-        """
+    # Reset the result cap whenever the search term changes
+    if st.session_state.get('search_term') != search_query:
+        st.session_state['search_term'] = search_query
+        st.session_state['search_limit'] = SEARCH_PAGE_SIZE
+    search_limit = st.session_state['search_limit']
+    search_status = st.empty()
     try:
-        conn = psycopg2.connect(DB_URL, sslmode='require')
-        df = pd.read_sql(query, conn)
-        conn.close()
+        # Fetch one extra row to know whether "Show more" has anything to add.
+        # Refinements of an earlier term are served from the session's results.
+        with span("client_list.search") as search_span:
+            df = get_live_search().search(search_query, search_limit + 1, status=search_status)
+            search_span.record(rows=None if df is None else len(df))
     except Exception as e:
         st.error(f"Database connection failed: {e}")
         st.stop()
+    if df is None:
+        st.warning("Search took too long and was cancelled. Try a more specific term.")
+        st.stop()
+    search_has_more = len(df) > search_limit and search_limit < SEARCH_MAX_RESULTS
+    df = df.head(search_limit)
+    df = df.drop(columns=['score', 'email', 'phone'], errors='ignore')
 else:
-    if 'client_offset' not in st.session_state:
-        st.session_state['client_offset'] = 0
-    if 'client_data' not in st.session_state:
-        st.session_state['client_data'] = fetch_clients(0, page_size)
-    df = st.session_state['client_data']
+    # Server-side row model: the grid's sort/filter state becomes SQL and only
+    # the current block of rows is sent to the browser
+    sort_model = st.session_state.get('grid_sort_model', [])
+    filter_model = st.session_state.get('grid_filter_model', {})
+    if 'grid_cursors' not in st.session_state:
+        st.session_state['grid_cursors'] = [None]
+    sort_expr, sort_dir = resolve_sort(sort_model)
+    try:
+        with span("client_list.fetch_block") as fetch_span:
+            df = fetch_client_block(
+                sort_expr, sort_dir, json.dumps(filter_model, sort_keys=True),
+                st.session_state['grid_cursors'][-1], GRID_BLOCK_SIZE
+            )
+            fetch_span.record(rows=len(df), size=dataframe_bytes(df))
+    except Exception as e:
+        st.error(f"Database connection failed: {e}")
+        st.stop()
+    grid_has_next = len(df) > GRID_BLOCK_SIZE
+    df = df.head(GRID_BLOCK_SIZE)
+    grid_next_cursor = block_cursor(df) if grid_has_next else None
+    df = df.drop(columns=['sort_key'])
 
 # Convert datetimes
 if not df.empty:
-    df['lastactivity'] = pd.to_datetime(df['lastactivity'], utc=True)
-    df['created'] = pd.to_datetime(df['created'], utc=True)
-    df['Last Activity'] = df['lastactivity'].apply(human_readable_time_diff)
-    df['Created Date'] = df['created'].dt.strftime('%Y-%m-%d')
-    df['Age'] = df['created'].apply(calc_age)
+    # One reference time for the whole render; vectorized, NULL-safe labels
+    with span("client_list.derive") as derive_span:
+        df = derive_client_columns(df.copy())
+        derive_span.record(rows=len(df))
     df = df.rename(columns={
         'id': 'Client ID',
         'fullname': 'Client Name',
@@ -179,6 +164,7 @@ class DropdownCellRenderer {
       <option value="">Select…</option>
       <option value="requirement">Requirements</option>
       <option value="schedule">Schedule</option>
+      <option value="matches">Matches</option>
       <option value="dead">Dead</option>
     `;
     this.eGui.addEventListener('change', () => {
@@ -200,6 +186,8 @@ class DropdownCellRenderer {
         targetPage = '/ClientRequirement';
       } else if (val === 'schedule') {
         targetPage = '/client_schedule';
+      } else if (val === 'matches') {
+        targetPage = '/Building_Matches';
       } else if (val === 'dead') {
         // Add dead client page route if needed
         targetPage = '/ClientRequirement'; // fallback for now
@@ -224,29 +212,57 @@ gb.configure_column(
     filter=False,
     sortable=False,
 )
-gb.configure_pagination(paginationAutoPageSize=True)
 gb.configure_default_column(resizable=True, filter=True, sortable=True)
+if search_query:
+    gb.configure_pagination(paginationAutoPageSize=True)
+else:
+    # Relative times can't be filtered in SQL; they still sort by their timestamp
+    gb.configure_column("Last Activity", filter=False)
+    gb.configure_column("Age", filter=False)
+    gb.configure_column("Client ID", filter="agNumberColumnFilter")
 
+# Serializing the frame for the grid component is timed as its own phase
 # 3) Make sure you still have:
-response = AgGrid(
-    df,
-    gridOptions=gb.build(),
-    theme="streamlit",
-    allow_unsafe_jscode=True,   # ← this is critical
-    unsafe_allow_html=True,
-    fit_columns_on_grid_load=True,
-    height=900,
-    width='100%',
-    enable_enterprise_modules=False,
-    reload_data=True,
-    columns_auto_size_mode='FIT_ALL_COLUMNS_TO_VIEW'
-)
+with span("client_list.grid") as grid_span:
+    response = AgGrid(
+        df,
+        gridOptions=gb.build(),
+        theme="streamlit",
+        allow_unsafe_jscode=True,   # ← this is critical
+        unsafe_allow_html=True,
+        fit_columns_on_grid_load=True,
+        height=900,
+        width='100%',
+        enable_enterprise_modules=False,
+        reload_data=True,
+        columns_auto_size_mode='FIT_ALL_COLUMNS_TO_VIEW',
+        update_on=[] if search_query else ['sortChanged', 'filterChanged'],
+        key='client_grid_search' if search_query else 'client_grid',
+    )
+    grid_span.record(rows=len(df), size=dataframe_bytes(df))
+
+if search_query and search_has_more and st.button("Show more results"):
+    st.session_state['search_limit'] = min(search_limit + SEARCH_PAGE_SIZE, SEARCH_MAX_RESULTS)
+    st.rerun()
+
+if not search_query:
+    # A new sort or filter starts again from the first block
+    new_sort_model, new_filter_model = grid_models(response.grid_state)
+    if (new_sort_model, new_filter_model) != (sort_model, filter_model):
+        st.session_state['grid_sort_model'] = new_sort_model
+        st.session_state['grid_filter_model'] = new_filter_model
+        st.session_state['grid_cursors'] = [None]
+        st.rerun()
 
-# Infinite scroll: load more when user scrolls to bottom
-if not search_query and st.button("Load more clients"):
-    st.session_state['client_offset'] += page_size
-    new_df = fetch_clients(st.session_state['client_offset'], page_size)
-    if not new_df.empty:
-        st.session_state['client_data'] = pd.concat([st.session_state['client_data'], new_df], ignore_index=True)
-    else:
-        st.info("No more clients to load.")
+    cursors = st.session_state['grid_cursors']
+    nav_prev, nav_label, nav_next = st.columns([1, 2, 1])
+    with nav_prev:
+        if st.button("◀ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with nav_label:
+        st.caption(f"Block {len(cursors)} · {len(df)} clients")
+    with nav_next:
+        if st.button("Next ▶", disabled=not grid_has_next):
+            cursors.append(grid_next_cursor)
+            st.rerun()
@@ -0,0 +1,79 @@
+import streamlit as st
+from utils.matching import MATCH_TOP_K, get_unit_index
+from utils.metrics import span
+from utils.rematch import load_stored_matches
+from utils.requirements import load_latest_requirement
+
+st.set_page_config(page_title="Building Matches", page_icon="🏘️", layout="wide")
+
+st.title("🏘️ Building Matches")
+st.caption("Available units ranked against the client's latest saved requirements.")
+
+MATCH_COLUMNS = [
+    "score", "building_name", "unit_number", "price", "beds", "baths", "sqft",
+    "available_date", "zip", "neighborhood", "amenities",
+]
+
+params = st.query_params
+c1, c2 = st.columns([2, 1])
+with c1:
+    client_id = st.text_input("Client ID", value=params.get("client_id", ""))
+with c2:
+    top_k = st.number_input("Matches to show", min_value=5, max_value=200, value=MATCH_TOP_K, step=5)
+    live = st.toggle("Recompute now", help="Score the current inventory instead of showing last night's suggestions")
+
+if not client_id.strip():
+    st.info("Enter a client ID to see matching units.")
+    st.stop()
+if not client_id.strip().isdigit():
+    st.error("Client ID must be a number.")
+    st.stop()
+
+try:
+    with span("matches.load"):
+        requirement = load_latest_requirement(int(client_id))
+        stored = load_stored_matches(int(client_id)) if not live else None
+except Exception as e:
+    st.error(f"Database connection failed: {e}")
+    st.stop()
+
+if requirement is None:
+    st.warning(f"Client {client_id} has no saved requirements yet.")
+    st.stop()
+
+budget = requirement.get("budget_max") or requirement.get("budget")
+st.markdown(
+    f"**Budget:** ${float(budget or 0):,.0f} · **Beds:** {requirement.get('beds')} · "
+    f"**Baths:** {requirement.get('baths')} · **Move-in:** {requirement.get('move_in_date')} · "
+    f"**Areas:** {', '.join(requirement.get('zip') or []) or 'Any'} {', '.join(requirement.get('neighborhood') or [])}"
+)
+
+# Suggestions from the nightly re-match (python -m utils.rematch), unless the
+# requirements were edited since it ran. Edits update the latest row in place,
+# so an unchanged requirement id does not mean the suggestions are current.
+if stored is not None and not stored.empty and stored["computed_at"].min() >= requirement["updated_at"]:
+    matches = stored.head(int(top_k))
+    st.caption(f"Top {len(matches)} suggestions, computed {stored['computed_at'].max():%Y-%m-%d %H:%M}")
+else:
+    try:
+        index = get_unit_index()
+    except Exception as e:
+        st.error(f"Database connection failed: {e}")
+        st.stop()
+    with span("matches.score") as score_span:
+        matches = index.match(requirement, int(top_k))
+        score_span.record(rows=len(matches))
+    if matches.empty:
+        st.info(f"None of the {len(index):,} available units meet this client's must-haves.")
+        st.stop()
+    st.caption(f"Top {len(matches)} of {len(index):,} available units")
+
+st.dataframe(
+    matches[MATCH_COLUMNS],
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%.0f"),
+        "price": st.column_config.NumberColumn("Price", format="$%d"),
+    },
+)
@@ -0,0 +1,70 @@
+import streamlit as st
+from utils.bulk_import import IMPORT_TARGETS, IMPORT_CHUNK_SIZE, import_file, template_csv
+from utils.metrics import span
+
+st.set_page_config(page_title="Bulk Import", page_icon="📥", layout="wide")
+
+st.title("📥 Bulk Import")
+st.caption("Load revenue entries or client requirements from a CSV or Excel file instead of entering them one form at a time.")
+
+with st.expander("Instructions", expanded=False):
+    st.markdown("""
+    - The first row must contain column names. They match the form fields, e.g. `client_id`, `move_in_date`, `rent`.
+    - Download the template below for the full list of columns. Columns you leave out are saved as empty.
+    - Dates use `YYYY-MM-DD`. Yes/no fields accept `yes`/`no`, `true`/`false` or `1`/`0`.
+    - List fields (zip codes, neighborhoods, amenities) are comma separated inside one cell.
+    - Rows that fail a check are skipped and listed below with the reason; every other row is loaded.
+    - Revenue rows update an existing entry with the same Client ID and Tour ID.
+    - Client requirement rows replace the client's current requirements, or add them for a new client.
+    """)
+
+target = st.selectbox(
+    "What are you importing?",
+    options=list(IMPORT_TARGETS),
+    format_func=lambda key: IMPORT_TARGETS[key]["label"],
+)
+st.download_button(
+    "⬇️ Download CSV template",
+    data=template_csv(target),
+    file_name=f"{target}_template.csv",
+    mime="text/csv",
+)
+
+uploaded = st.file_uploader("Upload file", type=["csv", "xlsx"])
+
+if uploaded is not None and st.button("📥 Import", type="primary"):
+    progress = st.empty()
+    try:
+        with st.spinner("Importing..."), span(f"bulk_import.{target}") as import_span:
+            result = import_file(
+                uploaded,
+                uploaded.name,
+                target,
+                chunk_size=IMPORT_CHUNK_SIZE,
+                on_chunk=lambda rows: progress.caption(f"Validated {rows:,} rows..."),
+            )
+            import_span.record(rows=result["rows"], size=uploaded.size)
+    except Exception as e:
+        progress.empty()
+        st.error(f"❌ Import failed, nothing was saved: {e}")
+        st.stop()
+
+    progress.empty()
+    rejects = result["rejects"]
+    rejected_rows = rejects["row"].nunique() if not rejects.empty else 0
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Rows in file", f"{result['rows']:,}")
+    c2.metric("Rows saved", f"{result['loaded']:,}")
+    c3.metric("Rows rejected", f"{rejected_rows:,}")
+
+    if rejects.empty:
+        st.success("✅ All rows imported.")
+    else:
+        st.warning(f"⚠️ {rejected_rows:,} rows were skipped. Fix them and import just those rows again.")
+        st.dataframe(rejects.head(1000), use_container_width=True, hide_index=True)
+        st.download_button(
+            "⬇️ Download rejected rows",
+            data=rejects.to_csv(index=False),
+            file_name=f"{target}_rejects.csv",
+            mime="text/csv",
+        )
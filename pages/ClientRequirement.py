@@ -1,6 +1,11 @@
 import streamlit as st
-from datetime import datetime, time
 from pages.save_to_db import save_to_db  # Changed to absolute import
+from utils.metrics import span
+from utils.outbox import get_outbox, show_pending_writes
+from utils.requirements import (
+    PET_OPTIONS, WASHER_DRYER_OPTIONS, PARKING_OPTIONS, AMENITY_OPTIONS, PREFERENCE_OPTIONS, WEEKDAYS,
+    get_latest_requirement, requirement_form_values
+)
 
 st.set_page_config(page_title="Client Requirements", page_icon="🏡", layout="wide")
 
@@ -38,104 +43,124 @@ st.markdown('<div class="form-title">🏡 Add Client Housing Requirement</div>',
 
 # Get client_id from URL
 params = st.query_params
-client_id = params.get("client_id", [None])[0] if "client_id" in params else None
+client_id = params.get("client_id")
 if client_id is not None:
     client_id = str(client_id)  # Explicitly convert to string
 
 # Debug: Log the client_id to verify its value
 st.write(f"Debug: Retrieved client_id = {client_id}")
 
+# Prefill with the client's latest saved requirements
+current = None
+saved_forms = st.session_state.setdefault("saved_requirement_forms", {})
+if client_id in saved_forms and get_outbox().depth_for("client_requirement", client_id):
+    # Saved here but not yet synced, so the database still has the old values
+    defaults = saved_forms[client_id]
+else:
+    # Synced: the outbox evicted the cached row when it applied the save
+    saved_forms.pop(client_id, None)
+    if client_id:
+        try:
+            with span("requirements.load"):
+                current = get_latest_requirement(client_id)
+        except Exception as e:
+            st.warning(f"⚠️ Could not load saved requirements: {e}")
+    defaults = requirement_form_values(current)
+if current is not None:
+    st.caption(f"Editing the requirements saved {current.get('updated_at') or ''}. Only changed fields are saved.")
+
+
+def option_index(options, code):
+    # Codes are ints in the prefill but saved as text
+    return next((i for i, (value, _) in enumerate(options) if str(value) == str(code)), 0)
+
+
 with st.form("req_form", clear_on_submit=False):
     st.subheader("📝 Basic Info")
     c1, c2, c3 = st.columns(3)
     with c1:
-        move_in_date = st.date_input("Move-In Date*", value=datetime.today())
-        move_in_date_max = st.date_input("Max Move-In Date (optional)")
-        tour_date = st.date_input("Preferred Tour Date")
+        move_in_date = st.date_input("Move-In Date*", value=defaults["move_in_date"])
+        move_in_date_max = st.date_input("Max Move-In Date (optional)", value=defaults["move_in_date_max"])
+        tour_date = st.date_input("Preferred Tour Date", value=defaults["tour_date"])
     with c2:
-        budget = st.number_input("Budget ($)*", min_value=0, step=100)
-        max_budget = st.number_input("Max Budget ($)", min_value=0, step=100)
-        sqft = st.number_input("Square Feet*", min_value=0, step=50)
-        sqft_max = st.number_input("Max Square Feet", min_value=0, step=50)
+        budget = st.number_input("Budget ($)*", min_value=0, step=100, value=defaults["budget"])
+        max_budget = st.number_input("Max Budget ($)", min_value=0, step=100, value=defaults["budget_max"])
+        sqft = st.number_input("Square Feet*", min_value=0, step=50, value=defaults["sqft"])
+        sqft_max = st.number_input("Max Square Feet", min_value=0, step=50, value=defaults["sqft_max"])
     with c3:
-        beds = st.number_input("Bedrooms*", min_value=0, step=1)
-        baths = st.number_input("Bathrooms*", min_value=0.0, step=0.5, value=0.0)  # Ensure all numerical arguments are floats
-        lease_term = st.number_input("Lease Term (months)", min_value=0, step=1)
+        beds = st.number_input("Bedrooms*", min_value=0, step=1, value=defaults["beds"])
+        baths = st.number_input("Bathrooms*", min_value=0.0, step=0.5, value=defaults["baths"])  # Ensure all numerical arguments are floats
+        lease_term = st.number_input("Lease Term (months)", min_value=0, step=1, value=defaults["lease_term"])
 
     st.divider()
 
     st.subheader("📍 Preferences")
     c1, c2 = st.columns(2)
     with c1:
-        pets = st.selectbox("Pet Policy", options=[
-            (-1, '------'), (4, "No Pet"), (0,"Has Pets"), (1,"Has Cats Only"), (2,"Has Dogs Only"), (3,"Has Dangerous Pets")
-        ], format_func=lambda x: x[1])
+        pets = st.selectbox("Pet Policy", options=PET_OPTIONS, format_func=lambda x: x[1],
+                            index=option_index(PET_OPTIONS, defaults["pets"]))
         pets = pets[0]
-        pets_comment = st.text_area("Pet Comments")
-        washer_dryer = st.selectbox("Washer/Dryer Preference", options=[
-            (0, "Any"), (1, "Yes"), (3, "No"), (4, "Select Units")
-        ], format_func=lambda x: x[1])
+        pets_comment = st.text_area("Pet Comments", value=defaults["pets_comment"])
+        washer_dryer = st.selectbox("Washer/Dryer Preference", options=WASHER_DRYER_OPTIONS, format_func=lambda x: x[1],
+                                    index=option_index(WASHER_DRYER_OPTIONS, defaults["washer_dryer"]))
         washer_dryer = washer_dryer[0]
-        parking = st.selectbox("Parking", options=[
-            (0, "------"), (1, "Yes"), (3, "No"), (4, "Select Units"), (5, "Assigned Parking"),
-            (6,"Attached Parking"), (7,"Garage Parking"), (8, "Offsite Parking")
-        ], format_func=lambda x: x[1])
+        parking = st.selectbox("Parking", options=PARKING_OPTIONS, format_func=lambda x: x[1],
+                               index=option_index(PARKING_OPTIONS, defaults["parking"]))
         parking = parking[0]
-        parking_comment = st.text_area("Parking Comments")
-        amenities = st.multiselect("Amenities", options=[
-            'air condition', 'gym', 'laundry', 'park', 'parking', 'pool', 'storage'
-        ])
+        parking_comment = st.text_area("Parking Comments", value=defaults["parking_comment"])
+        amenities = st.multiselect("Amenities", options=AMENITY_OPTIONS, default=defaults["amenities"])
     with c2:
-        zip_codes = st.text_input("Zip Codes (comma separated)")
-        neighborhood = st.text_input("Neighborhoods (comma separated)")
-        neighborhood_specific = st.checkbox("Only buildings in specified neighborhoods")
-        special_needs = st.text_area("Special Needs")
-        building_must_haves = st.text_area("Building Must-Haves")
-        unit_must_haves = st.text_area("Unit Must-Haves")
-        preference = st.selectbox("Rental vs Condo Preference", ["Rental", "Condo"])
+        zip_codes = st.text_input("Zip Codes (comma separated)", value=", ".join(defaults["zip"]))
+        neighborhood = st.text_input("Neighborhoods (comma separated)", value=", ".join(defaults["neighborhood"]))
+        neighborhood_specific = st.checkbox("Only buildings in specified neighborhoods", value=defaults["neighborhood_specific"])
+        special_needs = st.text_area("Special Needs", value=defaults["special_needs"])
+        building_must_haves = st.text_area("Building Must-Haves", value=defaults["building_must_haves"])
+        unit_must_haves = st.text_area("Unit Must-Haves", value=defaults["unit_must_haves"])
+        preference = st.selectbox("Rental vs Condo Preference", PREFERENCE_OPTIONS,
+                                  index=PREFERENCE_OPTIONS.index(defaults["preference"]))
 
     st.divider()
 
     st.subheader("👤 Client Info")
     c1, c2 = st.columns(2)
     with c1:
-        personality = st.text_input("Client Personality")
-        people_living = st.number_input("Number of People Living*", min_value=1, step=1, value=1)
-        work_location = st.text_input("Work Location")
-        commuting = st.text_input("Commuting Info")
-        moving_reason = st.text_input("Moving Reason")
-        comment = st.text_area("Other Comments")
+        personality = st.text_input("Client Personality", value=defaults["personality"])
+        people_living = st.number_input("Number of People Living*", min_value=1, step=1, value=defaults["people_living"])
+        work_location = st.text_input("Work Location", value=defaults["work_location"])
+        commuting = st.text_input("Commuting Info", value=defaults["commuting"])
+        moving_reason = st.text_input("Moving Reason", value=defaults["moving_reason"])
+        comment = st.text_area("Other Comments", value=defaults["comment"])
     with c2:
-        section8 = st.checkbox("Section 8 Client")
-        monthly_income = st.number_input("Monthly Income", min_value=0, step=100)
-        credit_score = st.number_input("Credit Score", min_value=0, step=10)
-        cosigner = st.checkbox("Cosigner Required?")
-        cosigner_comment = st.text_area("Cosigner Notes")
+        section8 = st.checkbox("Section 8 Client", value=defaults["section8"])
+        monthly_income = st.number_input("Monthly Income", min_value=0, step=100, value=defaults["monthly_income"])
+        credit_score = st.number_input("Credit Score", min_value=0, step=10, value=defaults["credit_score"])
+        cosigner = st.checkbox("Cosigner Required?", value=defaults["cosigner"])
+        cosigner_comment = st.text_area("Cosigner Notes", value=defaults["cosigner_comment"])
 
     st.divider()
 
     st.subheader("💼 Broker & Tour Info")
     c1, c2 = st.columns(2)
     with c1:
-        another_broker = st.radio("Working with Another Broker?", ["No", "Yes"])
-        another_broker_comment = st.text_area("Another Broker Comments")
+        another_broker = st.radio("Working with Another Broker?", ["No", "Yes"], index=int(defaults["another_broker"]))
+        another_broker_comment = st.text_area("Another Broker Comments", value=defaults["another_broker_comment"])
     with c2:
-        confirm_tour = st.radio("Tour Confirmed?", ["No", "Yes"])
-        tour_person = st.text_input("Who will be touring?")
+        confirm_tour = st.radio("Tour Confirmed?", ["No", "Yes"], index=int(defaults["confirm_tour"]))
+        tour_person = st.text_input("Who will be touring?", value=defaults["tour_person"])
 
     st.divider()
 
     st.subheader("🕒 Weekly Availability")
-    days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
     availability = {}
-    for day in days:
+    for day in WEEKDAYS:
+        slot = defaults["availability"][day]
         c1, c2, c3 = st.columns(3)
         with c1:
-            available = st.checkbox(day, key=f"{day}_check")
+            available = st.checkbox(day, value=slot["available"], key=f"{day}_check")
         with c2:
-            start = st.time_input(f"{day} start", value=time(9, 0), key=f"{day}_start")
+            start = st.time_input(f"{day} start", value=slot["start"], key=f"{day}_start")
         with c3:
-            end = st.time_input(f"{day} end", value=time(17, 0), key=f"{day}_end")
+            end = st.time_input(f"{day} end", value=slot["end"], key=f"{day}_end")
         availability[day] = {"available": available, "start": start, "end": end}
 
     st.divider()
@@ -191,10 +216,16 @@ if submitted:
             "tour_date": tour_date
         }
 
-        success = save_to_db(form_data)
+        # Only the fields changed since the form was loaded are written
+        previous = None if current is None and client_id not in saved_forms else defaults
+        success = save_to_db(form_data, previous=previous)
         if success:
+            if client_id:
+                saved_forms[client_id] = {**defaults, **form_data}
             st.success("✅ Client requirements saved successfully.")
         else:
             st.error("❌ Failed to save requirements. Check logs.")
 
 st.markdown('</div>', unsafe_allow_html=True)  # Close the container
+
+show_pending_writes()
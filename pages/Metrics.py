@@ -0,0 +1,105 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from utils.db import current_pool
+from utils.metrics import METRICS_HOST, METRICS_PORT, get_metrics, system_gauges
+from utils.outbox import current_outbox
+from utils.query_cache import get_query_cache
+
+st.set_page_config(page_title="Metrics", page_icon="⏱️", layout="wide")
+
+st.title("⏱️ Metrics")
+metrics = get_metrics()
+st.caption(
+    f"Timings recorded by this server process since {datetime.fromtimestamp(metrics.reset_at):%Y-%m-%d %H:%M:%S}. "
+    "Percentiles cover each span's most recent samples."
+)
+
+c1, c2 = st.columns([1, 5])
+if c1.button("🔄 Refresh"):
+    st.rerun()
+if c2.button("🧹 Reset", help="Clear every recorded timing in this process"):
+    metrics.reset()
+    st.rerun()
+
+pool = current_pool()
+outbox = current_outbox()
+p1, p2, p3, p4, p5, p6 = st.columns(6)
+if pool is not None:
+    pool_stats = pool.stats()
+    p1.metric("Connections in use", f"{pool_stats['in_use']} / {pool_stats['max']}")
+    p2.metric("Idle connections", pool_stats["idle"])
+    p3.metric("Pool waits", pool_stats["waits"], help=f"{pool_stats['timeouts']} timed out")
+else:
+    p1.caption("No database connection opened yet.")
+if outbox is not None:
+    outbox_stats = outbox.stats()
+    p4.metric("Outbox pending", outbox_stats["pending"])
+    p5.metric("Outbox dead", outbox_stats["dead"])
+    p6.metric("Oldest pending", f"{outbox_stats['oldest_pending_age']:.0f}s")
+
+cache_stats = get_query_cache().stats()
+lookups = cache_stats["hits"] + cache_stats["misses"]
+q1, q2, q3, q4 = st.columns(4)
+q1.metric("Query cache entries", f"{cache_stats['entries']:,} / {cache_stats['max']:,}")
+q2.metric("Cache hit rate", f"{cache_stats['hits'] / lookups:.0%}" if lookups else "—")
+q3.metric("Evicted by writes", f"{cache_stats['invalidations']:,}")
+q4.metric("Evicted by size", f"{cache_stats['evictions']:,}")
+
+timing_columns = {
+    "count": "Calls",
+    "errors": "Errors",
+    "mean_ms": st.column_config.NumberColumn("Mean (ms)", format="%.1f"),
+    "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+    "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+    "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+    "max_ms": st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+    "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.0f"),
+    "rows": "Rows",
+    "bytes": "Bytes",
+}
+
+st.subheader("🧩 Spans")
+spans = pd.DataFrame(metrics.spans())
+if spans.empty:
+    st.info("Nothing recorded yet. Open a few pages, then refresh.")
+else:
+    st.dataframe(spans, column_config=timing_columns, use_container_width=True, hide_index=True)
+
+st.subheader("🗄️ Queries")
+queries = pd.DataFrame(metrics.queries())
+if queries.empty:
+    st.info("No queries recorded yet.")
+else:
+    st.dataframe(
+        queries,
+        column_config={**timing_columns, "query": st.column_config.TextColumn("Query", width="large")},
+        use_container_width=True,
+        hide_index=True,
+    )
+
+st.subheader("🐢 Slowest Calls")
+slowest = pd.DataFrame(metrics.slowest())
+if not slowest.empty:
+    slowest["at"] = pd.to_datetime(slowest["at"], unit="s")
+    st.dataframe(
+        slowest[["at", "span", "ms", "rows", "bytes", "parent", "failed", "detail"]],
+        column_config={
+            "at": st.column_config.DatetimeColumn("When", format="YYYY-MM-DD HH:mm:ss"),
+            "ms": st.column_config.NumberColumn("Duration (ms)", format="%.1f"),
+            "parent": "Inside",
+            "detail": st.column_config.TextColumn("Query", width="large"),
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+
+st.subheader("📤 Prometheus")
+exposition = metrics.prometheus_text(system_gauges())
+if METRICS_PORT:
+    st.caption(f"Scrape `http://{METRICS_HOST}:{METRICS_PORT}/metrics`.")
+else:
+    st.caption("Set `METRICS_PORT` to serve this at `/metrics` for Prometheus to scrape.")
+st.download_button("Download metrics.txt", exposition, file_name="metrics.txt", mime="text/plain")
+with st.expander("Exposition text", expanded=False):
+    st.code(exposition, language="text")
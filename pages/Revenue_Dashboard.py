@@ -0,0 +1,80 @@
+import streamlit as st
+from datetime import datetime
+from utils.metrics import span
+from utils.revenue import MONTHS, load_revenue_rollup, summarize_rollup
+
+st.set_page_config(page_title="Revenue Dashboard", page_icon="📈", layout="wide")
+
+
+@st.cache_data(ttl=60, show_spinner=True)
+def fetch_rollup(year):
+    return load_revenue_rollup(year)
+
+
+st.title("📈 Revenue Dashboard")
+st.caption("Totals come from the pre-aggregated revenue rollup, updated whenever a revenue entry is saved or imported.")
+
+current_year = datetime.today().year
+year = st.selectbox("Year", options=list(range(current_year, current_year - 6, -1)))
+
+try:
+    with span("revenue_dashboard.rollup") as rollup_span:
+        rollup = fetch_rollup(year)
+        rollup_span.record(rows=len(rollup))
+except Exception as e:
+    st.error(f"Database connection failed: {e}")
+    st.stop()
+
+if rollup.empty:
+    st.info(f"No revenue entries for {year} yet.")
+    st.stop()
+
+totals = summarize_rollup(rollup.assign(all=1), ["all"]).iloc[0]
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("Deals", f"{int(totals['deals']):,}", help=f"{int(totals['closed_deals']):,} closed")
+c2.metric("Deal Value", f"${totals['deal_value']:,.0f}")
+c3.metric("Net Effective", f"${totals['net_effective']:,.0f}")
+c4.metric("Concessions", f"${totals['total_concession_value']:,.0f}")
+avg_commission = totals['avg_commission_percentage']
+c5.metric("Avg Commission", "—" if avg_commission != avg_commission else f"{avg_commission:.1f}%")
+
+st.divider()
+
+money_columns = {
+    "deal_value": st.column_config.NumberColumn("Deal Value", format="$%.0f"),
+    "net_effective": st.column_config.NumberColumn("Net Effective", format="$%.0f"),
+    "total_concession_value": st.column_config.NumberColumn("Concessions", format="$%.0f"),
+    "avg_commission_percentage": st.column_config.NumberColumn("Avg Commission %", format="%.1f%%"),
+    "deals": "Deals",
+    "closed_deals": "Closed",
+}
+
+st.subheader("📅 By Month")
+by_month = summarize_rollup(rollup, ["month"])
+by_month["Month"] = by_month["month"].map(lambda m: MONTHS[int(m) - 1][:3])
+st.bar_chart(by_month, x="Month", y=["deal_value", "net_effective"], sort=False)
+st.dataframe(
+    by_month.drop(columns=["month"]).set_index("Month"),
+    column_config=money_columns,
+    use_container_width=True,
+)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("👤 By Sales Rep")
+    by_rep = summarize_rollup(rollup, ["sales_rep"]).sort_values("deal_value", ascending=False)
+    by_rep["sales_rep"] = by_rep["sales_rep"].replace("", "Unassigned")
+    st.dataframe(
+        by_rep.set_index("sales_rep"),
+        column_config={"sales_rep": "Sales Rep", **money_columns},
+        use_container_width=True,
+    )
+with col2:
+    st.subheader("🏢 By Building")
+    by_building = summarize_rollup(rollup, ["building"]).sort_values("deal_value", ascending=False)
+    by_building["building"] = by_building["building"].replace("", "Unknown")
+    st.dataframe(
+        by_building.set_index("building"),
+        column_config={"building": "Building", **money_columns},
+        use_container_width=True,
+    )
@@ -1,5 +1,9 @@
 import streamlit as st
 from datetime import datetime
+from utils.metrics import span
+from utils.outbox import get_outbox, show_pending_writes
+from utils.revenue import MONTHS, APPLICATION_STATUSES
+from utils.revenue_calc import derive_revenue_fields
 
 st.set_page_config(page_title="Revenue Entry", page_icon="💸", layout="wide")
 
@@ -14,7 +18,8 @@ st.markdown("""
 st.markdown('<div class="main-header">💸 New Revenue Entry</div>', unsafe_allow_html=True)
 st.caption("Fill in all details about the closed/won deal for proper revenue tracking. Fields with * are required.")
 
-with st.form("revenue_form", clear_on_submit=False):
+# Not an st.form, so the derived deal values below update as the inputs change
+with st.container():
     # --- SECTION 1: Client & Rep Info ---
     st.markdown('<div class="section-title">👤 Client & Agent Info</div>', unsafe_allow_html=True)
     c1, c2, c3 = st.columns(3)
@@ -40,10 +45,7 @@ with st.form("revenue_form", clear_on_submit=False):
     # --- SECTION 2: Date, Month, Year ---
     c4, c5, c6 = st.columns(3)
     with c4:
-        month = st.selectbox("Month", [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ], index=datetime.today().month - 1)
+        month = st.selectbox("Month", MONTHS, index=datetime.today().month - 1)
     with c5:
         year = st.number_input("Year", min_value=2000, max_value=2100, value=datetime.today().year)
     with c6:
@@ -60,11 +62,25 @@ with st.form("revenue_form", clear_on_submit=False):
         with cc2:
             concession_free_months = st.number_input("Concession Free Months", min_value=0.0, step=0.5, value=0.0)
             additional_concessions = st.number_input("Additional Concession ($)", min_value=0, step=50, value=0)
-            total_concession_value = st.number_input("Total Concession Value ($)", min_value=0, step=50, value=0)
         with cc3:
-            net_effective = st.number_input("Net Effective ($)", min_value=0, step=50, value=0)
             commission_percentage = st.slider("Commission (%)", min_value=0, max_value=100, value=100)
-            deal_value = st.number_input("Deal Value ($)", min_value=0, step=100, value=0)
+        # Calculated from the inputs above rather than typed in
+        derived = derive_revenue_fields({
+            "rent": rent,
+            "lease_term": lease_term,
+            "concession_free_months": concession_free_months,
+            "additional_concessions": additional_concessions,
+            "commission_percentage": commission_percentage,
+        })
+        total_concession_value = derived["total_concession_value"]
+        net_effective = derived["net_effective"]
+        deal_value = derived["deal_value"]
+        with cc2:
+            st.metric("Total Concession Value", f"${total_concession_value:,.2f}")
+        with cc3:
+            m1, m2 = st.columns(2)
+            m1.metric("Net Effective", f"${net_effective:,.2f}", help="(Rent × Lease Term − Total Concessions) ÷ Lease Term")
+            m2.metric("Deal Value", f"${deal_value:,.2f}", help="Base Rent × Commission %")
         concession_text = st.text_area("Concession Text", placeholder="Enter details about concessions or discounts.")
 
     st.markdown("---")
@@ -79,7 +95,7 @@ with st.form("revenue_form", clear_on_submit=False):
             invoice_collected = st.toggle("Invoice Collected")
             invoice_collected_date = st.date_input("Invoice Collected Date")
         with d2:
-            signed_lease = st.selectbox("Application Approved", ["Not decided yet", "Application Denied", "Application Approved"])
+            signed_lease = st.selectbox("Application Approved", APPLICATION_STATUSES)
             signed_lease_date = st.date_input("Signed Lease Date")
             is_closed = st.toggle("Is Closed")
             is_closed_date = st.date_input("Closed Date")
@@ -102,57 +118,129 @@ with st.form("revenue_form", clear_on_submit=False):
 
     # --- SUBMIT ---
     st.markdown("")
-    submitted = st.form_submit_button("💾 Save Revenue Entry", type="primary")
+    submitted = st.button("💾 Save Revenue Entry", type="primary")
 
 if submitted:
-    st.success("✅ Revenue entry captured and ready for database save!")
-    st.markdown("#### 📋 Revenue Entry Summary")
-    st.json({
-        "Client ID": client_id,
-        "Client Name": client_name,
-        "Tour ID": tour_id,
-        "Tour Date": str(tour_date),
-        "Month": month,
-        "Year": int(year),
-        "Sales Rep": f"{sales_rep_id} - {sales_rep_name}",
-        "Tour Rep": f"{tour_rep_id} - {tour_rep_name}",
-        "Building": f"{building_id} - {building_name}",
-        "Unit Number": unit_number,
-        "Move-in Date": str(move_in_date),
-        "Lease Term": lease_term,
-        "Beds": beds,
-        "Baths": baths,
-        "Base Rent": rent,
-        "Concession Free Months": concession_free_months,
-        "Additional Concessions": additional_concessions,
-        "Total Concession Value": total_concession_value,
-        "Net Effective": net_effective,
-        "Commission %": commission_percentage,
-        "Deal Value": deal_value,
-        "Concession Text": concession_text,
-        "Invoice Prepared": invoice_prepared,
-        "Invoice Prepared Date": str(invoice_prepared_date),
-        "Invoice Sent": invoice_sent,
-        "Invoice Sent Date": str(invoice_sent_date),
-        "Invoice Collected": invoice_collected,
-        "Invoice Collected Date": str(invoice_collected_date),
-        "Application Approved": signed_lease,
-        "Signed Lease Date": str(signed_lease_date),
-        "Application Approved Date": str(application_approved_date),
-        "Is Closed": is_closed,
-        "Closed Date": str(is_closed_date),
-        "Invoice Info Requested": invoice_info_requested,
-        "Invoice Info Requested Date": str(invoice_info_requested_date),
-        "Invoice Info Received": invoice_info_received,
-        "Invoice Info Received Date": str(invoice_info_received_date),
-        "Payment To Lead Source": payment_to_lead_source,
-        "Payment To Lead Source Date": str(payment_to_lead_source_date),
-        "Dispute Raised": dispute_raised,
-        "Dispute Raised Date": str(dispute_raised_date),
-        "Dispute Resolved": dispute_resolved,
-        "Dispute Resolved Date": str(dispute_resolved_date),
-        "Comments": comments
-    })
+    errors = []
+    if not client_id.strip().isdigit():
+        errors.append("Client ID is required and must be a number.")
+    for label, value in [("Tour ID", tour_id), ("Building ID", building_id)]:
+        if value.strip() and not value.strip().isdigit():
+            errors.append(f"{label} must be a number.")
+
+    if errors:
+        st.error("❌ Please fix the following errors:")
+        for error in errors:
+            st.error(f"• {error}")
+    else:
+        # Typed record for the revenue table; toggle dates only count when the toggle is on
+        revenue_entry = {
+            "client_id": int(client_id),
+            "tour_id": int(tour_id) if tour_id.strip() else None,
+            "client_name": client_name,
+            "sales_rep_id": sales_rep_id,
+            "sales_rep_name": sales_rep_name,
+            "tour_rep_id": tour_rep_id,
+            "tour_rep_name": tour_rep_name,
+            "building_id": int(building_id) if building_id.strip() else None,
+            "building_name": building_name,
+            "unit_number": unit_number,
+            "move_in_date": move_in_date,
+            "tour_date": tour_date,
+            "lease_term": int(lease_term),
+            "application_approved_date": application_approved_date,
+            "month": MONTHS.index(month) + 1,
+            "year": int(year),
+            "beds": int(beds),
+            "baths": float(baths),
+            "rent": rent,
+            "concession_free_months": concession_free_months,
+            "additional_concessions": additional_concessions,
+            "total_concession_value": total_concession_value,
+            "net_effective": net_effective,
+            "commission_percentage": commission_percentage,
+            "deal_value": deal_value,
+            "concession_text": concession_text,
+            "invoice_prepared": invoice_prepared,
+            "invoice_prepared_date": invoice_prepared_date if invoice_prepared else None,
+            "invoice_sent": invoice_sent,
+            "invoice_sent_date": invoice_sent_date if invoice_sent else None,
+            "invoice_collected": invoice_collected,
+            "invoice_collected_date": invoice_collected_date if invoice_collected else None,
+            "application_status": signed_lease,
+            "signed_lease_date": signed_lease_date,
+            "is_closed": is_closed,
+            "closed_date": is_closed_date if is_closed else None,
+            "invoice_info_requested": invoice_info_requested,
+            "invoice_info_requested_date": invoice_info_requested_date if invoice_info_requested else None,
+            "invoice_info_received": invoice_info_received,
+            "invoice_info_received_date": invoice_info_received_date if invoice_info_received else None,
+            "payment_to_lead_source": payment_to_lead_source,
+            "payment_to_lead_source_date": payment_to_lead_source_date if payment_to_lead_source else None,
+            "dispute_raised": dispute_raised,
+            "dispute_raised_date": dispute_raised_date if dispute_raised else None,
+            "dispute_resolved": dispute_resolved,
+            "dispute_resolved_date": dispute_resolved_date if dispute_resolved else None,
+            "comments": comments,
+        }
+        try:
+            # Upserted on (client_id, tour_id) by the outbox drainer
+            with span("revenue.save"):
+                get_outbox().enqueue("revenue", revenue_entry)
+            saved = True
+        except Exception as e:
+            st.error(f"❌ Failed to save revenue entry: {e}")
+            saved = False
+
+        if saved:
+            st.success("✅ Revenue entry saved!")
+            st.markdown("#### 📋 Revenue Entry Summary")
+            st.json({
+                "Client ID": client_id,
+                "Client Name": client_name,
+                "Tour ID": tour_id,
+                "Tour Date": str(tour_date),
+                "Month": month,
+                "Year": int(year),
+                "Sales Rep": f"{sales_rep_id} - {sales_rep_name}",
+                "Tour Rep": f"{tour_rep_id} - {tour_rep_name}",
+                "Building": f"{building_id} - {building_name}",
+                "Unit Number": unit_number,
+                "Move-in Date": str(move_in_date),
+                "Lease Term": lease_term,
+                "Beds": beds,
+                "Baths": baths,
+                "Base Rent": rent,
+                "Concession Free Months": concession_free_months,
+                "Additional Concessions": additional_concessions,
+                "Total Concession Value": total_concession_value,
+                "Net Effective": net_effective,
+                "Commission %": commission_percentage,
+                "Deal Value": deal_value,
+                "Concession Text": concession_text,
+                "Invoice Prepared": invoice_prepared,
+                "Invoice Prepared Date": str(invoice_prepared_date),
+                "Invoice Sent": invoice_sent,
+                "Invoice Sent Date": str(invoice_sent_date),
+                "Invoice Collected": invoice_collected,
+                "Invoice Collected Date": str(invoice_collected_date),
+                "Application Approved": signed_lease,
+                "Signed Lease Date": str(signed_lease_date),
+                "Application Approved Date": str(application_approved_date),
+                "Is Closed": is_closed,
+                "Closed Date": str(is_closed_date),
+                "Invoice Info Requested": invoice_info_requested,
+                "Invoice Info Requested Date": str(invoice_info_requested_date),
+                "Invoice Info Received": invoice_info_received,
+                "Invoice Info Received Date": str(invoice_info_received_date),
+                "Payment To Lead Source": payment_to_lead_source,
+                "Payment To Lead Source Date": str(payment_to_lead_source_date),
+                "Dispute Raised": dispute_raised,
+                "Dispute Raised Date": str(dispute_raised_date),
+                "Dispute Resolved": dispute_resolved,
+                "Dispute Resolved Date": str(dispute_resolved_date),
+                "Comments": comments
+            })
 
 st.markdown(
     """
@@ -167,3 +255,5 @@ st.markdown(
     </style>
     """, unsafe_allow_html=True
 )
+
+show_pending_writes()
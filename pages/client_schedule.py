@@ -1,13 +1,15 @@
 import streamlit as st
-from datetime import datetime, time
-import psycopg2
-import os
-from dotenv import load_dotenv
-import json
-
-# Load environment variables
-load_dotenv()
-DB_URL = os.getenv("DATABASE_URL")
+from datetime import date, datetime, time
+from utils.metrics import span, timed
+from utils.buildings import get_building_catalog, format_building
+from utils.client_search import get_client_name
+from utils.outbox import get_outbox, show_pending_writes
+from utils.requirements import get_latest_requirement, normalize_availability
+from utils.routes import order_tour, tour_legs
+from utils.tour_slots import (
+    TOUR_SLOT_MINUTES, TOUR_TRAVEL_MINUTES, booking_label, get_tour_slot_index, runs_past_midnight, to_minutes,
+    within_availability
+)
 
 st.set_page_config(page_title="Schedule Tour", page_icon="📅", layout="wide")
 
@@ -41,44 +43,51 @@ st.markdown(
 
 # Get client_id from URL and fetch client info
 params = st.query_params
-client_id = params.get("client_id", [None])[0] if "client_id" in params else None
+client_id = params.get("client_id")
 if client_id is not None:
     client_id = str(client_id)
 
 # Fetch client name from database
 client_name = "Unknown Client"
 building_names = []  # List to store building names for suggestions
+building_catalog = None
+CUSTOM_BUILDING = "-- Enter Custom Building --"
 
 if client_id:
     try:
-        conn = psycopg2.connect(DB_URL, sslmode='require')
-        cur = conn.cursor()
-        
-        # Fetch client name
-        cur.execute("SELECT fullname FROM client WHERE id = %s", (client_id,))
-        result = cur.fetchone()
-        if result:
-            client_name = result[0]
-        
-        # Fetch all building names for suggestions from 'building' table
-        try:
-            cur.execute("""
-                SELECT DISTINCT name 
-                FROM building
-                WHERE name IS NOT NULL 
-                ORDER BY name
-            """)
-            building_results = cur.fetchall()
-            building_names = [row[0] for row in building_results if row[0]]
-        except Exception as building_error:
-            st.warning(f"Could not fetch building suggestions: {building_error}")
-            building_names = []
-        
-        cur.close()
-        conn.close()
+        # Served from the shared query cache on reruns and by other sessions
+        with span("schedule.client_lookup"):
+            client_name = get_client_name(client_id) or client_name
     except Exception as e:
         st.error(f"Error fetching client info: {e}")
 
+    # Building suggestions come from the shared catalog, which only goes back
+    # to the 'building' table when its TTL expires or it is invalidated
+    try:
+        building_catalog = get_building_catalog()
+        building_names = building_catalog.names()
+    except Exception as building_error:
+        st.warning(f"Could not fetch building suggestions: {building_error}")
+        building_names = []
+
+# Reps' booked tours and the client's weekly availability, for conflict checks
+slot_index = None
+client_availability = None
+try:
+    slot_index = get_tour_slot_index()
+    slot_index.ensure_fresh()
+except Exception as slot_error:
+    slot_index = None
+    st.warning(f"Could not load the touring calendar, tours won't be checked for conflicts: {slot_error}")
+if client_id:
+    try:
+        saved_requirement = get_latest_requirement(client_id)
+        if saved_requirement:
+            client_availability = saved_requirement.get("availability")
+    except Exception:
+        client_availability = None
+has_availability = any(slot["available"] for slot in normalize_availability(client_availability).values())
+
 # Wrap the form in a styled container
 st.markdown('<div class="form-container">', unsafe_allow_html=True)
 st.markdown(f'<div class="form-title">📅 Schedule Tour for {client_name} | {client_id or "No ID"}</div>', unsafe_allow_html=True)
@@ -88,12 +97,12 @@ with st.expander("Instructions", expanded=False):
     - Fill in the tour details for each building/unit the client wishes to visit.
     - Click **Add New Building to Tour** to add more buildings for the same tour.
     - All fields marked * are required.
-    - **Building Name**: Select from existing buildings in the database or choose 'Enter Custom Building' to add a new one.
+    - **Building Name**: Type the start of a building name (or any word in it) and pick a match, or choose 'Enter Custom Building' to add a new one.
     """)
 
 # Display building suggestions count if available
 if building_names:
-    st.info(f"💡 {len(building_names)} building suggestions are available in the dropdown.")
+    st.info(f"💡 {len(building_names)} buildings are available as suggestions while you type.")
 
 # Store the number of building forms in session state
 if "num_buildings" not in st.session_state:
@@ -103,153 +112,291 @@ if "num_buildings" not in st.session_state:
 if st.button("Add New Building to Tour", help="Add another building/unit to this tour"):
     st.session_state["num_buildings"] += 1
 
+
+def use_slot(idx, day, slot_time):
+    st.session_state[f"date_{idx}"] = day
+    st.session_state[f"time_{idx}"] = slot_time
+
+
+# Widget keys of one building row, suffixed with the row index
+BUILDING_ROW_KEYS = [
+    "building_query", "building_select", "building_custom", "building", "unit", "price", "date", "time",
+    "type", "status", "booked_via", "touring_rep", "selected_by", "leasing_agent",
+    "leasing_agent_email", "leasing_agent_phone", "comment",
+]
+
+
+def tour_buildings():
+    """Catalog record of each building row (None for custom buildings), in row order."""
+    buildings = []
+    for idx in range(st.session_state["num_buildings"]):
+        selected = st.session_state.get(f"building_select_{idx}")
+        located = building_catalog is not None and selected not in (None, CUSTOM_BUILDING)
+        buildings.append(building_catalog.get(selected) if located else None)
+    return buildings
+
+
+def plan_tour_times():
+    """
+    Give every building a time on the first building's date and rep, in order.
+
+    Gaps between buildings are the estimated travel time between their stored
+    locations, or ``TOUR_TRAVEL_MINUTES`` when a location is unknown.
+    """
+    count = st.session_state["num_buildings"]
+    legs = tour_legs(tour_buildings())
+    rep = st.session_state.get("touring_rep_0", "")
+    day = st.session_state.get("date_0", date.today())
+    plan = slot_index.plan_tour(
+        rep, day, [TOUR_SLOT_MINUTES] * count, client_availability,
+        earliest=datetime.now().time() if day == date.today() else None,
+        travel_minutes=lambda i, j: legs[i] if legs[i] is not None else TOUR_TRAVEL_MINUTES,
+    )
+    if plan is None:
+        st.session_state["tour_plan_message"] = f"No room for {count} buildings on {day:%a %b %d}; try another date."
+        return
+    st.session_state["tour_plan_message"] = None
+    for idx, slot_time in enumerate(plan):
+        use_slot(idx, day, slot_time)
+        if not st.session_state.get(f"touring_rep_{idx}"):
+            st.session_state[f"touring_rep_{idx}"] = rep
+
+
+def optimize_route():
+    """Reorder the building rows along the shortest route, then plan their times."""
+    buildings = tour_buildings()
+    order, _ = order_tour(buildings)
+    first_rep = st.session_state.get("touring_rep_0", "")
+    first_date = st.session_state.get("date_0")
+    rows = [
+        {key: st.session_state[f"{key}_{idx}"] for key in BUILDING_ROW_KEYS if f"{key}_{idx}" in st.session_state}
+        for idx in order
+    ]
+    for idx, row in enumerate(rows):
+        for key in BUILDING_ROW_KEYS:
+            st.session_state.pop(f"{key}_{idx}", None)
+        for key, value in row.items():
+            st.session_state[f"{key}_{idx}"] = value
+    # The first stop inherits the tour's rep and date
+    if not st.session_state.get("touring_rep_0"):
+        st.session_state["touring_rep_0"] = first_rep
+    if first_date is not None:
+        st.session_state["date_0"] = first_date
+    unlocated = sum(1 for b in buildings if b is None or b.get("latitude") is None)
+    st.session_state["tour_route_message"] = (
+        f"Route: {' → '.join(b['name'] if b else 'custom building' for b in (buildings[i] for i in order))}"
+        + (f" ({unlocated} without a known location kept at the end)" if unlocated else "")
+    )
+    if slot_index is not None and first_rep.strip():
+        plan_tour_times()
+
+
+route_col, plan_col = st.columns([1, 4])
+with route_col:
+    if st.session_state["num_buildings"] > 1:
+        st.button("🗺️ Optimize Route", on_click=optimize_route,
+                  help="Reorder the buildings to minimize travel, then plan times if Building #1 has a touring rep")
+if st.session_state.get("tour_route_message"):
+    st.caption(st.session_state["tour_route_message"])
+
+if slot_index is not None:
+    plan_col.button(
+        "🕒 Plan Tour Times",
+        on_click=plan_tour_times,
+        help="Fit every building, in order, into Building #1's touring rep's free time on Building #1's date"
+             + (" and the client's availability" if has_availability else ""),
+    )
+    if st.session_state.get("tour_plan_message"):
+        st.warning(st.session_state["tour_plan_message"])
+
 st.divider()
 
-# Collect data for all building entries
-schedule_data = []
+TOUR_TYPES = ["Any", "In-Person", "Virtual", "Self Guided", "Videos Only"]
+TOUR_STATUSES = ["Pending", "Confirmed", "Done", "Cancelled"]
+BOOKED_VIA = ["-----", "Phone", "Email", "Call", "Online"]
+SELECTED_BY = ["Sales Rep", "Client", "Property"]
 
-for idx in range(st.session_state["num_buildings"]):
+
+def building_row_values(idx):
+    """One building row's tour details, read from its widgets' session state."""
+    state = st.session_state
+    selected = state.get(f"building_select_{idx}")
+    # None for a building removed from the catalog since it was picked too
+    record = building_catalog.get(selected) if building_names and selected != CUSTOM_BUILDING else None
+    if not building_names:
+        building_id, building = None, state.get(f"building_{idx}", "")
+    elif record is None:
+        building_id, building = None, state.get(f"building_custom_{idx}", "")
+    else:
+        building_id, building = selected, record["name"]
+    return {
+        "client_id": client_id,
+        "building_id": building_id,
+        "building": building,
+        "unit_number": state.get(f"unit_{idx}", ""),
+        "price": state.get(f"price_{idx}", 0.0),
+        "tour_date": str(state.get(f"date_{idx}", date.today())),
+        "tour_time": str(state.get(f"time_{idx}", time(10, 0))),
+        "tour_type": state.get(f"type_{idx}", TOUR_TYPES[0]),
+        "status": state.get(f"status_{idx}", TOUR_STATUSES[0]),
+        "booked_via": state.get(f"booked_via_{idx}", BOOKED_VIA[0]),
+        "touring_rep": state.get(f"touring_rep_{idx}", ""),
+        "selected_by": state.get(f"selected_by_{idx}", SELECTED_BY[0]),
+        "leasing_agent": state.get(f"leasing_agent_{idx}", ""),
+        "leasing_agent_email": state.get(f"leasing_agent_email_{idx}", ""),
+        "leasing_agent_phone": state.get(f"leasing_agent_phone_{idx}", ""),
+        "comment": state.get(f"comment_{idx}", ""),
+    }
+
+
+def row_clashes(row, earlier_rows):
+    """Conflicts with the rep's other tours, including earlier buildings on this form."""
+    rep = row["touring_rep"].strip()
+    if not rep or slot_index is None:
+        return []
+    tour_date = date.fromisoformat(row["tour_date"])
+    clashes = [
+        f"{start:%H:%M}-{end:%H:%M} {label}"
+        for start, end, label in slot_index.conflicts(rep, tour_date, row["tour_time"])
+    ]
+    start = to_minutes(row["tour_time"])
+    clashes += [
+        f"{other['tour_time'][:5]} Building #{other_idx + 1} on this tour"
+        for other_idx, other in enumerate(earlier_rows)
+        if other["touring_rep"].strip().lower() == rep.lower()
+        and other["tour_date"] == row["tour_date"]
+        and abs(to_minutes(other["tour_time"]) - start) < TOUR_SLOT_MINUTES
+    ]
+    return clashes
+
+
+@st.fragment
+@timed("schedule.building_row")
+def building_row(idx):
+    """
+    Widgets for one building of the tour.
+
+    Runs as a fragment, so typing in a row only reruns that row instead of
+    the whole page. The row's values live in session state under its widget
+    keys; ``building_row_values`` reads them back when the tour is submitted.
+    """
     st.markdown('<div class="building-container">', unsafe_allow_html=True)
     st.subheader(f"🏢 Building #{idx + 1}")
     col1, col2, col3 = st.columns([1,1,1.5])
     with col1:
-        # Building name with improved dropdown suggestions
+        # Typeahead: only the top matches for what the rep typed are sent to
+        # the browser, not the whole catalog for every building row
         if building_names:
-            # Create a more user-friendly dropdown with search functionality
-            building_options = building_names + ["-- Enter Custom Building --"]
-            
-            # Use selectbox with index to make first building the default
+            building_query = st.text_input(
+                "Building Name *",
+                key=f"building_query_{idx}",
+                placeholder="Start typing a building name...",
+                help="🔍 Matches the start of the building name or any word in it"
+            )
+            # Labels come from these records, not later catalog lookups, so a
+            # reload removing a building between the two can't break the row
+            matches = {match["id"]: match for match in building_catalog.suggest(building_query)}
+            building_options = list(matches) + [CUSTOM_BUILDING]
             selected_building = st.selectbox(
-                f"Building Name *", 
+                "Matching Buildings",
                 options=building_options,
-                index=0,  # Default to first building in list
+                index=0,  # Default to the best match
+                format_func=lambda option: format_building(matches[option]) if option in matches else CUSTOM_BUILDING,
                 key=f"building_select_{idx}",
-                help="🔍 Search and select from existing buildings in the database, or choose 'Enter Custom Building' to add a new one"
+                help="Pick a building from the database, or choose 'Enter Custom Building' to add a new one"
             )
-            
-            if selected_building == "-- Enter Custom Building --":
-                building = st.text_input(
+
+            if selected_building not in matches:
+                st.session_state.setdefault(f"building_custom_{idx}", building_query)
+                st.text_input(
                     "Custom Building Name *", 
                     key=f"building_custom_{idx}",
                     help="Enter the building name manually",
                     placeholder="Type new building name here..."
                 )
             else:
-                building = selected_building
                 # Show a small info about the selected building
-                st.caption(f"✅ Selected: {selected_building}")
+                st.caption(f"✅ Selected: {format_building(matches[selected_building])}")
         else:
             # Fallback to text input if no building data available
-            building = st.text_input(
+            st.text_input(
                 f"Building Name *", 
                 key=f"building_{idx}", 
                 help="Required field - No building suggestions available",
                 placeholder="Enter building name..."
             )
         
-        unit_number = st.text_input("Unit #", key=f"unit_{idx}")
-        price = st.number_input("Price ($)", min_value=0.0, step=100.0, format="%.2f", key=f"price_{idx}")
+        st.text_input("Unit #", key=f"unit_{idx}")
+        st.number_input("Price ($)", min_value=0.0, step=100.0, format="%.2f", key=f"price_{idx}")
     with col2:
-        tour_date = st.date_input("Date *", value=datetime.today(), key=f"date_{idx}", help="Required field")
-        tour_time = st.time_input("Time", value=time(10,0), key=f"time_{idx}")
-        tour_type = st.selectbox(
-            "Tour Type", 
-            options=["Any", "In-Person", "Virtual", "Self Guided", "Videos Only"], 
-            key=f"type_{idx}"
-        )
+        # Defaults live in session state so "Plan Tour Times" can set them
+        st.session_state.setdefault(f"date_{idx}", date.today())
+        st.session_state.setdefault(f"time_{idx}", time(10,0))
+        st.date_input("Date *", key=f"date_{idx}", help="Required field")
+        st.time_input("Time", key=f"time_{idx}")
+        st.selectbox("Tour Type", options=TOUR_TYPES, key=f"type_{idx}")
     with col3:
-        status = st.selectbox(
-            "Status", 
-            options=["Pending", "Confirmed", "Done", "Cancelled"], 
-            key=f"status_{idx}",
-        )
-        booked_via = st.selectbox(
-            "Booking Confirmed Via",
-            options=["-----", "Phone", "Email", "Call", "Online"],
-            key=f"booked_via_{idx}",
-        )
-        touring_rep = st.text_input("Touring Rep", key=f"touring_rep_{idx}")
-        selected_by = st.selectbox(
-            "Selected By",
-            options=["Sales Rep", "Client", "Property"],
-            key=f"selected_by_{idx}",
-        )
+        st.selectbox("Status", options=TOUR_STATUSES, key=f"status_{idx}")
+        st.selectbox("Booking Confirmed Via", options=BOOKED_VIA, key=f"booked_via_{idx}")
+        st.text_input("Touring Rep", key=f"touring_rep_{idx}")
+        st.selectbox("Selected By", options=SELECTED_BY, key=f"selected_by_{idx}")
     st.markdown("#### 👤 Leasing/Agent Details")
     col4, col5 = st.columns([1,1])
     with col4:
-        leasing_agent = st.text_input("Leasing Agent Name", key=f"leasing_agent_{idx}")
-        leasing_agent_email = st.text_input("Leasing Agent Email", key=f"leasing_agent_email_{idx}")
+        st.text_input("Leasing Agent Name", key=f"leasing_agent_{idx}")
+        st.text_input("Leasing Agent Email", key=f"leasing_agent_email_{idx}")
     with col5:
-        leasing_agent_phone = st.text_input("Leasing Agent Phone", key=f"leasing_agent_phone_{idx}")
-        comment = st.text_area("Comment", key=f"comment_{idx}", height=68)
-    # Save this building's data
-    schedule_data.append({
-        "client_id": client_id,
-        "building": building,
-        "unit_number": unit_number,
-        "price": price,
-        "tour_date": str(tour_date),
-        "tour_time": str(tour_time),
-        "tour_type": tour_type,
-        "status": status,
-        "booked_via": booked_via,
-        "touring_rep": touring_rep,
-        "selected_by": selected_by,
-        "leasing_agent": leasing_agent,
-        "leasing_agent_email": leasing_agent_email,
-        "leasing_agent_phone": leasing_agent_phone,
-        "comment": comment,
-    })
+        st.text_input("Leasing Agent Phone", key=f"leasing_agent_phone_{idx}")
+        st.text_area("Comment", key=f"comment_{idx}", height=68)
+
+    # Other rows are read from session state; they are re-checked on submit
+    row = building_row_values(idx)
+    tour_date = date.fromisoformat(row["tour_date"])
+    clashes = row_clashes(row, [building_row_values(other) for other in range(idx)])
+    if clashes:
+        st.warning(f"⚠️ {row['touring_rep']} is already touring at this time: " + "; ".join(clashes))
+        free_slots = slot_index.suggest_slots(row["touring_rep"], client_availability, from_date=tour_date, limit=3)
+        if free_slots:
+            slot_cols = st.columns(len(free_slots) + 1)
+            slot_cols[0].caption("Next free:")
+            for col, (day, slot_time) in zip(slot_cols[1:], free_slots):
+                col.button(
+                    f"{day:%a %b %d} {slot_time:%H:%M}",
+                    key=f"slot_{idx}_{day}_{slot_time}",
+                    on_click=use_slot,
+                    args=(idx, day, slot_time),
+                )
+    if has_availability and not within_availability(client_availability, tour_date, row["tour_time"]):
+        st.caption(f"⚠️ Outside {client_name}'s saved availability for {tour_date:%A}.")
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+for idx in range(st.session_state["num_buildings"]):
+    building_row(idx)
     if idx < st.session_state["num_buildings"] - 1:
         st.divider()
 
+# Collect data for all building entries. Buttons outside the rows rerun the
+# whole page, so this is current whenever the tour is submitted.
+schedule_data = [building_row_values(idx) for idx in range(st.session_state["num_buildings"])]
+schedule_conflicts = [
+    idx for idx, row in enumerate(schedule_data) if row_clashes(row, schedule_data[:idx])
+]
+
 # Function to save schedule data to database
+@timed("schedule.save")
 def save_schedule_to_db(schedule_data, close_conf):
-    """Save tour schedule data to database"""
+    """Queue the tour in the local outbox; its drainer writes it to the database"""
     try:
-        conn = psycopg2.connect(DB_URL, sslmode='require')
-        cur = conn.cursor()
-        
-        for building_data in schedule_data:
-            # Insert or update schedule data (you may need to adjust table name and columns)
-            query = """
-                INSERT INTO client_schedule (
-                    client_id, building_name, unit_number, price, tour_date, tour_time,
-                    tour_type, status, booked_via, touring_rep, selected_by,
-                    leasing_agent_name, leasing_agent_email, leasing_agent_phone,
-                    comment, close_confidence, created_at
-                ) VALUES (
-                    %(client_id)s, %(building)s, %(unit_number)s, %(price)s, %(tour_date)s, %(tour_time)s,
-                    %(tour_type)s, %(status)s, %(booked_via)s, %(touring_rep)s, %(selected_by)s,
-                    %(leasing_agent)s, %(leasing_agent_email)s, %(leasing_agent_phone)s,
-                    %(comment)s, %s, NOW()
-                )
-            """
-            # Add close_confidence to each building record
-            building_data_with_conf = building_data.copy()
-            cur.execute(query, (*building_data_with_conf.values(), close_conf))
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+        st.session_state["last_tour_key"] = get_outbox().enqueue("tour", {
+            "client_id": client_id,
+            "close_confidence": close_conf,
+            "buildings": schedule_data,
+        })
         return True
     except Exception as e:
-        st.error(f"Database error: {e}")
-        # Fallback: save to JSON file like requirements page
-        try:
-            schedule_record = {
-                "client_id": client_id,
-                "close_confidence": close_conf,
-                "buildings": schedule_data,
-                "created_at": datetime.now().isoformat()
-            }
-            with open("client_schedules.json", "a") as file:
-                file.write(json.dumps(schedule_record) + "\n")
-            return True
-        except Exception as json_error:
-            st.error(f"Failed to save to file: {json_error}")
-            return False
+        st.error(f"Failed to queue schedule: {e}")
+        return False
 
 # Validation function
 def validate_schedule_data(schedule_data):
@@ -257,10 +404,12 @@ def validate_schedule_data(schedule_data):
     errors = []
     for idx, building in enumerate(schedule_data):
         building_name = building["building"].strip() if building["building"] else ""
-        if not building_name or building_name == "-- Enter Custom Building --":
+        if not building_name or building_name == CUSTOM_BUILDING:
             errors.append(f"Building #{idx + 1}: Building name is required")
         if not building["tour_date"]:
             errors.append(f"Building #{idx + 1}: Tour date is required")
+        if building["tour_time"] and runs_past_midnight(building["tour_time"]):
+            errors.append(f"Building #{idx + 1}: The tour must end by midnight; pick an earlier time")
     return errors
 
 # Main Close Confidence Score
@@ -271,10 +420,18 @@ close_conf = st.slider(
     help="How likely is the client to close while on tour? Rate from 0 to 100."
 )
 
+book_anyway = False
+if schedule_conflicts:
+    book_anyway = st.checkbox("Book anyway, even though the touring rep has overlapping tours")
+
 # --- SUBMIT ---
 if st.button("📅 Submit Schedule", type="primary"):
     # Validate form data
     validation_errors = validate_schedule_data(schedule_data)
+    if schedule_conflicts and not book_anyway:
+        validation_errors += [
+            f"Building #{idx + 1}: the touring rep already has a tour at this time" for idx in schedule_conflicts
+        ]
     
     if validation_errors:
         st.error("❌ Please fix the following errors:")
@@ -285,12 +442,27 @@ if st.button("📅 Submit Schedule", type="primary"):
     else:
         # Save to database
         success = save_schedule_to_db(schedule_data, close_conf)
+        # A building missing from the catalog means it may be stale; re-check on next read
+        known_buildings = set(building_names)
+        if any(b["building"] and b["building"] not in known_buildings for b in schedule_data):
+            get_building_catalog().invalidate()
         if success:
+            # Visible to other sessions' conflict checks before the outbox syncs
+            if slot_index is not None:
+                for building in schedule_data:
+                    if building["touring_rep"].strip():
+                        slot_index.add(
+                            building["touring_rep"],
+                            date.fromisoformat(building["tour_date"]),
+                            building["tour_time"],
+                            booking_label(building["building"], client_id),
+                        )
             st.success("✅ Tour schedule saved successfully!")
             st.balloons()
             # Optionally display summary
             with st.expander("📋 Schedule Summary", expanded=False):
                 st.write(f"**Client:** {client_name} (ID: {client_id})")
+                st.write(f"**Reference:** {st.session_state['last_tour_key']}")
                 st.write(f"**Close Confidence Score:** {close_conf}%")
                 st.write(f"**Number of Buildings:** {len(schedule_data)}")
                 for idx, building in enumerate(schedule_data):
@@ -300,3 +472,5 @@ if st.button("📅 Submit Schedule", type="primary"):
             st.error("❌ Failed to save schedule. Please try again.")
 
 st.markdown('</div>', unsafe_allow_html=True)  # Close the container
+
+show_pending_writes()
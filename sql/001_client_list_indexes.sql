@@ -0,0 +1,4 @@
+-- Keyset pagination for the client list (pages/2_Client.py: fetch_clients).
+-- Matches ORDER BY created DESC, id DESC so each "Load more" page is an index seek.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_created_id_idx
+    ON client (created DESC, id DESC);
@@ -0,0 +1,13 @@
+-- Trigram indexes for the client search (utils/client_search.py).
+-- ILIKE '%term%' and the % similarity operator can both use these GIN indexes,
+-- so search latency stays flat as the client table grows.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_fullname_trgm_idx
+    ON client USING gin (fullname gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_email_trgm_idx
+    ON client USING gin (email gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_assigned_employee_name_trgm_idx
+    ON client USING gin (assigned_employee_name gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_phone_digits_trgm_idx
+    ON client USING gin ((regexp_replace(COALESCE(phone, ''), '\D', '', 'g')) gin_trgm_ops);
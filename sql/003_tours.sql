@@ -0,0 +1,13 @@
+-- Parent row grouping every building visited on one tour
+-- (utils/schedules.py: insert_tour).
+CREATE TABLE IF NOT EXISTS tour (
+    id               BIGSERIAL PRIMARY KEY,
+    client_id        BIGINT NOT NULL,
+    close_confidence INTEGER,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS tour_client_id_idx ON tour (client_id);
+
+ALTER TABLE client_schedule ADD COLUMN IF NOT EXISTS tour_id BIGINT REFERENCES tour (id);
+ALTER TABLE client_schedule ADD COLUMN IF NOT EXISTS building_id BIGINT;
+CREATE INDEX IF NOT EXISTS client_schedule_tour_id_idx ON client_schedule (tour_id);
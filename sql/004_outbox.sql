@@ -0,0 +1,8 @@
+-- Idempotency keys of writes replayed from the local outbox (utils/outbox.py).
+-- Inserted in the same transaction as the write itself, so a replay after a
+-- crash between the Postgres commit and the local delete is a no-op.
+CREATE TABLE IF NOT EXISTS outbox_applied (
+    idem_key   TEXT PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,57 @@
+-- Closed/won deals entered on pages/Revenue_Entry.py (utils/revenue.py).
+-- One row per (client_id, tour_id); re-saving a deal updates it in place.
+-- NULLS NOT DISTINCT (Postgres 15+) keeps deals without a tour unique per client.
+CREATE TABLE IF NOT EXISTS revenue (
+    id                          BIGSERIAL PRIMARY KEY,
+    client_id                   BIGINT NOT NULL,
+    tour_id                     BIGINT,
+    client_name                 TEXT,
+    sales_rep_id                TEXT,
+    sales_rep_name              TEXT,
+    tour_rep_id                 TEXT,
+    tour_rep_name               TEXT,
+    building_id                 BIGINT,
+    building_name               TEXT,
+    unit_number                 TEXT,
+    move_in_date                DATE,
+    tour_date                   DATE,
+    lease_term                  SMALLINT,
+    application_approved_date   DATE,
+    month                       SMALLINT CHECK (month BETWEEN 1 AND 12),
+    year                        SMALLINT,
+    beds                        SMALLINT,
+    baths                       NUMERIC(3, 1),
+    rent                        NUMERIC(12, 2),
+    concession_free_months      NUMERIC(4, 1),
+    additional_concessions      NUMERIC(12, 2),
+    total_concession_value      NUMERIC(12, 2),
+    net_effective               NUMERIC(12, 2),
+    commission_percentage       NUMERIC(5, 2),
+    deal_value                  NUMERIC(12, 2),
+    concession_text             TEXT,
+    invoice_prepared            BOOLEAN NOT NULL DEFAULT FALSE,
+    invoice_prepared_date       DATE,
+    invoice_sent                BOOLEAN NOT NULL DEFAULT FALSE,
+    invoice_sent_date           DATE,
+    invoice_collected           BOOLEAN NOT NULL DEFAULT FALSE,
+    invoice_collected_date      DATE,
+    application_status          TEXT,
+    signed_lease_date           DATE,
+    is_closed                   BOOLEAN NOT NULL DEFAULT FALSE,
+    closed_date                 DATE,
+    invoice_info_requested      BOOLEAN NOT NULL DEFAULT FALSE,
+    invoice_info_requested_date DATE,
+    invoice_info_received       BOOLEAN NOT NULL DEFAULT FALSE,
+    invoice_info_received_date  DATE,
+    payment_to_lead_source      BOOLEAN NOT NULL DEFAULT FALSE,
+    payment_to_lead_source_date DATE,
+    dispute_raised              BOOLEAN NOT NULL DEFAULT FALSE,
+    dispute_raised_date         DATE,
+    dispute_resolved            BOOLEAN NOT NULL DEFAULT FALSE,
+    dispute_resolved_date       DATE,
+    comments                    TEXT,
+    created_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CONSTRAINT revenue_client_tour_key UNIQUE NULLS NOT DISTINCT (client_id, tour_id)
+);
+CREATE INDEX IF NOT EXISTS revenue_year_month_idx ON revenue (year, month);
@@ -0,0 +1,110 @@
+-- Pre-aggregated revenue for the Revenue Dashboard (pages/Revenue_Dashboard.py).
+-- One row per (year, month, sales rep, building). Statement-level triggers on
+-- revenue recompute only the groups touched by each INSERT/UPDATE/DELETE, so
+-- form saves, outbox replays and bulk imports all keep it current without
+-- re-aggregating the whole fact table.
+CREATE TABLE IF NOT EXISTS revenue_rollup (
+    year                        SMALLINT NOT NULL,
+    month                       SMALLINT NOT NULL,
+    sales_rep                   TEXT NOT NULL,
+    building                    TEXT NOT NULL,
+    deals                       INTEGER NOT NULL,
+    closed_deals                INTEGER NOT NULL,
+    deal_value                  NUMERIC(14, 2) NOT NULL,
+    net_effective               NUMERIC(14, 2) NOT NULL,
+    total_concession_value      NUMERIC(14, 2) NOT NULL,
+    commission_percentage_sum   NUMERIC(14, 2) NOT NULL,
+    commission_percentage_count INTEGER NOT NULL,
+    PRIMARY KEY (year, month, sales_rep, building)
+);
+-- Was SUM(deal_value * commission_percentage / 100), which applied the
+-- commission twice: deal_value is already the commission on the rent
+ALTER TABLE revenue_rollup DROP COLUMN IF EXISTS commission_value;
+
+DO $$ BEGIN
+    CREATE TYPE revenue_rollup_key AS (year SMALLINT, month SMALLINT, sales_rep TEXT, building TEXT);
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- Recompute the rollup rows for the given groups from the revenue table
+CREATE OR REPLACE FUNCTION revenue_rollup_refresh(keys revenue_rollup_key[]) RETURNS VOID AS $$
+BEGIN
+    -- Serialize refreshes of the same month so concurrent saves to a group
+    -- can't race; saves to other months proceed. Taken in order, so two
+    -- refreshes spanning several months can't deadlock.
+    PERFORM pg_advisory_xact_lock(hashtext('revenue_rollup'), m.year * 100 + m.month)
+    FROM (SELECT DISTINCT year, month FROM unnest(keys)) m
+    ORDER BY m.year, m.month;
+
+    DELETE FROM revenue_rollup r
+    USING (SELECT DISTINCT * FROM unnest(keys)) g
+    WHERE r.year = g.year AND r.month = g.month
+      AND r.sales_rep = g.sales_rep AND r.building = g.building;
+
+    INSERT INTO revenue_rollup
+    SELECT v.year, v.month, COALESCE(v.sales_rep_name, ''), COALESCE(v.building_name, ''),
+           COUNT(*),
+           COUNT(*) FILTER (WHERE v.is_closed),
+           COALESCE(SUM(v.deal_value), 0),
+           COALESCE(SUM(v.net_effective), 0),
+           COALESCE(SUM(v.total_concession_value), 0),
+           COALESCE(SUM(v.commission_percentage), 0),
+           COUNT(v.commission_percentage)
+    FROM revenue v
+    JOIN (SELECT DISTINCT * FROM unnest(keys)) g
+      ON v.year = g.year AND v.month = g.month
+     AND COALESCE(v.sales_rep_name, '') = g.sales_rep
+     AND COALESCE(v.building_name, '') = g.building
+    GROUP BY 1, 2, 3, 4;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables are only visible inside the trigger function itself, so
+-- the affected keys are collected here and handed to revenue_rollup_refresh
+CREATE OR REPLACE FUNCTION revenue_rollup_trigger() RETURNS TRIGGER AS $$
+DECLARE
+    keys revenue_rollup_key[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(ROW(year, month, COALESCE(sales_rep_name, ''), COALESCE(building_name, ''))::revenue_rollup_key)
+        INTO keys FROM new_rows WHERE year IS NOT NULL AND month IS NOT NULL;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(k) INTO keys FROM (
+            SELECT ROW(year, month, COALESCE(sales_rep_name, ''), COALESCE(building_name, ''))::revenue_rollup_key AS k
+            FROM new_rows WHERE year IS NOT NULL AND month IS NOT NULL
+            UNION ALL
+            SELECT ROW(year, month, COALESCE(sales_rep_name, ''), COALESCE(building_name, ''))::revenue_rollup_key
+            FROM old_rows WHERE year IS NOT NULL AND month IS NOT NULL
+        ) changed;
+    ELSE
+        SELECT array_agg(ROW(year, month, COALESCE(sales_rep_name, ''), COALESCE(building_name, ''))::revenue_rollup_key)
+        INTO keys FROM old_rows WHERE year IS NOT NULL AND month IS NOT NULL;
+    END IF;
+    IF keys IS NOT NULL THEN
+        PERFORM revenue_rollup_refresh(keys);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS revenue_rollup_insert ON revenue;
+CREATE TRIGGER revenue_rollup_insert AFTER INSERT ON revenue
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION revenue_rollup_trigger();
+
+DROP TRIGGER IF EXISTS revenue_rollup_update ON revenue;
+CREATE TRIGGER revenue_rollup_update AFTER UPDATE ON revenue
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION revenue_rollup_trigger();
+
+DROP TRIGGER IF EXISTS revenue_rollup_delete ON revenue;
+CREATE TRIGGER revenue_rollup_delete AFTER DELETE ON revenue
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION revenue_rollup_trigger();
+
+-- Backfill from existing revenue rows
+TRUNCATE revenue_rollup;
+SELECT revenue_rollup_refresh(ARRAY(
+    SELECT DISTINCT ROW(year, month, COALESCE(sales_rep_name, ''), COALESCE(building_name, ''))::revenue_rollup_key
+    FROM revenue WHERE year IS NOT NULL AND month IS NOT NULL
+));
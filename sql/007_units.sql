@@ -0,0 +1,23 @@
+-- Unit inventory and the building attributes the matching engine indexes
+-- (utils/matching.py: UNIT_INVENTORY_QUERY).
+ALTER TABLE building ADD COLUMN IF NOT EXISTS zip TEXT;
+ALTER TABLE building ADD COLUMN IF NOT EXISTS amenities TEXT[] NOT NULL DEFAULT '{}';
+
+CREATE TABLE IF NOT EXISTS unit (
+    id             BIGSERIAL PRIMARY KEY,
+    building_id    BIGINT NOT NULL REFERENCES building (id),
+    unit_number    TEXT,
+    price          NUMERIC(12, 2),
+    beds           SMALLINT NOT NULL DEFAULT 0,
+    baths          NUMERIC(3, 1) NOT NULL DEFAULT 1,
+    sqft           INTEGER,
+    available_date DATE,
+    cats_allowed   BOOLEAN NOT NULL DEFAULT FALSE,
+    dogs_allowed   BOOLEAN NOT NULL DEFAULT FALSE,
+    parking        BOOLEAN NOT NULL DEFAULT FALSE,
+    washer_dryer   BOOLEAN NOT NULL DEFAULT FALSE,
+    is_available   BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS unit_building_id_idx ON unit (building_id);
+CREATE INDEX IF NOT EXISTS unit_available_idx ON unit (building_id) WHERE is_available;
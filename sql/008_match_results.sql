@@ -0,0 +1,41 @@
+-- Ranked unit suggestions written by the nightly re-match job
+-- (utils/rematch.py) and read by pages/Building_Matches.py.
+CREATE TABLE IF NOT EXISTS match_result (
+    client_id      BIGINT NOT NULL,
+    unit_id        BIGINT NOT NULL,
+    requirement_id BIGINT NOT NULL,
+    rank           SMALLINT NOT NULL,
+    score          NUMERIC(5, 1) NOT NULL,
+    computed_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (client_id, unit_id)
+);
+CREATE INDEX IF NOT EXISTS match_result_client_rank_idx ON match_result (client_id, rank);
+CREATE INDEX IF NOT EXISTS match_result_unit_id_idx ON match_result (unit_id);
+
+-- How far each input has been processed; one row per job
+CREATE TABLE IF NOT EXISTS match_watermark (
+    job             TEXT PRIMARY KEY,
+    requirements_at TIMESTAMPTZ NOT NULL,
+    units_at        TIMESTAMPTZ NOT NULL,
+    finished_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Change tracking for the delta reads
+ALTER TABLE client_requirements ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS client_requirements_updated_at_idx ON client_requirements (updated_at);
+CREATE INDEX IF NOT EXISTS unit_updated_at_idx ON unit (updated_at);
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS client_requirements_touch ON client_requirements;
+CREATE TRIGGER client_requirements_touch BEFORE UPDATE ON client_requirements
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS unit_touch ON unit;
+CREATE TRIGGER unit_touch BEFORE UPDATE ON unit
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
@@ -0,0 +1,4 @@
+-- "Latest requirement for a client" is a single index probe
+-- (utils/requirements.py: LATEST_REQUIREMENT_QUERY, apply_requirement).
+CREATE INDEX IF NOT EXISTS client_requirements_client_latest_idx
+    ON client_requirements (client_id, id DESC);
@@ -0,0 +1,55 @@
+-- Indexable storage for the list and availability fields of client_requirements
+-- (utils/requirements.py: adapt_requirement_values, find_available_clients).
+
+-- Weekly availability as JSONB: {"Monday": {"available": true, "start": "09:00", "end": "17:00"}, ...}
+ALTER TABLE client_requirements
+    ALTER COLUMN availability TYPE JSONB USING availability::text::jsonb;
+
+-- Containment/overlap lookups (zip @> ARRAY['10001'], amenities @> ARRAY['gym'])
+CREATE INDEX IF NOT EXISTS client_requirements_zip_gin ON client_requirements USING GIN (zip);
+CREATE INDEX IF NOT EXISTS client_requirements_neighborhood_gin ON client_requirements USING GIN (neighborhood);
+CREATE INDEX IF NOT EXISTS client_requirements_amenities_gin ON client_requirements USING GIN (amenities);
+
+-- One row per available day (ISO day number, 1 = Monday), kept in step with
+-- client_requirements.availability by the trigger below
+CREATE TABLE IF NOT EXISTS client_availability (
+    requirement_id BIGINT NOT NULL REFERENCES client_requirements (id) ON DELETE CASCADE,
+    client_id      BIGINT,
+    day            SMALLINT NOT NULL CHECK (day BETWEEN 1 AND 7),
+    start_time     TIME NOT NULL,
+    end_time       TIME NOT NULL,
+    PRIMARY KEY (requirement_id, day)
+);
+CREATE INDEX IF NOT EXISTS client_availability_day_idx ON client_availability (day, start_time, end_time);
+CREATE INDEX IF NOT EXISTS client_availability_client_idx ON client_availability (client_id);
+
+CREATE OR REPLACE FUNCTION client_availability_rows(req_id BIGINT, req_client_id BIGINT, slots JSONB)
+RETURNS TABLE (requirement_id BIGINT, client_id BIGINT, day SMALLINT, start_time TIME, end_time TIME) AS $$
+    SELECT $1, $2, d.day::smallint, (a.slot->>'start')::time, (a.slot->>'end')::time
+    FROM jsonb_each(COALESCE($3, '{}'::jsonb)) AS a (day_name, slot)
+    JOIN (VALUES ('Monday', 1), ('Tuesday', 2), ('Wednesday', 3), ('Thursday', 4),
+                 ('Friday', 5), ('Saturday', 6), ('Sunday', 7)) AS d (name, day)
+      ON d.name = a.day_name
+    WHERE COALESCE((a.slot->>'available')::boolean, FALSE)
+      AND (a.slot->>'end')::time > (a.slot->>'start')::time
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION client_availability_sync() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM client_availability WHERE requirement_id = NEW.id;
+    INSERT INTO client_availability
+    SELECT * FROM client_availability_rows(NEW.id, NEW.client_id, NEW.availability);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS client_availability_sync ON client_requirements;
+CREATE TRIGGER client_availability_sync
+    AFTER INSERT OR UPDATE OF availability, client_id ON client_requirements
+    FOR EACH ROW EXECUTE FUNCTION client_availability_sync();
+
+-- Backfill without touching client_requirements (and its updated_at)
+INSERT INTO client_availability
+SELECT slot_rows.*
+FROM client_requirements r, client_availability_rows(r.id, r.client_id, r.availability) slot_rows
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,3 @@
+-- Building locations for tour route ordering (utils/routes.py), in WGS84 degrees.
+ALTER TABLE building ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE building ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
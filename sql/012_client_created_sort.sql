@@ -0,0 +1,7 @@
+-- Client list sorted by creation date (utils/client_grid.py: CREATED_SORT).
+-- The grid sorts on COALESCE(created, ...) so clients without a creation date
+-- still get a keyset cursor; this replaces the plain (created, id) index.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS client_created_sort_id_idx
+    ON client ((COALESCE(created, '1900-01-01 00:00:00+00'::timestamptz)) DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS client_created_id_idx;
@@ -0,0 +1,17 @@
+-- The re-match delta (utils/rematch.py) reads units by unit.updated_at, but a
+-- unit's score also depends on its building's zip, neighborhood and amenities.
+-- Touch the building's units when those change so the next run rescores them.
+CREATE OR REPLACE FUNCTION touch_building_units() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE unit SET updated_at = NOW() WHERE building_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS building_touch_units ON building;
+CREATE TRIGGER building_touch_units AFTER UPDATE OF zip, neighborhood, amenities ON building
+    FOR EACH ROW
+    WHEN (OLD.zip IS DISTINCT FROM NEW.zip
+          OR OLD.neighborhood IS DISTINCT FROM NEW.neighborhood
+          OR OLD.amenities IS DISTINCT FROM NEW.amenities)
+    EXECUTE FUNCTION touch_building_units();
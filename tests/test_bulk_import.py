@@ -0,0 +1,36 @@
+import pandas as pd
+
+from utils.bulk_import import validate_chunk
+
+
+def _validate(**columns):
+    chunk = pd.DataFrame({"client_id": ["1"] * len(next(iter(columns.values()))), **columns}, dtype=object)
+    return validate_chunk(chunk, "revenue", 2)
+
+
+def test_large_ids_are_kept_exactly():
+    clean, rejects = _validate(client_id=["9007199254740993", "9223372036854775807", "42.0"])
+    assert rejects.empty
+    assert clean["client_id"].tolist() == ["9007199254740993", "9223372036854775807", "42"]
+
+
+def test_integers_outside_the_column_type_are_rejected():
+    clean, rejects = _validate(
+        client_id=["9223372036854775808", "1", "1"],
+        year=["2024", "40000", "2024"],
+        tour_id=["1", "1", "1.5"],
+    )
+    assert clean.empty
+    assert rejects[["row", "column"]].values.tolist() == [[2, "client_id"], [4, "tour_id"], [3, "year"]]
+
+
+def test_revenue_amounts_must_be_finite_and_not_negative():
+    clean, rejects = _validate(
+        rent=["-5", "inf", "1e400", "nan", "3200"],
+        additional_concessions=["0", "0", "0", "0", "-1"],
+        concession_free_months=["0.5", "0", "0", "0", "0"],
+    )
+    assert clean.empty
+    assert rejects[["row", "column"]].values.tolist() == [
+        [3, "rent"], [4, "rent"], [5, "rent"], [2, "rent"], [6, "additional_concessions"],
+    ]
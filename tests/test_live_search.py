@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from utils.client_search import can_refine
+from utils.live_search import LiveSearch
+
+
+def _results(*rows):
+    return pd.DataFrame(
+        [{"id": i, "fullname": name, "email": None, "assigned_employee_name": None, "phone": phone}
+         for i, name, phone in rows],
+        columns=["id", "fullname", "email", "assigned_employee_name", "phone"],
+    )
+
+
+@pytest.mark.parametrize("earlier, term, expected", [
+    ("smi", "smit", True),
+    ("555-", "555-1", True),
+    ("555", "5551", False),
+    ("55", "555", False),
+    ("12", "123", False),
+    ("smi", "mit", False),
+])
+def test_can_refine(earlier, term, expected):
+    assert can_refine(earlier, term) is expected
+
+
+def test_plain_results_are_refined_locally():
+    search = LiveSearch()
+    search._remember("smi", _results((1, "Ann Smith", None), (2, "Bo Smits", None)), 50, refinable=True)
+    refined = search._from_cache("smit", 50)
+    assert refined["id"].tolist() == [1, 2]
+    assert search.refinements == 1
+
+
+@pytest.mark.parametrize("earlier, term", [("55", "555"), ("12", "123")])
+def test_terms_adding_a_clause_are_requeried(earlier, term):
+    search = LiveSearch()
+    search._remember(earlier, _results((12, "Ann 55", "555-0100")), 50, refinable=True)
+    assert search._from_cache(term, 50) is None
+
+
+def test_trigram_results_are_not_refined():
+    search = LiveSearch()
+    search._remember("smi", _results((1, "Ann Smith", None)), 50, refinable=False)
+    assert search._from_cache("smit", 50) is None
@@ -0,0 +1,23 @@
+from utils.metrics import METRICS_MAX_SERIES, OVERFLOW_KEY, Metrics, normalize_sql
+
+
+def test_batched_statements_share_one_template():
+    one = normalize_sql(b"INSERT INTO tour (client_id, name) VALUES (12, 'Jane Doe')")
+    many = normalize_sql(b"INSERT INTO tour (client_id, name) VALUES (13, 'O''Brien'), (14, 'Ann Lee')")
+    assert one == many
+    assert "Jane" not in one and "12" not in one
+
+
+def test_in_lists_of_any_length_share_one_template():
+    assert normalize_sql("SELECT * FROM client WHERE id IN (1, 2, 3)") == normalize_sql(
+        "SELECT * FROM client WHERE id IN (4)"
+    )
+
+
+def test_series_are_capped():
+    metrics = Metrics()
+    for i in range(METRICS_MAX_SERIES + 10):
+        metrics.observe("db.query", 0.001, detail=f"SELECT {i} AS col{i}", query=True)
+    queries = {row["query"]: row for row in metrics.queries()}
+    assert len(queries) == METRICS_MAX_SERIES + 1
+    assert queries[OVERFLOW_KEY]["count"] == 10
@@ -0,0 +1,98 @@
+import psycopg2
+import pytest
+
+import utils.outbox as outbox_module
+from utils.outbox import Outbox
+
+
+class FakeCursor:
+    rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        # Every idempotency key is new to the fake database
+        self.rowcount = 1 if "outbox_applied" in sql else 0
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+
+class FakePool:
+    def getconn(self):
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        pass
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(path=str(tmp_path / "outbox.sqlite3"), pool=FakePool())
+
+
+def _retry_now(outbox):
+    outbox._db.execute("UPDATE outbox SET next_attempt_at = 0")
+
+
+def test_failed_write_is_replayed_before_newer_writes_for_the_client(outbox, monkeypatch):
+    applied, timed_out = [], []
+
+    def apply_requirement(conn, values, idem_key):
+        if values["budget"] == 2000 and not timed_out:
+            timed_out.append(idem_key)
+            raise psycopg2.extensions.QueryCanceledError("canceling statement due to statement timeout")
+        applied.append((values["client_id"], values["budget"]))
+
+    monkeypatch.setattr(outbox_module, "_resolve", lambda kind: apply_requirement)
+    outbox.enqueue("client_requirement", {"client_id": 7, "budget": 2000})
+    outbox.enqueue("client_requirement", {"client_id": 7, "budget": 2500})
+    outbox.enqueue("client_requirement", {"client_id": 8, "budget": 1800})
+
+    assert outbox.drain_once() == 1
+    assert applied == [(8, 1800)]
+    assert outbox.depth() == 2
+
+    # The newer write keeps waiting while the failed one backs off
+    assert outbox.drain_once() == 0
+
+    _retry_now(outbox)
+    assert outbox.drain_once() == 2
+    assert applied == [(8, 1800), (7, 2000), (7, 2500)]
+    assert outbox.depth() == 0
+
+
+def test_failure_does_not_hold_back_other_kinds(outbox, monkeypatch):
+    applied = []
+
+    def apply(conn, values, idem_key):
+        if values.get("budget"):
+            raise ValueError("bad payload")
+        applied.append(values)
+
+    monkeypatch.setattr(outbox_module, "_resolve", lambda kind: apply)
+    outbox.enqueue("client_requirement", {"client_id": 7, "budget": 2000})
+    outbox.enqueue("revenue", {"client_id": 7, "rent": 3100})
+
+    assert outbox.drain_once() == 1
+    assert applied == [{"client_id": 7, "rent": 3100}]
+
+
+def test_depth_for_counts_one_clients_pending_writes(outbox):
+    outbox.enqueue("client_requirement", {"client_id": 7, "changes": {}})
+    outbox.enqueue("client_requirement", {"client_id": "7", "changes": {}})
+    outbox.enqueue("client_requirement", {"client_id": 8, "changes": {}})
+    outbox.enqueue("revenue", {"client_id": 7})
+
+    assert outbox.depth_for("client_requirement", "7") == 2
+    assert outbox.depth_for("client_requirement", 8) == 1
+    assert outbox.depth_for("tour", 7) == 0
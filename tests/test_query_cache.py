@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import utils.query_cache as query_cache
+from utils.query_cache import QueryCache, row_tag
+
+
+def test_queries_sharing_a_long_prefix_get_separate_entries():
+    prefix = "SELECT id FROM client WHERE " + " AND ".join(f"col{i} = %(p{i})s" for i in range(40))
+    assert len(prefix) > 300
+    asc, desc = f"{prefix} ORDER BY id ASC", f"{prefix} ORDER BY id DESC"
+    cache = QueryCache()
+
+    assert cache.key(asc) != cache.key(desc)
+    assert cache.get_or_load(asc, None, lambda: "asc", ["client"]) == "asc"
+    assert cache.get_or_load(desc, None, lambda: "desc", ["client"]) == "desc"
+    assert cache.get(asc) == "asc"
+
+
+def test_whitespace_differences_share_an_entry():
+    cache = QueryCache()
+    cache.get_or_load("SELECT 1\n  FROM client", None, lambda: 1, ["client"])
+    assert cache.get("SELECT 1 FROM client") == 1
+
+
+def _load(cache, sql, value, tags, ttl=None):
+    return cache.get_or_load(sql, None, lambda: value, tags, ttl)
+
+
+def test_table_invalidation_drops_table_and_row_reads():
+    cache = QueryCache()
+    _load(cache, "SELECT * FROM client_requirements", "all", ["client_requirements"])
+    _load(cache, "SELECT 42", "client 42", [row_tag("client_requirements", 42)])
+    _load(cache, "SELECT * FROM client", "clients", ["client"])
+
+    assert cache.invalidate("client_requirements") == 2
+    assert cache.get("SELECT * FROM client_requirements") is None
+    assert cache.get("SELECT 42") is None
+    assert cache.get("SELECT * FROM client") == "clients"
+
+
+def test_row_invalidation_keeps_other_rows():
+    cache = QueryCache()
+    _load(cache, "SELECT * FROM client_requirements", "all", ["client_requirements"])
+    _load(cache, "SELECT 42", "client 42", [row_tag("client_requirements", 42)])
+    _load(cache, "SELECT 43", "client 43", [row_tag("client_requirements", 43)])
+
+    assert cache.invalidate("client_requirements", [42]) == 2
+    assert cache.get("SELECT * FROM client_requirements") is None
+    assert cache.get("SELECT 42") is None
+    assert cache.get("SELECT 43") == "client 43"
+
+
+def test_load_overlapping_an_invalidation_is_not_stored():
+    cache = QueryCache()
+
+    def load():
+        # A write commits while the query is running
+        cache.invalidate("client", [7])
+        return "before the write"
+
+    assert cache.get_or_load("SELECT 7", None, load, [row_tag("client", 7)]) == "before the write"
+    assert cache.get("SELECT 7") is None
+    assert _load(cache, "SELECT 7", "after the write", [row_tag("client", 7)]) == "after the write"
+    assert cache.get("SELECT 7") == "after the write"
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = QueryCache(ttl=60)
+    _load(cache, "SELECT 1", "default ttl", ["client"])
+    _load(cache, "SELECT 2", "short ttl", ["client"], ttl=5)
+
+    now[0] += 10
+    assert cache.get("SELECT 1") == "default ttl"
+    assert cache.get("SELECT 2") is None
+    now[0] += 60
+    assert cache.get("SELECT 1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    _load(cache, "SELECT 1", 1, ["client"])
+    _load(cache, "SELECT 2", 2, ["client"])
+    assert cache.get("SELECT 1") == 1
+    _load(cache, "SELECT 3", 3, ["client"])
+
+    assert cache.get("SELECT 2") is None
+    assert cache.get("SELECT 1") == 1
+    assert cache.get("SELECT 3") == 3
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.revenue_calc import DERIVED_FIELDS, derive_revenue_fields, derive_revenue_frame
+
+BASE = {
+    "rent": 3200.0,
+    "lease_term": 12,
+    "concession_free_months": 1,
+    "additional_concessions": 250.0,
+    "commission_percentage": 100.0,
+}
+
+EDGE_CASES = {
+    "typical": {},
+    "zero_lease_term": {"lease_term": 0},
+    "no_commission": {"commission_percentage": 0.0},
+    "full_commission": {"commission_percentage": 100.0},
+    "partial_commission": {"commission_percentage": 12.5},
+    "missing_rent": {"rent": None},
+    "nan_rent": {"rent": np.nan},
+    "missing_lease_term": {"lease_term": None},
+    "missing_concessions": {"concession_free_months": None, "additional_concessions": None},
+    "nan_concessions": {"concession_free_months": np.nan, "additional_concessions": np.nan},
+    "missing_commission": {"commission_percentage": None},
+    "empty_strings": {"rent": "", "commission_percentage": ""},
+    "numeric_strings": {"rent": "2750.50", "lease_term": "18"},
+    "fractional_cents": {"rent": 1999.995, "commission_percentage": 33.333},
+}
+
+
+def _as_float(value):
+    return np.nan if value is None else value
+
+
+@pytest.mark.parametrize("changes", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_scalar_and_batch_paths_agree(changes):
+    entry = {**BASE, **changes}
+    scalar = derive_revenue_fields(entry)
+    batch = derive_revenue_frame(pd.DataFrame([entry], dtype=object)).iloc[0]
+    for field in DERIVED_FIELDS:
+        assert np.array_equal(_as_float(scalar[field]), batch[field], equal_nan=True), field
+
+
+def test_batch_rows_match_their_scalar_results():
+    entries = [{**BASE, **changes} for changes in EDGE_CASES.values()]
+    batch = derive_revenue_frame(pd.DataFrame(entries, dtype=object))
+    for (_, row), entry in zip(batch.iterrows(), entries):
+        scalar = derive_revenue_fields(entry)
+        for field in DERIVED_FIELDS:
+            assert np.array_equal(_as_float(scalar[field]), row[field], equal_nan=True), field
+
+
+def test_zero_lease_term_has_no_net_effective():
+    assert derive_revenue_fields({**BASE, "lease_term": 0})["net_effective"] is None
+
+
+def test_commission_bounds():
+    assert derive_revenue_fields({**BASE, "commission_percentage": 0})["deal_value"] == 0.0
+    assert derive_revenue_fields({**BASE, "commission_percentage": 100})["deal_value"] == BASE["rent"]
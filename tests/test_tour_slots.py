@@ -0,0 +1,43 @@
+from datetime import date, time, timedelta
+
+from utils.tour_slots import SLOT_SEARCH_DAYS, TourSlotIndex
+
+TODAY = date.today()
+FAR_DAY = TODAY + timedelta(days=SLOT_SEARCH_DAYS + 10)
+ROWS = [
+    (1, "Ann", TODAY + timedelta(days=1), time(10, 0), "Tower 1", 9),
+    (2, "Ann", FAR_DAY, time(11, 0), "Tower 2", 9),
+]
+
+
+class FakeIndex(TourSlotIndex):
+    def __init__(self):
+        super().__init__()
+        self.fetches = []
+
+    def _fetch(self, full, first=None, last=None):
+        self.fetches.append((first, last))
+        return [row for row in ROWS if first <= row[2] <= last]
+
+
+def test_days_past_the_window_are_loaded_on_demand():
+    index = FakeIndex()
+    assert index.conflicts("Ann", TODAY + timedelta(days=1), time(10, 15))
+    assert len(index.fetches) == 1
+
+    clash = index.conflicts("ann", FAR_DAY, time(11, 15))
+    assert [label for _, _, label in clash] == ["Tower 2 (client 9)"]
+    assert index.fetches[-1] == (FAR_DAY, FAR_DAY)
+
+    # Loaded once per ttl
+    index.conflicts("Ann", FAR_DAY, time(15, 0))
+    assert len(index.fetches) == 2
+
+
+def test_local_bookings_on_far_days_survive_the_load():
+    index = FakeIndex()
+    index.ensure_fresh()
+    index.add("Ann", FAR_DAY, time(14, 0), "Tower 3 (client 5)")
+    clash = index.conflicts("Ann", FAR_DAY, time(14, 0))
+    assert [label for _, _, label in clash] == ["Tower 3 (client 5)"]
+    assert index.plan_tour("Ann", FAR_DAY, [30], earliest=time(11, 0)) == [time(11, 30)]
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+import streamlit as st
+
+from utils.db import get_connection
+
+BUILDING_CATALOG_TTL = int(os.getenv("BUILDING_CATALOG_TTL", "300"))
+# Incremental refreshes can't see deleted buildings, so reload fully now and then
+BUILDING_CATALOG_FULL_RELOAD = int(os.getenv("BUILDING_CATALOG_FULL_RELOAD", "3600"))
+BUILDING_SUGGESTIONS = 10
+
+
+class BuildingCatalog:
+    """
+    In-memory copy of the ``building`` table shared by every session.
+
+    The first load reads the whole table. After that, once the TTL expires,
+    only rows past the watermark are fetched: ``updated_at`` when the table
+    has it, otherwise the highest ``id`` seen.
+    """
+
+    def __init__(self, ttl=BUILDING_CATALOG_TTL, full_reload=BUILDING_CATALOG_FULL_RELOAD):
+        self.ttl = ttl
+        self.full_reload = full_reload
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._buildings = {}  # id -> {"id", "name", "address", "neighborhood", "latitude", "longitude"}
+        self._names = []
+        # Prefix indexes: sorted lowercase keys with the building id at the same
+        # position, one for full names and one for every later word in a name
+        self._name_index = ([], [])
+        self._word_index = ([], [])
+        self._watermark = None
+        self._use_updated_at = None
+        self._loaded_at = 0.0
+        self._full_loaded_at = 0.0
+        self._stale = True
+        self.version = 0
+
+    def _detect_watermark_column(self, cur):
+        cur.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'building' AND column_name = 'updated_at'
+        """)
+        return cur.fetchone() is not None
+
+    def _fetch(self, full):
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                if self._use_updated_at is None:
+                    self._use_updated_at = self._detect_watermark_column(cur)
+                if self._use_updated_at:
+                    cur.execute(
+                        """
+                        SELECT id, name, address, neighborhood, latitude, longitude, updated_at FROM building
+                        WHERE %(full)s OR updated_at > %(since)s
+                        """,
+                        {"full": full, "since": self._watermark},
+                    )
+                else:
+                    cur.execute(
+                        """
+                        SELECT id, name, address, neighborhood, latitude, longitude, id FROM building
+                        WHERE %(full)s OR id > %(since)s
+                        """,
+                        {"full": full, "since": self._watermark},
+                    )
+                return cur.fetchall()
+
+    def refresh(self, full=False):
+        """
+        Pull changes from the database into the catalog.
+
+        Args:
+            full (bool): Re-read the whole table instead of the rows past the
+                watermark.
+        """
+        full = full or self._watermark is None
+        rows = self._fetch(full)
+        with self._lock:
+            buildings = {} if full else dict(self._buildings)
+            watermark = None if full else self._watermark
+            for building_id, name, address, neighborhood, latitude, longitude, mark in rows:
+                if name:
+                    buildings[building_id] = {
+                        "id": building_id,
+                        "name": name,
+                        "address": address,
+                        "neighborhood": neighborhood,
+                        "latitude": None if latitude is None else float(latitude),
+                        "longitude": None if longitude is None else float(longitude),
+                    }
+                else:
+                    buildings.pop(building_id, None)
+                if mark is not None and (watermark is None or mark > watermark):
+                    watermark = mark
+            changed = full or bool(rows)
+            self._buildings = buildings
+            self._watermark = watermark
+            now = time.monotonic()
+            self._loaded_at = now
+            if full:
+                self._full_loaded_at = now
+            self._stale = False
+            if changed:
+                self._names = sorted({b["name"] for b in buildings.values()})
+                self._name_index, self._word_index = self._build_indexes(buildings)
+                self.version += 1
+
+    @staticmethod
+    def _build_indexes(buildings):
+        names, words = [], []
+        for building_id, building in buildings.items():
+            tokens = building["name"].lower().split()
+            names.append((" ".join(tokens), building_id))
+            for pos in range(1, len(tokens)):
+                words.append((" ".join(tokens[pos:]), building_id))
+        names.sort()
+        words.sort()
+        return (
+            ([key for key, _ in names], [building_id for _, building_id in names]),
+            ([key for key, _ in words], [building_id for _, building_id in words]),
+        )
+
+    def _ensure_fresh(self):
+        # One session refreshes while the others wait and then reuse the result
+        with self._refresh_lock:
+            now = time.monotonic()
+            if not self._full_loaded_at or now - self._full_loaded_at > self.full_reload:
+                self.refresh(full=True)
+            elif self._stale or now - self._loaded_at > self.ttl:
+                self.refresh()
+
+    def invalidate(self):
+        """Force a refresh on the next read, e.g. after a custom building was entered."""
+        with self._lock:
+            self._stale = True
+
+    def _snapshot(self):
+        # refresh() swaps in new objects rather than mutating them, so what is
+        # read together under the lock stays consistent afterwards
+        with self._lock:
+            return self._buildings, self._name_index, self._word_index
+
+    def names(self):
+        """Return the sorted, distinct building names."""
+        self._ensure_fresh()
+        with self._lock:
+            return self._names
+
+    def get(self, building_id):
+        """Return the building record for ``building_id``, or None (e.g. removed by a reload)."""
+        with self._lock:
+            return self._buildings.get(building_id)
+
+    def suggest(self, query, k=BUILDING_SUGGESTIONS):
+        """
+        Return up to ``k`` buildings whose name, or any word in it, starts with ``query``.
+
+        Matches on the start of the full name rank first; each group is alphabetical.
+
+        Args:
+            query (str): Text typed by the rep; empty returns the first ``k`` names.
+            k (int): Maximum number of suggestions.
+
+        Returns:
+            list: Building records with ``id``, ``name``, ``address``,
+            ``neighborhood``, ``latitude`` and ``longitude``.
+        """
+        self._ensure_fresh()
+        buildings, name_index, word_index = self._snapshot()
+        q = " ".join(query.lower().split())
+        seen = set()
+        matches = []
+        # Full-name prefix matches first, then matches on a later word
+        for keys, ids in (name_index, word_index):
+            pos = bisect_left(keys, q)
+            while pos < len(keys) and len(matches) < k and keys[pos].startswith(q):
+                building_id = ids[pos]
+                if building_id not in seen:
+                    seen.add(building_id)
+                    matches.append(buildings[building_id])
+                pos += 1
+        return matches
+
+
+def format_building(building):
+    """Label for a building suggestion: name, then address and neighborhood when known."""
+    details = ", ".join(part for part in (building.get("address"), building.get("neighborhood")) if part)
+    return f"{building['name']} — {details}" if details else building["name"]
+
+
+@st.cache_resource(show_spinner=False)
+def get_building_catalog():
+    """Process-wide building catalog, shared across sessions and reruns."""
+    return BuildingCatalog()
@@ -0,0 +1,329 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.db import get_connection
+from utils.query_cache import get_query_cache
+from utils.revenue import (
+    REVENUE_COLUMNS, REVENUE_RANGES, REVENUE_ON_CONFLICT, APPLICATION_STATUSES, MONTHS
+)
+from utils.revenue_calc import derive_revenue_frame, INPUT_FIELDS, DERIVED_FIELDS
+from utils.requirements import (
+    REQUIREMENT_COLUMNS, PET_OPTIONS, WASHER_DRYER_OPTIONS, PARKING_OPTIONS,
+    AMENITY_OPTIONS, PREFERENCE_OPTIONS
+)
+
+IMPORT_CHUNK_SIZE = 5000
+# Integer column type -> the values Postgres accepts for it
+INTEGER_RANGES = {
+    "smallint": (-2 ** 15, 2 ** 15 - 1),
+    "integer": (-2 ** 31, 2 ** 31 - 1),
+    "bigint": (-2 ** 63, 2 ** 63 - 1),
+}
+INTEGER_TYPES = set(INTEGER_RANGES)
+TRUE_VALUES = {"true", "t", "yes", "y", "1"}
+FALSE_VALUES = {"false", "f", "no", "n", "0", ""}
+
+# Import target -> the fields its form collects and how staged rows are merged.
+# Staging columns are all text; the merge casts them to the real column types.
+IMPORT_TARGETS = {
+    "revenue": {
+        "label": "Revenue entries",
+        "columns": REVENUE_COLUMNS,
+        "required": ["client_id"],
+        "ranges": REVENUE_RANGES,
+        "choices": {"application_status": APPLICATION_STATUSES},
+        # Concession totals, net effective and deal value are calculated, not imported
+        "derive": True,
+        # The last row in the file wins when a (client_id, tour_id) repeats
+        "merge": f"""
+            INSERT INTO revenue ({{columns}})
+            SELECT DISTINCT ON (client_id::bigint, tour_id::bigint) {{casts}}
+            FROM import_staging
+            ORDER BY client_id::bigint, tour_id::bigint, source_row::integer DESC
+            {REVENUE_ON_CONFLICT}
+        """,
+    },
+    "client_requirements": {
+        "label": "Client requirements",
+        "columns": REQUIREMENT_COLUMNS,
+        "required": ["client_id", "move_in_date", "budget", "sqft", "beds", "baths"],
+        "ranges": {"people_living": (1, None)},
+        "choices": {
+            "pets": [str(code) for code, _ in PET_OPTIONS],
+            "washer_dryer": [str(code) for code, _ in WASHER_DRYER_OPTIONS],
+            "parking": [str(code) for code, _ in PARKING_OPTIONS],
+            "preference": PREFERENCE_OPTIONS,
+        },
+        "array_choices": {"amenities": AMENITY_OPTIONS},
+        # Like the form: a client's latest row is updated, other clients get
+        # a new row; the last row in the file wins for a repeated client_id
+        "merge": """
+            WITH incoming AS (
+                SELECT DISTINCT ON (client_id::bigint) {casts}
+                FROM import_staging
+                ORDER BY client_id::bigint, source_row::integer DESC
+            ),
+            latest AS (
+                SELECT DISTINCT ON (client_id) id, client_id
+                FROM client_requirements
+                WHERE client_id IN (SELECT client_id FROM incoming)
+                ORDER BY client_id, id DESC
+            ),
+            updated AS (
+                UPDATE client_requirements r SET ({columns}) = ({incoming_columns})
+                FROM incoming i JOIN latest l ON l.client_id = i.client_id
+                WHERE r.id = l.id
+                RETURNING 1
+            ),
+            inserted AS (
+                INSERT INTO client_requirements ({columns})
+                SELECT * FROM incoming i
+                WHERE NOT EXISTS (SELECT 1 FROM latest l WHERE l.client_id = i.client_id)
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted)
+        """,
+    },
+}
+
+
+def normalize_header(name):
+    return str(name).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def iter_chunks(file, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Yield the uploaded file as DataFrames of at most ``chunk_size`` rows.
+
+    CSV is parsed incrementally by pandas; XLSX is streamed row by row with
+    openpyxl's read-only mode, so only one chunk is materialized at a time.
+    """
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [normalize_header(h) for h in next(rows, [])]
+            buffer = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) >= chunk_size:
+                    yield pd.DataFrame(buffer, columns=header, dtype=object)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=header, dtype=object)
+        finally:
+            workbook.close()
+    else:
+        for chunk in pd.read_csv(file, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            chunk.columns = [normalize_header(c) for c in chunk.columns]
+            yield chunk
+
+
+def _as_text(series):
+    text = series.astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def _array_literal(items):
+    quoted = ['"' + item.replace("\\", "\\\\").replace('"', '\\"') + '"' for item in items]
+    return "{" + ",".join(quoted) + "}"
+
+
+def validate_chunk(chunk, target, first_row):
+    """
+    Validate and normalize one chunk with vectorized checks.
+
+    Args:
+        chunk (pd.DataFrame): Raw rows with normalized headers.
+        target (str): Key of ``IMPORT_TARGETS``.
+        first_row (int): File row number of the chunk's first data row, used
+            in reject messages.
+
+    Returns:
+        tuple: ``(clean, rejects)``. ``clean`` holds the valid rows as text in
+        staging-column order (NULL as NA); ``rejects`` has ``row``,
+        ``column`` and ``reason`` for every failed check.
+    """
+    spec = IMPORT_TARGETS[target]
+    chunk = chunk.reset_index(drop=True)
+    out = pd.DataFrame(index=chunk.index)
+    out["source_row"] = (chunk.index + first_row).astype("string")
+    problems = []
+    numbers = {}
+
+    def reject(column, mask, reason):
+        # Comparisons on nullable columns leave NA where the value is missing
+        mask = mask.fillna(False).astype(bool)
+        if mask.any():
+            problems.append(pd.DataFrame({
+                "row": chunk.index[mask.to_numpy()] + first_row,
+                "column": column,
+                "reason": reason,
+            }))
+
+    for column, sql_type in spec["columns"].items():
+        if column not in chunk.columns:
+            out[column] = pd.NA
+            continue
+        raw = _as_text(chunk[column])
+        if column in spec["required"]:
+            reject(column, raw.isna(), "is required")
+
+        if column == "month":
+            # Month names as well as numbers, like the form's selectbox
+            names = raw.str.lower().map({m.lower(): str(i) for i, m in enumerate(MONTHS, 1)})
+            raw = names.fillna(raw).astype("string")
+
+        if sql_type in INTEGER_TYPES or sql_type == "numeric":
+            cleaned = raw.str.replace(r"[$,]", "", regex=True)
+            if sql_type in INTEGER_TYPES:
+                # Exact Python ints: through float64, ids past 2**53 would be rounded.
+                # A ".0" suffix is allowed for spreadsheet cells stored as floats.
+                digits = cleaned.str.extract(r"^([+-]?\d+)(?:\.0*)?$", expand=False)
+                number = digits.map(int, na_action="ignore")
+                bad = raw.notna() & digits.isna()
+                reject(column, bad, "not a valid whole number")
+                min_int, max_int = INTEGER_RANGES[sql_type]
+                overflow = number.map(lambda value: not min_int <= value <= max_int, na_action="ignore")
+                reject(column, overflow, f"must be between {min_int} and {max_int}")
+                bad |= overflow.fillna(False).astype(bool)
+            else:
+                number = pd.to_numeric(cleaned, errors="coerce")
+                # "inf", "nan" and overflowing values like "1e400" parse as floats too
+                bad = raw.notna() & ~np.isfinite(number).fillna(False)
+                reject(column, bad, "not a valid number")
+            number = number.where(~bad)
+            low, high = spec["ranges"].get(column, (None, None))
+            if low is not None:
+                reject(column, number < low, f"must be at least {low}")
+            if high is not None:
+                reject(column, number > high, f"must be at most {high}")
+            numbers[column] = number
+            if sql_type in INTEGER_TYPES:
+                out[column] = number.map(str, na_action="ignore").astype("string")
+            else:
+                out[column] = number.astype("string")
+        elif sql_type == "date":
+            parsed = pd.to_datetime(raw, errors="coerce", format="ISO8601")
+            reject(column, raw.notna() & parsed.isna(), "not a valid date (use YYYY-MM-DD)")
+            out[column] = parsed.dt.strftime("%Y-%m-%d").astype("string")
+        elif sql_type == "boolean":
+            lowered = raw.fillna("").str.lower()
+            truthy = lowered.isin(TRUE_VALUES)
+            reject(column, ~truthy & ~lowered.isin(FALSE_VALUES), "not a yes/no value")
+            out[column] = pd.Series(np.where(truthy, "t", "f"), index=chunk.index, dtype="string")
+        elif sql_type == "text[]":
+            items = raw.fillna("").str.split(",").map(lambda parts: [p.strip() for p in parts if p.strip()])
+            allowed = spec.get("array_choices", {}).get(column)
+            if allowed is not None:
+                allowed = set(allowed)
+                reject(column, items.map(lambda values: not allowed.issuperset(values)),
+                       f"must be among: {', '.join(sorted(allowed))}")
+            out[column] = items.map(_array_literal).astype("string")
+        else:
+            choices = spec["choices"].get(column)
+            if choices is not None:
+                reject(column, raw.notna() & ~raw.isin(choices), f"must be one of: {', '.join(choices)}")
+            out[column] = raw
+
+    if spec.get("derive") and "rent" in numbers:
+        inputs = pd.DataFrame({field: numbers.get(field, pd.Series(pd.NA, index=chunk.index)) for field in INPUT_FIELDS})
+        derived = derive_revenue_frame(inputs)
+        has_rent = inputs["rent"].notna()
+        for field in DERIVED_FIELDS:
+            out[field] = out[field].where(~has_rent, derived[field].astype("string"))
+
+    rejects = pd.concat(problems, ignore_index=True) if problems else pd.DataFrame(columns=["row", "column", "reason"])
+    valid = ~chunk.index.isin(rejects["row"] - first_row)
+    return out[valid], rejects
+
+
+def _merge_sql(spec):
+    casts = []
+    for column, sql_type in spec["columns"].items():
+        cast = f"{column}::{sql_type}"
+        if sql_type == "boolean":
+            cast = f"COALESCE({cast}, FALSE)"
+        casts.append(f"{cast} AS {column}")
+    return spec["merge"].format(
+        columns=", ".join(spec["columns"]),
+        casts=", ".join(casts),
+        incoming_columns=", ".join(f"i.{column}" for column in spec["columns"]),
+    )
+
+
+def import_file(file, filename, target, chunk_size=IMPORT_CHUNK_SIZE, on_chunk=None):
+    """
+    Stream, validate and load an uploaded CSV/XLSX file.
+
+    Valid rows of each chunk are COPYed into a temporary staging table; once
+    the whole file has been read, one statement merges staging into the real
+    table. Everything runs in a single transaction, so a failed import leaves
+    no partial data behind.
+
+    Args:
+        file: File-like object with the upload.
+        filename (str): Original file name, used to detect XLSX.
+        target (str): Key of ``IMPORT_TARGETS``.
+        chunk_size (int): Rows validated and copied per chunk.
+        on_chunk (callable): Optional ``on_chunk(rows_read)`` progress callback.
+
+    Returns:
+        dict: ``rows`` read, ``staged`` valid rows, ``loaded`` rows inserted
+        or updated by the merge, and ``rejects`` as a DataFrame.
+    """
+    spec = IMPORT_TARGETS[target]
+    staging_columns = ["source_row"] + list(spec["columns"])
+    rows_read = staged = 0
+    rejects = []
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "CREATE TEMP TABLE import_staging ("
+                + ", ".join(f"{column} text" for column in staging_columns)
+                + ") ON COMMIT DROP"
+            )
+            # Header row is row 1, so data starts at row 2 as in a spreadsheet
+            for chunk in iter_chunks(file, filename, chunk_size):
+                missing = [c for c in spec["required"] if c not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Missing required columns: {', '.join(missing)}")
+                clean, chunk_rejects = validate_chunk(chunk, target, rows_read + 2)
+                rows_read += len(chunk)
+                if not chunk_rejects.empty:
+                    rejects.append(chunk_rejects)
+                if not clean.empty:
+                    buffer = io.StringIO()
+                    clean[staging_columns].to_csv(buffer, index=False, header=False, na_rep="\\N")
+                    buffer.seek(0)
+                    cur.copy_expert(
+                        f"COPY import_staging ({', '.join(staging_columns)}) "
+                        "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                        buffer,
+                    )
+                    staged += len(clean)
+                if on_chunk is not None:
+                    on_chunk(rows_read)
+
+            cur.execute(_merge_sql(spec))
+            # Merges that both update and insert report their own row count
+            loaded = cur.fetchone()[0] if cur.description else cur.rowcount
+        conn.commit()
+    get_query_cache().invalidate(target)
+
+    return {
+        "rows": rows_read,
+        "staged": staged,
+        "loaded": loaded,
+        "rejects": pd.concat(rejects, ignore_index=True) if rejects else pd.DataFrame(columns=["row", "column", "reason"]),
+    }
+
+
+def template_csv(target):
+    """Header-only CSV listing the columns a target accepts."""
+    return ",".join(IMPORT_TARGETS[target]["columns"]) + "\n"
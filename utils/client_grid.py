@@ -0,0 +1,210 @@
+import json
+
+import pandas as pd
+
+from utils.query_cache import cached_read_sql
+
+GRID_BLOCK_SIZE = 50
+# Client writes evict blocks at once; the TTL covers changes made elsewhere
+CLIENT_LIST_TTL = 60
+
+# Sort key standing in for a NULL timestamp. Finite, so the key psycopg2
+# returns goes back into the next block's cursor unchanged ('-infinity' comes
+# back as datetime.min, which no longer matches the NULL rows)
+NULL_TIMESTAMP = "'1900-01-01 00:00:00+00'::timestamptz"
+# Indexed by sql/012_client_created_sort.sql
+CREATED_SORT = f"COALESCE(created, {NULL_TIMESTAMP})"
+
+# Grid column -> how it sorts and filters in SQL. Only these expressions ever
+# reach the query, so nothing the browser sends is interpolated into SQL.
+GRID_COLUMNS = {
+    "Client ID": {"sort": "id", "filter": "id", "type": "number"},
+    "Client Name": {"sort": "COALESCE(fullname, '')", "filter": "fullname", "type": "text"},
+    "Stage": {"sort": "COALESCE(stage::text, '')", "filter": "stage::text", "type": "text"},
+    # "5 minutes ago" sorts before "3 days ago", i.e. newest activity first
+    "Last Activity": {"sort": f"COALESCE(lastactivity, {NULL_TIMESTAMP})", "invert": True},
+    "Created Date": {"sort": CREATED_SORT, "filter": "to_char(created, 'YYYY-MM-DD')", "type": "text"},
+    "Age": {"sort": CREATED_SORT, "invert": True},
+    "Sale Rep": {"sort": "COALESCE(assigned_employee_name, '')", "filter": "assigned_employee_name", "type": "text"},
+}
+
+DEFAULT_SORT = (CREATED_SORT, "desc")
+
+TEXT_OPERATORS = {
+    "contains": ("{col} ILIKE %({p})s", "%{v}%"),
+    "notContains": ("({col} IS NULL OR {col} NOT ILIKE %({p})s)", "%{v}%"),
+    "equals": ("LOWER({col}) = LOWER(%({p})s)", "{v}"),
+    "notEqual": ("({col} IS NULL OR LOWER({col}) <> LOWER(%({p})s))", "{v}"),
+    "startsWith": ("{col} ILIKE %({p})s", "{v}%"),
+    "endsWith": ("{col} ILIKE %({p})s", "%{v}"),
+}
+
+NUMBER_OPERATORS = {
+    "equals": "=",
+    "notEqual": "<>",
+    "lessThan": "<",
+    "lessThanOrEqual": "<=",
+    "greaterThan": ">",
+    "greaterThanOrEqual": ">=",
+}
+
+
+def _escape_like(value):
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def resolve_sort(sort_model):
+    """
+    Translate an AG Grid sort model into a SQL sort expression and direction.
+
+    Only the primary sort column is applied; ``id`` in the same direction is
+    always the tiebreaker so the order is total and usable as a keyset.
+
+    Args:
+        sort_model (list): ``[{"colId": ..., "sort": "asc" | "desc"}, ...]``.
+
+    Returns:
+        tuple: ``(sql_expression, "asc" | "desc")``.
+    """
+    for entry in sort_model or []:
+        spec = GRID_COLUMNS.get(entry.get("colId"))
+        direction = entry.get("sort")
+        if spec is None or direction not in ("asc", "desc"):
+            continue
+        if spec.get("invert"):
+            direction = "asc" if direction == "desc" else "desc"
+        return spec["sort"], direction
+    return DEFAULT_SORT
+
+
+def _condition_sql(column, condition, params):
+    spec = GRID_COLUMNS.get(column)
+    if spec is None or "filter" not in spec:
+        return None
+    col = spec["filter"]
+    op = condition.get("type")
+    if op == "blank":
+        return f"{col} IS NULL" if spec["type"] == "number" else f"COALESCE({col}, '') = ''"
+    if op == "notBlank":
+        return f"{col} IS NOT NULL" if spec["type"] == "number" else f"COALESCE({col}, '') <> ''"
+
+    name = f"f{len(params)}"
+    if spec["type"] == "text" and op in TEXT_OPERATORS and condition.get("filter") not in (None, ""):
+        template, pattern = TEXT_OPERATORS[op]
+        params[name] = pattern.format(v=_escape_like(condition["filter"]))
+        return template.format(col=col, p=name)
+    if spec["type"] == "number":
+        try:
+            value = float(condition.get("filter"))
+        except (TypeError, ValueError):
+            return None
+        if op in NUMBER_OPERATORS:
+            params[name] = value
+            return f"{col} {NUMBER_OPERATORS[op]} %({name})s"
+        if op == "inRange":
+            try:
+                upper = float(condition.get("filterTo"))
+            except (TypeError, ValueError):
+                return None
+            params[name] = value
+            params[f"{name}_to"] = upper
+            return f"{col} BETWEEN %({name})s AND %({name}_to)s"
+    return None
+
+
+def build_filter_clause(filter_model):
+    """
+    Translate an AG Grid filter model into a parameterized WHERE fragment.
+
+    Supports the text and number filters used by the client grid, including
+    combined ``AND``/``OR`` conditions. Unknown columns or operators are ignored.
+
+    Args:
+        filter_model (dict): ``{colId: filter}`` as reported by the grid.
+
+    Returns:
+        tuple: ``(sql, params)``; ``sql`` is ``"TRUE"`` when nothing applies.
+    """
+    params = {}
+    clauses = []
+    for column, model in (filter_model or {}).items():
+        if "conditions" in model:
+            parts = [_condition_sql(column, c, params) for c in model["conditions"]]
+            parts = [p for p in parts if p]
+            if parts:
+                joiner = " OR " if model.get("operator") == "OR" else " AND "
+                clauses.append("(" + joiner.join(parts) + ")")
+        else:
+            part = _condition_sql(column, model, params)
+            if part:
+                clauses.append(part)
+    return (" AND ".join(clauses) if clauses else "TRUE"), params
+
+
+def fetch_client_block(sort_expr, direction, filter_json, cursor=None, limit=GRID_BLOCK_SIZE):
+    """
+    Fetch one block of clients for the grid, sorted and filtered in SQL.
+
+    Blocks are addressed with a keyset cursor on ``(sort_expr, id)`` instead
+    of OFFSET, so every block costs the same regardless of position. Results
+    come from the shared query cache, tagged with the ``client`` table.
+
+    Args:
+        sort_expr (str): Sort expression returned by ``resolve_sort``.
+        direction (str): ``"asc"`` or ``"desc"``.
+        filter_json (str): The grid filter model, JSON-encoded so it can be
+            used as a cache key.
+        cursor (tuple): ``(sort_key, id)`` of the last row of the previous
+            block, or None for the first block.
+        limit (int): Block size.
+
+    Returns:
+        pd.DataFrame: Up to ``limit + 1`` rows; the extra row only signals
+        that a next block exists. Includes a ``sort_key`` column.
+    """
+    allowed = {spec["sort"] for spec in GRID_COLUMNS.values()} | {DEFAULT_SORT[0]}
+    if sort_expr not in allowed or direction not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort: {sort_expr} {direction}")
+
+    where, params = build_filter_clause(json.loads(filter_json))
+    if cursor is not None:
+        comparison = "<" if direction == "desc" else ">"
+        where += f" AND ({sort_expr}, id) {comparison} (%(cursor_key)s, %(cursor_id)s)"
+        params["cursor_key"] = cursor[0]
+        params["cursor_id"] = cursor[1]
+    params["limit"] = limit + 1
+
+    query = f"""
+        SELECT id, fullname, stage, lastactivity, created, assigned_employee_name,
+               {sort_expr} AS sort_key
+        FROM client
+        WHERE {where}
+        ORDER BY {sort_expr} {direction}, id {direction}
+        LIMIT %(limit)s
+    """
+    return cached_read_sql(query, params, tags=["client"], ttl=CLIENT_LIST_TTL)
+
+
+def block_cursor(df):
+    """Return the ``(sort_key, id)`` keyset cursor after the last row of ``df``."""
+    last = df.iloc[-1]
+    key = last["sort_key"]
+    if isinstance(key, pd.Timestamp):
+        key = key.to_pydatetime()
+    elif hasattr(key, "item"):
+        key = key.item()
+    return (key, int(last["id"]))
+
+
+def grid_models(grid_state):
+    """
+    Extract the sort and filter models from an AgGrid ``grid_state``.
+
+    Returns:
+        tuple: ``(sort_model, filter_model)``, empty when the grid has not
+        reported any state yet.
+    """
+    grid_state = grid_state or {}
+    sort_model = (grid_state.get("sort") or {}).get("sortModel") or []
+    filter_model = (grid_state.get("filter") or {}).get("filterModel") or {}
+    return sort_model, filter_model
@@ -0,0 +1,219 @@
+import re
+
+import pandas as pd
+import streamlit as st
+
+from utils.db import get_connection
+from utils.query_cache import cached_read_sql, get_query_cache, row_tag
+
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_RESULTS = 500
+SEARCH_CACHE_TTL = 30
+CLIENT_NAME_TTL = 600
+
+CLIENT_COLUMNS = "id, fullname, stage, lastactivity, created, assigned_employee_name"
+# Extra columns returned by searches so results can be refined locally
+SEARCH_COLUMNS = f"{CLIENT_COLUMNS}, email, phone"
+
+# Trigram path: every ILIKE below is served by a gin_trgm_ops index and the
+# rows are ranked by the best similarity across the searched fields.
+TRGM_QUERY = f"""
+    SELECT {SEARCH_COLUMNS},
+           GREATEST(
+               CASE WHEN id::text = %(term)s THEN 2.0 ELSE 0 END,
+               similarity(fullname, %(term)s),
+               similarity(COALESCE(email, ''), %(term)s),
+               similarity(COALESCE(assigned_employee_name, ''), %(term)s),
+               CASE WHEN %(digits)s <> ''
+                        AND regexp_replace(COALESCE(phone, ''), '\\D', '', 'g') LIKE %(digits_pattern)s
+                    THEN 1.0 ELSE 0 END
+           ) AS score
+    FROM client
+    WHERE id = %(id)s
+       OR fullname ILIKE %(pattern)s
+       OR fullname %% %(term)s
+       OR email ILIKE %(pattern)s
+       OR assigned_employee_name ILIKE %(pattern)s
+       OR (%(digits)s <> '' AND regexp_replace(COALESCE(phone, ''), '\\D', '', 'g') LIKE %(digits_pattern)s)
+    ORDER BY score DESC, created DESC, id DESC
+    LIMIT %(limit)s
+"""
+
+# Fallback when pg_trgm is not installed: same filters, prefix matches first
+PLAIN_QUERY = f"""
+    SELECT {SEARCH_COLUMNS},
+           CASE WHEN id = %(id)s THEN 2
+                WHEN fullname ILIKE %(prefix)s THEN 1
+                ELSE 0 END AS score
+    FROM client
+    WHERE id = %(id)s
+       OR fullname ILIKE %(pattern)s
+       OR email ILIKE %(pattern)s
+       OR assigned_employee_name ILIKE %(pattern)s
+       OR (%(digits)s <> '' AND regexp_replace(COALESCE(phone, ''), '\\D', '', 'g') LIKE %(digits_pattern)s)
+    ORDER BY score DESC, created DESC, id DESC
+    LIMIT %(limit)s
+"""
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_search_params(term, limit):
+    """
+    Build the bind parameters for a client search.
+
+    Args:
+        term (str): The raw text typed by the rep.
+        limit (int): Maximum number of rows to return.
+
+    Returns:
+        dict: Parameters for ``TRGM_QUERY`` / ``PLAIN_QUERY``.
+    """
+    term = term.strip()
+    digits = re.sub(r"\D", "", term)
+    # Only treat the term as a phone fragment when it is mostly digits
+    if len(digits) < 3 or len(digits) < len(re.sub(r"[\s()+.-]", "", term)):
+        digits = ""
+    escaped = _escape_like(term)
+    return {
+        "term": term,
+        "id": int(term) if term.isdigit() and len(term) < 10 else None,
+        "pattern": f"%{escaped}%",
+        "prefix": f"{escaped}%",
+        "digits": digits,
+        "digits_pattern": f"%{digits}%",
+        "limit": limit,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def has_trigram_support():
+    """
+    Return True if the pg_trgm extension is installed in the database.
+
+    Errors propagate instead of returning False: ``st.cache_resource`` only
+    keeps a completed check, so a transient failure is retried on the next
+    search rather than turning trigram ranking off for the whole process.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            return cur.fetchone() is not None
+
+
+def search_query(term, limit, use_trigram=True):
+    """The SQL and bind parameters of a client search, also its query-cache key."""
+    return (TRGM_QUERY if use_trigram else PLAIN_QUERY), build_search_params(term, limit)
+
+
+def query_clients(conn, term, limit, use_trigram=True, timeout_ms=None):
+    """
+    Run a client search on an already borrowed connection.
+
+    Does not touch Streamlit state, so it is safe to call from worker threads.
+    Repeated searches are answered from the shared query cache until a
+    client write or ``SEARCH_CACHE_TTL`` evicts them.
+
+    Args:
+        conn (connection): A psycopg2 connection.
+        term (str): The search text.
+        limit (int): Maximum number of rows to return.
+        use_trigram (bool): Use the pg_trgm ranked query.
+        timeout_ms (int): Optional server-side statement timeout.
+
+    Returns:
+        pd.DataFrame: Matching clients, best match first.
+    """
+    query, params = search_query(term, limit, use_trigram)
+
+    def load():
+        if timeout_ms:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+        return pd.read_sql(query, conn, params=params)
+
+    return get_query_cache().get_or_load(query, params, load, ["client"], SEARCH_CACHE_TTL)
+
+
+def search_clients(term, limit=SEARCH_PAGE_SIZE):
+    """
+    Search clients by id, name, phone, email or assigned rep.
+
+    Args:
+        term (str): The search text.
+        limit (int): Maximum number of rows to return, capped at
+            ``SEARCH_MAX_RESULTS``.
+
+    Returns:
+        pd.DataFrame: Matching clients, best match first, with a ``score`` column.
+    """
+    limit = min(int(limit), SEARCH_MAX_RESULTS)
+    if not term.strip():
+        return pd.DataFrame()
+    use_trigram = has_trigram_support()
+    with get_connection() as conn:
+        return query_clients(conn, term, limit, use_trigram)
+
+
+def can_refine(earlier, term):
+    """
+    True if the plain-query matches of ``term`` are all among those of ``earlier``.
+
+    A longer term only narrows the substring filters, except that it can add
+    an id match ("12" -> "123") or turn the phone clause on, which needs 3
+    digits ("55" -> "555"). Once on, longer digits only narrow it too.
+    Trigram results never qualify: fuzzy matches of the longer term need not
+    be fuzzy matches of the shorter one.
+    """
+    if not term.startswith(earlier):
+        return False
+    params, earlier_params = build_search_params(term, 0), build_search_params(earlier, 0)
+    if params["id"] is not None and params["id"] != earlier_params["id"]:
+        return False
+    return not params["digits"] or bool(earlier_params["digits"])
+
+
+def filter_search_results(df, term):
+    """
+    Narrow an earlier result set to the rows that match a longer term.
+
+    Mirrors the substring filters of the SQL search (id, name, email, rep and
+    phone digits), so results for "smi" can be refined to "smit" locally.
+    Only valid for ``PLAIN_QUERY`` results and when ``can_refine`` allows it.
+
+    Args:
+        df (pd.DataFrame): Rows returned by ``query_clients``.
+        term (str): The refined search text.
+
+    Returns:
+        pd.DataFrame: The matching subset, in the original order.
+    """
+    params = build_search_params(term, 0)
+    needle = params["term"].lower()
+    mask = pd.Series(False, index=df.index)
+    if params["id"] is not None:
+        mask |= df["id"] == params["id"]
+    for column in ("fullname", "email", "assigned_employee_name"):
+        mask |= df[column].fillna("").str.lower().str.contains(needle, regex=False)
+    if params["digits"]:
+        phone_digits = df["phone"].fillna("").astype(str).str.replace(r"\D", "", regex=True)
+        mask |= phone_digits.str.contains(params["digits"], regex=False)
+    return df[mask]
+
+
+def get_client_name(client_id):
+    """
+    A client's full name, from the shared query cache.
+
+    Returns:
+        str or None: The name, or None for an unknown client.
+    """
+    df = cached_read_sql(
+        "SELECT fullname FROM client WHERE id = %(id)s",
+        {"id": int(client_id)},
+        tags=[row_tag("client", int(client_id))],
+        ttl=CLIENT_NAME_TTL,
+    )
+    return None if df.empty else df.iloc[0]["fullname"]
@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import streamlit as st
+from dotenv import load_dotenv
+
+from utils.metrics import record_query, span, start_metrics_server
+
+# Load environment variables
+load_dotenv()
+DB_URL = os.getenv("DATABASE_URL")
+DB_SSLMODE = os.getenv("DATABASE_SSLMODE", "require")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the borrow timeout."""
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that records every statement's duration and row count in utils.metrics."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = super().execute(query, vars)
+            failed = False
+            return result
+        finally:
+            record_query(query, time.perf_counter() - started, max(self.rowcount, 0), failed)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = super().executemany(query, vars_list)
+            failed = False
+            return result
+        finally:
+            record_query(query, time.perf_counter() - started, max(self.rowcount, 0), failed)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily up to ``maxconn``. When every connection is
+    in use, ``getconn`` waits up to ``timeout`` seconds for one to be returned.
+    Idle connections are health-checked before they are handed out and
+    replaced if the server dropped them.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=10.0, sslmode="require"):
+        self.dsn = dsn
+        self.sslmode = sslmode
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._idle = []
+        self._in_use = set()
+        self._connecting = 0
+        self._cond = threading.Condition()
+        self._waits = 0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+        for _ in range(minconn):
+            try:
+                self._idle.append(self._connect())
+            except psycopg2.Error as e:
+                print(f"Error pre-opening pooled connection: {e}")
+                break
+
+    def _connect(self):
+        with span("db.connect"):
+            conn = psycopg2.connect(self.dsn, sslmode=self.sslmode, cursor_factory=TimedCursor)
+        with self._cond:
+            self._opened += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """
+        Borrow a connection from the pool.
+
+        Returns:
+            connection: A healthy psycopg2 connection.
+
+        Raises:
+            PoolTimeout: If the pool is exhausted for longer than the timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn = self._idle.pop()
+                        self._in_use.add(conn)
+                        break
+                    if len(self._in_use) + self._connecting < self.maxconn:
+                        self._connecting += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout}s "
+                            f"({self.maxconn} in use)"
+                        )
+                    self._waits += 1
+                    self._cond.wait(remaining)
+
+            # Health checks and new connections run outside the lock so a slow
+            # round trip or TLS handshake does not block other sessions
+            if conn is not None:
+                if self._is_healthy(conn):
+                    return conn
+                with self._cond:
+                    self._in_use.discard(conn)
+                    self._discard(conn)
+                    self._cond.notify()
+                continue
+
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._connecting -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._connecting -= 1
+                self._in_use.add(conn)
+            return conn
+
+    def putconn(self, conn, close=False):
+        """
+        Return a borrowed connection to the pool.
+
+        Args:
+            conn (connection): The connection obtained from ``getconn``.
+            close (bool): Close the connection instead of keeping it idle.
+        """
+        with self._cond:
+            self._in_use.discard(conn)
+            if close or conn.closed:
+                self._discard(conn)
+            else:
+                # Never hand out a connection with an open transaction
+                try:
+                    conn.rollback()
+                    self._idle.append(conn)
+                except psycopg2.Error:
+                    self._discard(conn)
+            self._cond.notify()
+
+    def stats(self):
+        """Return a snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "max": self.maxconn,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "opened": self._opened,
+                "discarded": self._discarded,
+            }
+
+    def closeall(self):
+        with self._cond:
+            for conn in self._idle:
+                self._discard(conn)
+            self._idle.clear()
+
+
+_pool = None
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """Process-wide connection pool, kept across Streamlit reruns and sessions."""
+    global _pool
+    start_metrics_server()
+    _pool = ConnectionPool(
+        DB_URL,
+        minconn=DB_POOL_MIN,
+        maxconn=DB_POOL_MAX,
+        timeout=DB_POOL_TIMEOUT,
+        sslmode=DB_SSLMODE,
+    )
+    return _pool
+
+
+def current_pool():
+    """The pool if ``get_pool`` already created it, without creating one."""
+    return _pool
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a pooled connection for the duration of a ``with`` block.
+
+    The transaction is rolled back if the block raises; callers commit
+    explicitly on success. Broken connections are dropped from the pool.
+    """
+    pool = get_pool()
+    with span("db.getconn"):
+        conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except psycopg2.OperationalError:
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
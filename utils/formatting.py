@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+MISSING_LABEL = "N/A"
+
+_MINUTE = np.timedelta64(1, "m")
+_UNITS = np.array(["minutes", "hours", "days"])
+
+
+def _relative_labels(timestamps, now, suffix=""):
+    """
+    Bucket ``now - timestamps`` into minutes/hours/days labels without a Python loop.
+
+    Every distinct (value, unit) pair is formatted once and the column is
+    returned as a categorical, so 100k rows cost a few hundred string formats.
+
+    Args:
+        timestamps (pd.Series): tz-aware UTC datetimes, may contain NaT.
+        now (pd.Timestamp): Reference time shared by the whole render.
+        suffix (str): Text appended to every label, e.g. ``" ago"``.
+
+    Returns:
+        pd.Series: Categorical labels such as ``"5 minutes ago"``.
+    """
+    missing = timestamps.isna().to_numpy()
+    minutes = ((now - timestamps) // pd.Timedelta(minutes=1)).to_numpy(dtype="float64", na_value=0)
+    minutes = np.clip(minutes, 0, None).astype(np.int64)
+    hours = minutes // 60
+    days = hours // 24
+
+    unit = np.select([minutes < 60, hours < 24], [0, 1], default=2)
+    value = np.select([unit == 0, unit == 1], [minutes, hours], default=days)
+
+    # One code per distinct label; -1 marks rows without a timestamp
+    key = np.where(missing, -1, value * len(_UNITS) + unit)
+    uniques, codes = np.unique(key, return_inverse=True)
+    labels = [
+        MISSING_LABEL if k < 0 else f"{k // len(_UNITS)} {_UNITS[k % len(_UNITS)]}{suffix}"
+        for k in uniques
+    ]
+    return pd.Series(
+        pd.Categorical.from_codes(codes.reshape(-1), categories=labels),
+        index=timestamps.index,
+    )
+
+
+def _date_labels(timestamps):
+    days = timestamps.dt.normalize()
+    codes, uniques = pd.factorize(days)
+    labels = list(uniques.strftime("%Y-%m-%d"))
+    if (codes < 0).any():
+        labels.append(MISSING_LABEL)
+        codes = np.where(codes < 0, len(labels) - 1, codes)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=timestamps.index)
+
+
+def derive_client_columns(df, now=None):
+    """
+    Add the "Last Activity", "Created Date" and "Age" display columns.
+
+    Args:
+        df (pd.DataFrame): Client rows with ``lastactivity`` and ``created``.
+        now (datetime): Reference time; defaults to the current UTC time.
+            Computed once so every row in a render uses the same instant.
+
+    Returns:
+        pd.DataFrame: ``df`` with parsed timestamps and the derived columns.
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    if now.tzinfo is None:
+        now = now.tz_localize("UTC")
+    df['lastactivity'] = pd.to_datetime(df['lastactivity'], utc=True)
+    df['created'] = pd.to_datetime(df['created'], utc=True)
+    df['Last Activity'] = _relative_labels(df['lastactivity'], now, suffix=" ago")
+    df['Created Date'] = _date_labels(df['created'])
+    df['Age'] = _relative_labels(df['created'], now)
+    return df
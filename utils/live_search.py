@@ -0,0 +1,153 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import psycopg2
+import streamlit as st
+
+from utils.db import get_connection
+from utils.query_cache import get_query_cache
+from utils.client_search import (
+    has_trigram_support,
+    query_clients,
+    search_query,
+    can_refine,
+    filter_search_results,
+    SEARCH_MAX_RESULTS,
+)
+
+SEARCH_DEBOUNCE_MS = 300
+SEARCH_STATEMENT_TIMEOUT_MS = 3000
+SEARCH_POLL_INTERVAL = 0.1
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_executor():
+    """Worker threads that run search queries so the script thread stays interruptible."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="client-search")
+
+
+class LiveSearch:
+    """
+    Per-session search-as-you-type state.
+
+    Keeps a small LRU of recent result sets so refinements of an earlier term
+    ("smi" -> "smit") are answered from memory when the plain (non-trigram)
+    query produced them, and cancels the query that is in flight when
+    Streamlit abandons the script run for a newer keystroke.
+    """
+
+    def __init__(self, cache_size=20):
+        self.cache_size = cache_size
+        self._results = OrderedDict()  # lowered term -> (df, limit requested, refinable)
+        self.queries = 0
+        self.refinements = 0
+        self.cancelled = 0
+
+    def _remember(self, term, df, limit, refinable):
+        self._results[term] = (df, limit, refinable)
+        self._results.move_to_end(term)
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+    def _from_cache(self, term, limit):
+        hit = self._results.get(term)
+        if hit is not None:
+            df, cached_limit, _ = hit
+            if cached_limit >= limit or len(df) < cached_limit:
+                self._results.move_to_end(term)
+                return df.head(limit)
+
+        # Refine the longest complete result set whose term is a prefix of this one
+        best = None
+        for cached_term, (df, cached_limit, refinable) in self._results.items():
+            complete = len(df) < cached_limit
+            if (refinable and complete and can_refine(cached_term, term)
+                    and (best is None or len(cached_term) > len(best))):
+                best = cached_term
+        if best is None:
+            return None
+        df, _, _ = self._results[best]
+        refined = filter_search_results(df, term)
+        # The refined set is complete as well, so it can seed further refinements
+        self._remember(term, refined, len(refined) + 1, refinable=True)
+        self.refinements += 1
+        return refined.head(limit)
+
+    def search(self, term, limit, status=None):
+        """
+        Return search results for ``term``, querying the database only when needed.
+
+        Args:
+            term (str): The search text.
+            limit (int): Maximum number of rows to return.
+            status: Optional ``st.empty()`` placeholder updated while waiting.
+                Each update is a Streamlit checkpoint, so a newer keystroke
+                interrupts the wait and the query is cancelled server-side.
+
+        Returns:
+            pd.DataFrame or None: The results, or None if the query was cancelled
+            or hit the statement timeout.
+        """
+        term = term.strip()
+        limit = min(int(limit), SEARCH_MAX_RESULTS + 1)
+        key = term.lower()
+        cached = self._from_cache(key, limit)
+        if cached is not None:
+            return cached
+
+        use_trigram = has_trigram_support()
+        # Another session may have run this exact search moments ago
+        shared = get_query_cache().get(*search_query(term, limit, use_trigram))
+        if shared is not None:
+            self._remember(key, shared, limit, refinable=not use_trigram)
+            return shared
+
+        executor = get_search_executor()
+        with get_connection() as conn:
+            future = executor.submit(
+                query_clients, conn, term, limit, use_trigram, SEARCH_STATEMENT_TIMEOUT_MS
+            )
+            finished = False
+            try:
+                while True:
+                    try:
+                        df = future.result(timeout=SEARCH_POLL_INTERVAL)
+                        finished = True
+                        break
+                    except FutureTimeout:
+                        if status is not None:
+                            status.caption(f"Searching for “{term}”…")
+            except psycopg2.extensions.QueryCanceledError:
+                finished = True
+                self.cancelled += 1
+                return None
+            except Exception:
+                # The query failed by itself; nothing left to cancel, and the
+                # page reports the error
+                finished = True
+                raise
+            finally:
+                if not finished:
+                    # The script run was interrupted: stop the query on the server
+                    # before the connection goes back to the pool
+                    conn.cancel()
+                    self.cancelled += 1
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+                if status is not None:
+                    status.empty()
+
+        self.queries += 1
+        self._remember(key, df, limit, refinable=not use_trigram)
+        return df
+
+
+def get_live_search():
+    """Return the ``LiveSearch`` for the current session."""
+    if "live_search" not in st.session_state:
+        st.session_state["live_search"] = LiveSearch()
+    return st.session_state["live_search"]
+
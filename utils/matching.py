@@ -0,0 +1,330 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.db import get_connection
+from utils.requirements import AMENITY_OPTIONS
+
+MATCH_TOP_K = 20
+# How far over the top of the budget a unit may be and still be suggested
+BUDGET_SLACK = 0.10
+# Smallest unit, as a share of the requested sqft, that is still suggested
+SQFT_FLOOR = 0.8
+# Window after the move-in date when no max move-in date was given
+MOVE_IN_WINDOW_DAYS = 30
+UNIT_INDEX_TTL = 600
+
+# Unit flag column -> its feature name; amenities keep their own names
+UNIT_FLAGS = {
+    "cats_allowed": "cats_allowed",
+    "dogs_allowed": "dogs_allowed",
+    "parking": "parking_spot",
+    "washer_dryer": "in_unit_washer_dryer",
+}
+# Bit positions of the per-unit feature bitset
+FEATURE_BITS = {name: bit for bit, name in enumerate([*UNIT_FLAGS.values(), *AMENITY_OPTIONS])}
+
+# Pet policy code (PET_OPTIONS) -> features the unit must allow
+PET_REQUIREMENTS = {
+    0: ("cats_allowed", "dogs_allowed"),
+    1: ("cats_allowed",),
+    2: ("dogs_allowed",),
+    3: ("cats_allowed", "dogs_allowed"),
+}
+# Parking codes that mean the client needs a spot (PARKING_OPTIONS)
+PARKING_REQUIRED = {1, 5, 6, 7, 8}
+WASHER_DRYER_REQUIRED = {1}
+
+SCORE_WEIGHTS = {"price": 35, "location": 25, "size": 15, "amenities": 15, "move_in": 10}
+
+UNIT_INVENTORY_QUERY = """
+    SELECT u.id AS unit_id, u.building_id, b.name AS building_name, u.unit_number,
+           u.price, u.beds, u.baths, u.sqft, u.available_date,
+           u.cats_allowed, u.dogs_allowed, u.parking, u.washer_dryer,
+           b.zip, b.neighborhood, b.amenities, u.is_available
+    FROM unit u
+    JOIN building b ON b.id = u.building_id
+"""
+
+
+def _mask(features):
+    bits = 0
+    for feature in features:
+        if feature in FEATURE_BITS:
+            bits |= 1 << FEATURE_BITS[feature]
+    return bits
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(value) else value
+
+
+def _as_list(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [str(part).strip() for part in value if str(part).strip()]
+
+
+class UnitIndex:
+    """
+    Precomputed, read-only indexes over the available unit inventory.
+
+    - ``price`` and ``sqft`` are also kept as sorted arrays so range filters
+      are binary searches instead of a scan;
+    - pets, parking, washer/dryer and amenities are packed into one uint64
+      bitset per unit, so "has everything required" is a single AND;
+    - zip codes and neighborhoods map to arrays of unit positions.
+    """
+
+    def __init__(self, units):
+        self.units = units.reset_index(drop=True)
+        n = len(self.units)
+        self.price = self.units["price"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.beds = self.units["beds"].to_numpy(dtype=np.float64, na_value=0)
+        self.baths = self.units["baths"].to_numpy(dtype=np.float64, na_value=0)
+        self.sqft = self.units["sqft"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.available = pd.to_datetime(self.units["available_date"]).to_numpy(dtype="datetime64[D]")
+
+        # NaN sorts last, so units without a price/size sit at the end
+        self.price_order = np.argsort(self.price, kind="stable")
+        self.price_sorted = self.price[self.price_order]
+        self.sqft_order = np.argsort(self.sqft, kind="stable")
+        self.sqft_sorted = self.sqft[self.sqft_order]
+
+        features = np.zeros(n, dtype=np.uint64)
+        for column, feature in UNIT_FLAGS.items():
+            flags = self.units[column].fillna(False).astype(bool).to_numpy()
+            features[flags] |= np.uint64(1 << FEATURE_BITS[feature])
+        amenity_lists = self.units["amenities"].map(_as_list)
+        for amenity in AMENITY_OPTIONS:
+            has = amenity_lists.map(lambda values: amenity in values).to_numpy(dtype=bool)
+            features[has] |= np.uint64(1 << FEATURE_BITS[amenity])
+        self.features = features
+
+        self.by_zip = self._inverted(self.units["zip"].map(_as_list))
+        self.by_neighborhood = self._inverted(
+            self.units["neighborhood"].map(lambda value: [v.lower() for v in _as_list(value)])
+        )
+
+    @staticmethod
+    def _inverted(values):
+        index = {}
+        for position, keys in enumerate(values):
+            for key in keys:
+                index.setdefault(key, []).append(position)
+        return {key: np.asarray(positions, dtype=np.int64) for key, positions in index.items()}
+
+    def __len__(self):
+        return len(self.units)
+
+    def _location(self, zips, neighborhoods):
+        hits = [self.by_zip[z] for z in zips if z in self.by_zip]
+        hits += [self.by_neighborhood[n.lower()] for n in neighborhoods if n.lower() in self.by_neighborhood]
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits))
+
+    def match(self, requirement, k=MATCH_TOP_K):
+        """
+        Score units against one requirement and return the best ``k``.
+
+        Hard filters: price within the budget (plus ``BUDGET_SLACK``), at
+        least ``SQFT_FLOOR`` of the requested sqft, at least the requested
+        beds and baths, pets/parking/washer-dryer needs, and the requested
+        zips/neighborhoods when ``neighborhood_specific``. Everything else
+        only affects the score.
+
+        Args:
+            requirement (dict or pd.Series): A ``client_requirements`` row.
+            k (int): Number of matches to return.
+
+        Returns:
+            pd.DataFrame: Matching units, best first, with a ``score`` (0-100).
+        """
+        budget_max = max(_float(requirement.get("budget_max")), _float(requirement.get("budget")))
+        beds = _float(requirement.get("beds"))
+        baths = _float(requirement.get("baths"))
+        sqft = _float(requirement.get("sqft"))
+        sqft_max = _float(requirement.get("sqft_max"))
+        zips = _as_list(requirement.get("zip"))
+        neighborhoods = _as_list(requirement.get("neighborhood"))
+        amenities = [a for a in _as_list(requirement.get("amenities")) if a in FEATURE_BITS]
+
+        # Range filters are binary searches over the sorted price/sqft arrays
+        keep = np.zeros(len(self), dtype=bool)
+        if budget_max > 0:
+            hi = np.searchsorted(self.price_sorted, budget_max * (1 + BUDGET_SLACK), side="right")
+            keep[self.price_order[:hi]] = True
+        else:
+            keep[self.price_order[~np.isnan(self.price_sorted)]] = True
+        if sqft > 0:
+            lo = np.searchsorted(self.sqft_sorted, sqft * SQFT_FLOOR, side="left")
+            # Units with an unknown size stay in
+            keep[self.sqft_order[:lo]] = False
+        candidates = np.flatnonzero(keep)
+
+        if requirement.get("neighborhood_specific") and (zips or neighborhoods):
+            candidates = np.intersect1d(candidates, self._location(zips, neighborhoods), assume_unique=True)
+
+        required = _mask(PET_REQUIREMENTS.get(_int(requirement.get("pets"), -1), ()))
+        if _int(requirement.get("parking")) in PARKING_REQUIRED:
+            required |= _mask(["parking_spot"])
+        if _int(requirement.get("washer_dryer")) in WASHER_DRYER_REQUIRED:
+            required |= _mask(["in_unit_washer_dryer"])
+        keep = (self.beds[candidates] >= beds) & (self.baths[candidates] >= baths)
+        if required:
+            required = np.uint64(required)
+            keep &= (self.features[candidates] & required) == required
+        candidates = candidates[keep]
+        if len(candidates) == 0:
+            return self.units.iloc[0:0].assign(score=pd.Series(dtype=float))
+
+        score = self._score(candidates, budget_max, beds, sqft, sqft_max,
+                            zips, neighborhoods, amenities, requirement)
+        top = min(k, len(candidates))
+        best = np.argpartition(-score, top - 1)[:top]
+        # Best score first, cheaper unit first on ties
+        best = best[np.lexsort((self.price[candidates[best]], -score[best]))]
+        result = self.units.iloc[candidates[best]].copy()
+        result["score"] = np.round(score[best], 1)
+        return result
+
+    def _score(self, idx, budget_max, beds, sqft, sqft_max, zips, neighborhoods, amenities, requirement):
+        price = self.price[idx]
+        # Full marks inside the budget, falling to 0 at the end of the slack
+        if budget_max > 0:
+            over = np.clip((price - budget_max) / (budget_max * BUDGET_SLACK), 0, 1)
+            price_score = 1 - over
+        else:
+            price_score = np.ones(len(idx))
+
+        if zips or neighborhoods:
+            location_score = np.isin(idx, self._location(zips, neighborhoods)).astype(float)
+        else:
+            location_score = np.ones(len(idx))
+
+        unit_sqft = np.nan_to_num(self.sqft[idx])
+        size_score = np.where(self.beds[idx] == beds, 0.5, 0.25)
+        if sqft > 0:
+            size_score = size_score + 0.5 * np.clip(unit_sqft / sqft, 0, 1)
+        else:
+            size_score = size_score + 0.5
+        if sqft_max > 0:
+            size_score = np.where(unit_sqft > sqft_max, size_score * 0.75, size_score)
+
+        if amenities:
+            wanted = [np.uint64(1 << FEATURE_BITS[a]) for a in amenities]
+            hits = sum(((self.features[idx] & bit) != 0).astype(float) for bit in wanted)
+            amenity_score = hits / len(wanted)
+        else:
+            amenity_score = np.ones(len(idx))
+
+        move_in = requirement.get("move_in_date")
+        if move_in:
+            move_in = np.datetime64(pd.Timestamp(move_in).date(), "D")
+            latest = requirement.get("move_in_date_max")
+            latest = (np.datetime64(pd.Timestamp(latest).date(), "D") if latest
+                      else move_in + np.timedelta64(MOVE_IN_WINDOW_DAYS, "D"))
+            available = self.available[idx]
+            move_in_score = np.where(np.isnat(available) | (available <= latest), 1.0, 0.0)
+        else:
+            move_in_score = np.ones(len(idx))
+
+        return (
+            SCORE_WEIGHTS["price"] * price_score
+            + SCORE_WEIGHTS["location"] * location_score
+            + SCORE_WEIGHTS["size"] * size_score
+            + SCORE_WEIGHTS["amenities"] * amenity_score
+            + SCORE_WEIGHTS["move_in"] * move_in_score
+        )
+
+    def match_all(self, requirements, k=MATCH_TOP_K):
+        """
+        Match every requirement in a DataFrame.
+
+        Returns:
+            pd.DataFrame: Up to ``k`` rows per requirement, with its
+            ``client_id`` and ``requirement_id`` plus ``rank`` and ``score``.
+        """
+        results = []
+        for requirement in requirements.to_dict("records"):
+            matches = self.match(requirement, k)
+            if matches.empty:
+                continue
+            matches.insert(0, "rank", np.arange(1, len(matches) + 1))
+            matches.insert(0, "requirement_id", requirement.get("id"))
+            matches.insert(0, "client_id", requirement.get("client_id"))
+            results.append(matches)
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results, ignore_index=True)
+
+
+def load_units(conn=None, changed_since=None):
+    """
+    Read the unit inventory with its building's location and amenities.
+
+    Args:
+        conn: Optional open connection.
+        changed_since (datetime): When given, return every unit updated after
+            it, including ones no longer available; otherwise only the
+            available units.
+    """
+    if conn is None:
+        with get_connection() as conn:
+            return load_units(conn, changed_since)
+    if changed_since is None:
+        return pd.read_sql(UNIT_INVENTORY_QUERY + " WHERE u.is_available", conn)
+    return pd.read_sql(UNIT_INVENTORY_QUERY + " WHERE u.updated_at > %(since)s", conn,
+                       params={"since": changed_since})
+
+
+@st.cache_resource(ttl=UNIT_INDEX_TTL, show_spinner="Indexing available units...")
+def get_unit_index():
+    """Process-wide ``UnitIndex``, rebuilt from the database every ``UNIT_INDEX_TTL`` seconds."""
+    return UnitIndex(load_units())
+
+
+def load_open_requirements(conn=None, changed_since=None):
+    """
+    Latest requirement per client, for clients whose move-in window has not passed.
+
+    Args:
+        conn: Optional open connection.
+        changed_since (datetime): When given, only clients with a requirement
+            row added or edited after it.
+
+    Returns:
+        pd.DataFrame: One ``client_requirements`` row per client.
+    """
+    query = """
+        SELECT * FROM (
+            SELECT DISTINCT ON (client_id) *
+            FROM client_requirements
+            ORDER BY client_id, id DESC
+        ) latest
+        WHERE COALESCE(move_in_date_max, move_in_date + %(window)s) >= %(today)s
+    """
+    params = {"window": MOVE_IN_WINDOW_DAYS, "today": date.today()}
+    if changed_since is not None:
+        query += " AND client_id IN (SELECT client_id FROM client_requirements WHERE updated_at > %(since)s)"
+        params["since"] = changed_since
+    if conn is None:
+        with get_connection() as conn:
+            return pd.read_sql(query, conn, params=params)
+    return pd.read_sql(query, conn, params=params)
@@ -0,0 +1,360 @@
+"""
+In-process timing of database calls and page render phases.
+
+Wrap a phase in ``span`` (or decorate a function with ``timed``) and its
+duration, row count and payload size are aggregated per span name. Every
+query run through a pooled connection is recorded automatically (see
+``TimedCursor`` in utils/db.py), keyed by its normalized SQL.
+
+Each name keeps a Prometheus-style cumulative histogram plus a window of
+recent samples for p50/p95/p99. ``prometheus_text`` renders everything in
+the Prometheus text exposition format; set ``METRICS_PORT`` to also serve it
+at ``http://127.0.0.1:<port>/metrics`` (``METRICS_HOST`` to bind elsewhere). pages/Metrics.py shows the slowest spans
+and queries.
+
+The registry is a module-level singleton rather than an ``st.cache_resource``
+so the pool, background threads and command-line jobs can record into it
+without a Streamlit script context.
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# The endpoint has no authentication; only expose it beyond this host on purpose
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Upper bounds in seconds of the exported histogram buckets
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Recent samples per name used for percentiles
+METRICS_WINDOW = 1000
+# Individual slowest spans kept for the admin page
+METRICS_SLOWEST = 50
+# Distinct span names and query templates each; later ones are counted under OVERFLOW_KEY
+METRICS_MAX_SERIES = 500
+OVERFLOW_KEY = "(other)"
+QUERY_TEXT_LIMIT = 300
+
+_WHITESPACE = re.compile(r"\s+")
+# Values inlined by mogrify (e.g. execute_values) become placeholders, so each
+# query template is one series and no client data reaches the metrics
+_STRING_LITERAL = re.compile(r"(?:\b[EeBbXxUu]&?)?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER_RUN = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROW_RUN = re.compile(r"\([^()]*\)(?:\s*,\s*\([^()]*\))+")
+_current = threading.local()
+
+
+def normalize_sql(sql):
+    """
+    One-line SQL template used as a query's metric key.
+
+    Literals become ``?``, and lists of them (``IN``, ``ARRAY``, the rows of
+    a ``VALUES`` list) collapse to one entry, so a statement batched with
+    ``execute_values`` keys the same whatever rows it carried. Truncated for
+    display.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _STRING_LITERAL.sub("?", str(sql))
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _PLACEHOLDER_RUN.sub("?", sql)
+    sql = _ROW_RUN.sub(lambda match: match.group(0).split("),", 1)[0] + ")", sql)
+    return sql if len(sql) <= QUERY_TEXT_LIMIT else sql[:QUERY_TEXT_LIMIT - 1] + "…"
+
+
+class _Series:
+    """Counters and recent samples for one span name or query."""
+
+    __slots__ = ("count", "errors", "total", "max", "rows", "bytes", "buckets", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(METRICS_BUCKETS)
+        self.recent = deque(maxlen=METRICS_WINDOW)
+
+    def add(self, seconds, rows, size, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows or 0
+        self.bytes += size or 0
+        for i, bound in enumerate(METRICS_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        self.recent.append(seconds)
+
+    def summary(self):
+        p50, p95, p99 = (
+            np.percentile(np.fromiter(self.recent, float), [50, 95, 99]).tolist() if self.recent else (0.0,) * 3
+        )
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+            "max_ms": self.max * 1000,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+class Span:
+    """One timed phase; set ``rows`` and ``bytes`` before it ends."""
+
+    __slots__ = ("name", "detail", "parent", "rows", "bytes", "started", "seconds")
+
+    def __init__(self, name, detail=None, parent=None):
+        self.name = name
+        self.detail = detail
+        self.parent = parent
+        self.rows = None
+        self.bytes = None
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def record(self, rows=None, size=None):
+        if rows is not None:
+            self.rows = rows
+        if size is not None:
+            self.bytes = size
+
+
+class Metrics:
+    """Thread-safe registry of span and query timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}  # name -> _Series
+        self._queries = {}  # normalized SQL -> _Series
+        self._slowest = []  # min-heap of (seconds, seq, record)
+        self._seq = 0
+        self.started_at = time.time()
+        self.reset_at = self.started_at
+
+    def observe(self, name, seconds, rows=None, size=None, detail=None, parent=None, failed=False, query=False):
+        """Record one finished span (``query=True`` files it under queries, keyed by ``detail``)."""
+        with self._lock:
+            series = self._queries if query else self._spans
+            key = detail if query else name
+            if key not in series and len(series) >= METRICS_MAX_SERIES:
+                key = OVERFLOW_KEY
+            series.setdefault(key, _Series()).add(seconds, rows, size, failed)
+            self._seq += 1
+            record = {
+                "at": time.time(),
+                "span": name,
+                "ms": seconds * 1000,
+                "rows": rows,
+                "bytes": size,
+                "detail": detail,
+                "parent": parent,
+                "failed": failed,
+            }
+            if len(self._slowest) < METRICS_SLOWEST:
+                heapq.heappush(self._slowest, (seconds, self._seq, record))
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (seconds, self._seq, record))
+
+    def spans(self):
+        """Per-name summaries, slowest p95 first."""
+        with self._lock:
+            rows = [{"span": name, **series.summary()} for name, series in self._spans.items()]
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def queries(self):
+        """Per-query summaries, most total time first."""
+        with self._lock:
+            rows = [
+                {"query": sql, "total_ms": series.total * 1000, **series.summary()}
+                for sql, series in self._queries.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def slowest(self):
+        """The slowest individual spans and queries seen, slowest first."""
+        with self._lock:
+            return [record for _, _, record in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._queries.clear()
+            self._slowest.clear()
+            self.reset_at = time.time()
+
+    def prometheus_text(self, gauges=None):
+        """
+        All series in the Prometheus text exposition format.
+
+        Args:
+            gauges (dict): Extra ``name -> value`` gauges to append, e.g.
+                connection pool and outbox stats.
+        """
+        with self._lock:
+            families = [
+                ("app_span_seconds", "span", self._spans),
+                ("app_query_seconds", "query", self._queries),
+            ]
+            lines = []
+            for metric, label, series_by_key in families:
+                lines.append(f"# TYPE {metric} histogram")
+                for key, series in sorted(series_by_key.items()):
+                    labels = f'{label}="{_escape_label(key)}"'
+                    for bound, count in zip(METRICS_BUCKETS, series.buckets):
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {series.count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {series.total:.6f}")
+                    lines.append(f"{metric}_count{{{labels}}} {series.count}")
+            for metric, label, series_by_key in families:
+                base = metric.rsplit("_", 1)[0]
+                for suffix, attr in (("errors_total", "errors"), ("rows_total", "rows"), ("bytes_total", "bytes")):
+                    lines.append(f"# TYPE {base}_{suffix} counter")
+                    for key, series in sorted(series_by_key.items()):
+                        lines.append(f'{base}_{suffix}{{{label}="{_escape_label(key)}"}} {getattr(series, attr)}')
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+METRICS = Metrics()
+
+
+def get_metrics():
+    """Process-wide ``Metrics`` registry."""
+    return METRICS
+
+
+@contextmanager
+def span(name, detail=None):
+    """
+    Time a block as span ``name``.
+
+    Yields the ``Span``; call ``record(rows=..., size=...)`` on it to attach a
+    row count and payload size in bytes. Spans nest per thread, and each
+    records the span it ran inside.
+
+    Example:
+        with span("client_list.fetch") as s:
+            df = fetch(...)
+            s.record(rows=len(df))
+    """
+    parent = getattr(_current, "span", None)
+    current = Span(name, detail, parent.name if parent else None)
+    _current.span = current
+    failed = False
+    try:
+        yield current
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _current.span = parent
+        current.seconds = time.perf_counter() - current.started
+        METRICS.observe(
+            name, current.seconds, current.rows, current.bytes, detail, current.parent, failed,
+        )
+
+
+def timed(name=None):
+    """Decorator form of ``span``; defaults to the function's qualified name."""
+    def decorate(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_query(sql, seconds, rows=None, failed=False):
+    """Record one database statement; called by the pool's cursors."""
+    parent = getattr(_current, "span", None)
+    METRICS.observe(
+        "db.query", seconds, rows, None, normalize_sql(sql), parent.name if parent else None, failed, query=True,
+    )
+
+
+def dataframe_bytes(df):
+    """In-memory size of a DataFrame, for a span's ``size``."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.prometheus_text(system_gauges()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve ``/metrics`` on ``host:port`` from a daemon thread (once per process; port 0 disables)."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Error starting metrics server on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+def system_gauges():
+    """Connection pool, outbox and query cache stats as Prometheus gauges (those already created)."""
+    gauges = {"app_uptime_seconds": time.time() - METRICS.started_at}
+    from utils.db import current_pool
+    from utils.outbox import current_outbox
+    from utils.query_cache import get_query_cache
+
+    pool = current_pool()
+    if pool is not None:
+        for key, value in pool.stats().items():
+            gauges[f"app_db_pool_{key}"] = value
+    outbox = current_outbox()
+    if outbox is not None:
+        for key, value in outbox.stats().items():
+            if isinstance(value, (int, float)):
+                gauges[f"app_outbox_{key}"] = value
+    for key, value in get_query_cache().stats().items():
+        gauges[f"app_query_cache_{key}"] = value
+    return gauges
@@ -0,0 +1,376 @@
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+
+import psycopg2
+import streamlit as st
+
+from utils.db import get_pool
+from utils.metrics import get_metrics
+from utils.query_cache import get_query_cache
+
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.sqlite3")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = 2.0
+OUTBOX_MAX_BACKOFF = 60.0
+# Rows that keep failing for reasons other than the database being down are
+# parked as 'dead' after this many attempts so they stop blocking the queue
+OUTBOX_MAX_ATTEMPTS = 10
+
+# Write kind -> "module:function" applying one payload on a Postgres connection.
+# Resolved lazily so the drainer can replay kinds whose page was never opened.
+HANDLERS = {
+    "tour": "utils.schedules:apply_tour",
+    "client_requirement": "utils.requirements:apply_requirement",
+    "revenue": "utils.revenue:apply_revenue",
+}
+
+# Write kind -> tables it changes for the payload's client; their cached
+# reads (utils/query_cache.py) are evicted once the write is committed
+WRITE_TABLES = {
+    "tour": ("tour", "client_schedule"),
+    "client_requirement": ("client_requirements", "client_availability"),
+    "revenue": ("revenue", "revenue_rollup"),
+}
+
+LEGACY_SCHEDULES_PATH = "client_schedules.json"
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime, date, dtime)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return str(o)
+        return super().default(o)
+
+
+def write_key(kind, client_id):
+    """Writes sharing this key are replayed in the order they were queued."""
+    # Client ids arrive as ints or strings depending on the page
+    return kind, None if client_id is None else str(client_id)
+
+
+def _resolve(kind):
+    module_name, func_name = HANDLERS[kind].split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+class Outbox:
+    """
+    Durable local queue for database writes.
+
+    Pages enqueue a write into SQLite (WAL, synchronous=FULL) and return at
+    once. A background thread replays pending writes into Postgres in batches,
+    recording each idempotency key in ``outbox_applied`` in the same
+    transaction, so a write is applied exactly once even if the process dies
+    between the Postgres commit and the local delete.
+    """
+
+    def __init__(self, path=OUTBOX_PATH, pool=None, batch_size=OUTBOX_BATCH_SIZE):
+        self.path = path
+        self.pool = pool
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.backoff = 0.0
+        self.last_error = None
+        self.applied = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idem_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT
+            )
+        """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_pending_idx ON outbox (status, next_attempt_at, id)"
+        )
+
+    def enqueue(self, kind, payload, idem_key=None):
+        """
+        Durably queue a write.
+
+        Args:
+            kind (str): One of ``HANDLERS``.
+            payload (dict): JSON-serializable data for the handler; dates and
+                times are stored as ISO strings.
+            idem_key (str): Optional idempotency key; re-enqueueing the same
+                key is a no-op. Generated when omitted.
+
+        Returns:
+            str: The idempotency key.
+        """
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown outbox kind: {kind}")
+        idem_key = idem_key or str(uuid.uuid4())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO outbox (idem_key, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (idem_key, kind, json.dumps(payload, cls=_Encoder), time.time()),
+            )
+        self._wake.set()
+        return idem_key
+
+    def depth(self):
+        """Number of writes still waiting to reach Postgres."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def depth_for(self, kind, client_id):
+        """Number of writes of ``kind`` for ``client_id`` still waiting to reach Postgres."""
+        with self._lock:
+            return self._db.execute(
+                """
+                SELECT COUNT(*) FROM outbox
+                WHERE status = 'pending' AND kind = ?
+                  AND CAST(json_extract(payload, '$.client_id') AS TEXT) = ?
+                """,
+                (kind, str(client_id)),
+            ).fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            oldest = self._db.execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0),
+            "dead": counts.get("dead", 0),
+            "oldest_pending_age": time.time() - oldest if oldest else 0.0,
+            "applied": self.applied,
+            "backoff": self.backoff,
+            "last_error": self.last_error,
+        }
+
+    def _next_batch(self):
+        """
+        Due pending writes, oldest first, plus the writes still backing off.
+
+        Returns:
+            tuple: ``(batch, waiting)``; ``waiting`` maps ``write_key`` to the
+            id of the oldest write of that key waiting for a retry.
+        """
+        now = time.time()
+        with self._lock:
+            batch = self._db.execute(
+                """
+                SELECT id, idem_key, kind, payload, attempts FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (now, self.batch_size),
+            ).fetchall()
+            waiting = self._db.execute(
+                """
+                SELECT kind, json_extract(payload, '$.client_id'), MIN(id) FROM outbox
+                WHERE status = 'pending' AND next_attempt_at > ?
+                GROUP BY 1, 2
+                """,
+                (now,),
+            ).fetchall()
+        return batch, {write_key(kind, client_id): first_id for kind, client_id, first_id in waiting}
+
+    def drain_once(self):
+        """
+        Replay one batch of pending writes into Postgres.
+
+        Writes of one kind for one client are applied in the order they were
+        queued: once one fails (here or in an earlier drain, still waiting for
+        its retry), the later ones wait behind it. Handlers write only the
+        changed fields, so replaying an older write after a newer one would
+        bring back the old values.
+
+        Returns:
+            int: Number of writes applied (or found already applied).
+
+        Raises:
+            psycopg2.OperationalError: If Postgres is unreachable; nothing in
+                the batch is marked as done.
+        """
+        batch, blocked = self._next_batch()
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        done, failed, written = [], [], []
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            with conn.cursor() as cur:
+                for row_id, idem_key, kind, payload, attempts in batch:
+                    values = json.loads(payload)
+                    key = write_key(kind, values.get("client_id"))
+                    if blocked.get(key, row_id) < row_id:
+                        continue
+                    cur.execute("SAVEPOINT outbox_row")
+                    try:
+                        cur.execute(
+                            """
+                            INSERT INTO outbox_applied (idem_key, kind) VALUES (%s, %s)
+                            ON CONFLICT (idem_key) DO NOTHING
+                            """,
+                            (idem_key, kind),
+                        )
+                        # rowcount 0: applied by an earlier run that died before the local delete
+                        if cur.rowcount:
+                            _resolve(kind)(conn, values, idem_key)
+                            written.append((kind, values.get("client_id")))
+                        cur.execute("RELEASE SAVEPOINT outbox_row")
+                        done.append(row_id)
+                    except psycopg2.extensions.QueryCanceledError as e:
+                        # A statement timeout (an OperationalError too): this row is
+                        # slow, the database is up, so only the row fails
+                        cur.execute("ROLLBACK TO SAVEPOINT outbox_row")
+                        failed.append((row_id, attempts + 1, f"{type(e).__name__}: {e}"))
+                        blocked.setdefault(key, row_id)
+                    except psycopg2.OperationalError:
+                        raise
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT outbox_row")
+                        failed.append((row_id, attempts + 1, f"{type(e).__name__}: {e}"))
+                        blocked.setdefault(key, row_id)
+            conn.commit()
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        finally:
+            self.pool.putconn(conn, close=broken)
+
+        # Before the local delete, so a page that sees the queue empty never
+        # reads the pre-save value back from the cache
+        cache = get_query_cache()
+        for kind, client_id in written:
+            for table in WRITE_TABLES.get(kind, ()):
+                cache.invalidate(table, None if client_id is None else [client_id])
+
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in done])
+            for row_id, attempts, error in failed:
+                status = "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+                self._db.execute(
+                    """
+                    UPDATE outbox SET attempts = ?, last_error = ?, status = ?, next_attempt_at = ?
+                    WHERE id = ?
+                    """,
+                    (attempts, error, status, now + min(2 ** attempts, 300), row_id),
+                )
+            self._db.execute("COMMIT")
+        self.applied += len(done)
+        if failed:
+            self.last_error = failed[-1][2]
+        get_metrics().observe("outbox.drain", time.perf_counter() - started, rows=len(done))
+        return len(done)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                drained = self.drain_once()
+                self.backoff = 0.0
+            except Exception as e:
+                # Postgres is down (or the pool is exhausted): back off exponentially
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.backoff = min(max(self.backoff * 2, 1.0), OUTBOX_MAX_BACKOFF)
+                print(f"Outbox drain failed, retrying in {self.backoff:.0f}s: {e}")
+                self._stop.wait(self.backoff)
+                continue
+            if drained < self.batch_size:
+                self._wake.wait(OUTBOX_POLL_INTERVAL)
+                self._wake.clear()
+
+    def wake(self):
+        """Ask the drainer to run now instead of at its next poll."""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def import_legacy_schedules(self, path=LEGACY_SCHEDULES_PATH):
+        """
+        Queue the records of the old ``client_schedules.json`` fallback file.
+
+        Each line's idempotency key is derived from its content, so running the
+        import twice never queues a record twice. The file is renamed once done.
+
+        Returns:
+            int: Number of records read from the file.
+        """
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        with open(path) as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial line from an interleaved write; nothing to recover
+                    continue
+                self.enqueue(
+                    "tour",
+                    {
+                        "client_id": record.get("client_id"),
+                        "close_confidence": record.get("close_confidence"),
+                        "buildings": record.get("buildings") or [],
+                    },
+                    idem_key=f"legacy-{uuid.uuid5(uuid.NAMESPACE_OID, line)}",
+                )
+                count += 1
+        os.replace(path, f"{path}.imported")
+        return count
+
+
+_outbox = None
+
+
+@st.cache_resource(show_spinner=False)
+def get_outbox():
+    """Process-wide outbox with its drainer thread already running."""
+    global _outbox
+    outbox = _outbox = Outbox(pool=get_pool())
+    try:
+        outbox.import_legacy_schedules()
+    except Exception as e:
+        print(f"Error importing {LEGACY_SCHEDULES_PATH}: {e}")
+    outbox.start()
+    return outbox
+
+
+def current_outbox():
+    """The outbox if ``get_outbox`` already created it, without creating one."""
+    return _outbox
+
+
+def show_pending_writes():
+    """Sidebar note on pages that save through the outbox, while writes wait to sync."""
+    # Saves are queued locally first; show how many are still waiting for the database
+    pending_writes = get_outbox().depth()
+    if pending_writes:
+        st.sidebar.caption(f"⏳ {pending_writes} saved entries waiting to sync to the database")
@@ -0,0 +1,232 @@
+"""
+Shared read-through cache for query results, invalidated by the writes.
+
+Entries are keyed by normalized SQL plus bind parameters and tagged with the
+tables they read. A tag is either a table name, for reads spanning the
+table, or ``row_tag(table, key)``, for reads of one client's rows. Every
+write path evicts what it touched once its transaction commits:
+
+- the outbox drainer, per applied write (utils/outbox.py: WRITE_TABLES);
+- the bulk import, for the whole target table.
+
+``invalidate("client_requirements", [42])`` therefore drops the queries
+spanning ``client_requirements`` and client 42's own reads, while client
+43's cached requirements and every ``client`` query stay. The LRU is bounded
+by ``QUERY_CACHE_SIZE`` entries and each entry expires after its TTL, which
+also bounds staleness from writes made by other processes.
+
+Like utils/metrics.py this is a module-level singleton, because the outbox
+drainer invalidates from its own thread.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.db import get_connection
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "60"))
+
+_MISS = object()
+_WHITESPACE = re.compile(r"\s+")
+
+
+def row_tag(table, key):
+    """Tag for reads limited to one key (e.g. one client) of ``table``."""
+    return f"{table}:{key}"
+
+
+def _table(tag):
+    return tag.split(":", 1)[0]
+
+
+def _normalize(sql):
+    # The full text: unlike utils.metrics.normalize_sql, never truncated, so
+    # queries differing only late in the text (e.g. in ORDER BY) stay apart
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    return _WHITESPACE.sub(" ", str(sql)).strip()
+
+
+def _freeze(params):
+    if isinstance(params, dict):
+        return tuple(sorted((key, _freeze(value)) for key, value in params.items()))
+    if isinstance(params, (list, tuple, set, frozenset)):
+        return tuple(_freeze(value) for value in params)
+    return params
+
+
+def _copy(value):
+    # Callers may add columns or drop rows; never hand out the cached object
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class QueryCache:
+    """Thread-safe LRU of query results with per-entry TTL and tag invalidation."""
+
+    def __init__(self, max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires at, tags)
+        self._tagged = {}  # tag -> set of keys
+        # Bumped by every invalidation of a table; a load that overlapped one
+        # is returned to its caller but not stored
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(sql, params=None):
+        return _normalize(sql), _freeze(params)
+
+    def get(self, sql, params=None):
+        """Cached result for the query, or None when absent or expired."""
+        # A peek; the miss is counted by the get_or_load that usually follows
+        value = self._lookup(self.key(sql, params), count_miss=False)
+        return None if value is _MISS else _copy(value)
+
+    def _lookup(self, key, count_miss=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += count_miss
+                return _MISS
+            value = entry[0]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_or_load(self, sql, params, loader, tags, ttl=None):
+        """
+        Return the cached result of a query, running ``loader()`` on a miss.
+
+        Args:
+            sql (str): Query text; whitespace differences don't matter.
+            params: Bind parameters (dict or sequence), part of the key.
+            loader (callable): Runs the query and returns its result.
+            tags (iterable): Table names or ``row_tag`` values the query reads.
+            ttl (float): Seconds to keep the result; ``self.ttl`` by default.
+
+        Returns:
+            A copy of the result, so callers can modify it freely.
+        """
+        key = self.key(sql, params)
+        value = self._lookup(key)
+        if value is not _MISS:
+            return _copy(value)
+        tags = frozenset(tags)
+        with self._lock:
+            generations = {_table(tag): self._generations.get(_table(tag), 0) for tag in tags}
+        value = loader()
+        with self._lock:
+            if all(self._generations.get(table, 0) == generation for table, generation in generations.items()):
+                self._remove(key)
+                self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl), tags)
+                for tag in tags:
+                    self._tagged.setdefault(tag, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return _copy(value)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def invalidate(self, table, keys=None):
+        """
+        Drop cached reads of ``table`` after a write.
+
+        Args:
+            table (str): Table written to.
+            keys (iterable): Keys of the rows written (e.g. client ids). Only
+                those keys' reads and the table-wide reads are dropped; every
+                read of the table when None.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            if keys is None:
+                tags = [tag for tag in self._tagged if _table(tag) == table]
+            else:
+                tags = [table, *(row_tag(table, key) for key in keys)]
+            dropped = set()
+            for tag in tags:
+                dropped |= self._tagged.get(tag, set())
+            for key in dropped:
+                self._remove(key)
+            self.invalidations += len(dropped)
+            return len(dropped)
+
+    def clear(self):
+        with self._lock:
+            for table in {_table(tag) for tag in self._tagged}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+            self._tagged.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+QUERY_CACHE = QueryCache()
+
+
+def get_query_cache():
+    """Process-wide ``QueryCache``."""
+    return QUERY_CACHE
+
+
+def cached_read_sql(sql, params=None, tags=(), ttl=None, conn=None):
+    """
+    ``pd.read_sql`` through the shared cache.
+
+    Args:
+        sql (str): Query text.
+        params: Bind parameters.
+        tags (iterable): Tables (or ``row_tag`` values) the query reads.
+        ttl (float): Seconds to keep the result.
+        conn (connection): Connection to use on a miss; a pooled one is
+            borrowed when None.
+
+    Returns:
+        pd.DataFrame: The query result (a copy).
+    """
+    def load():
+        if conn is not None:
+            return pd.read_sql(sql, conn, params=params)
+        with get_connection() as pooled:
+            return pd.read_sql(sql, pooled, params=params)
+
+    return QUERY_CACHE.get_or_load(sql, params, load, tags, ttl)
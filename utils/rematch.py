@@ -0,0 +1,269 @@
+"""
+Nightly re-matching of open client requirements against the unit inventory.
+
+Each run only reads what changed since the previous run's watermark:
+
+- clients whose requirements were added or edited are rescored against the
+  whole available inventory and their suggestions replaced;
+- every other open client is rescored against the changed units only, and
+  those scores are merged into the suggestions already stored (a unit's
+  score does not depend on any other unit, so the merge is exact);
+- suggestions for clients whose move-in window has passed are dropped.
+
+A unit counts as changed when its own row or its building's zip,
+neighborhood or amenities are updated (sql/013 touches the building's units).
+
+Scoring runs in a process pool: each worker builds its ``UnitIndex`` once and
+scores chunks of requirements. Results land in ``match_result`` (see
+sql/008_match_results.sql), which pages/Building_Matches.py reads directly.
+
+A changed unit can push a stored suggestion out of the top K but never pull
+one in that was ranked below K before, so clients may briefly hold fewer than
+K suggestions; ``--full`` rescores everything.
+
+Usage:
+    python -m utils.rematch [--full] [--workers 4] [--top-k 20]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from utils.db import get_connection
+from utils.matching import MATCH_TOP_K, MOVE_IN_WINDOW_DAYS, UnitIndex, load_open_requirements, load_units
+
+REMATCH_JOB = "nightly"
+REMATCH_CHUNK_SIZE = 500
+REMATCH_WORKERS = int(os.getenv("REMATCH_WORKERS", str(os.cpu_count() or 1)))
+# Re-read rows touched shortly before the last watermark, in case their
+# transaction committed after the previous run read the table
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+RESULT_COLUMNS = ["client_id", "unit_id", "requirement_id", "rank", "score"]
+
+# Per-worker indexes, built once by _init_worker
+_indexes = {}
+
+
+def _init_worker(units, changed_units):
+    _indexes["full"] = UnitIndex(units) if units is not None else None
+    _indexes["changed"] = UnitIndex(changed_units) if changed_units is not None else None
+
+
+def _score_chunk(which, requirements, k):
+    matches = _indexes[which].match_all(requirements, k)
+    if matches.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return matches[RESULT_COLUMNS]
+
+
+def _chunks(df, size):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def _score(pool, which, requirements, k):
+    if requirements.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    futures = [pool.submit(_score_chunk, which, chunk, k) for chunk in _chunks(requirements, REMATCH_CHUNK_SIZE)]
+    return pd.concat([future.result() for future in futures], ignore_index=True)
+
+
+def _rows(df):
+    return [
+        (int(r.client_id), int(r.unit_id), int(r.requirement_id), int(r.rank), float(r.score))
+        for r in df.itertuples(index=False)
+    ]
+
+
+def _insert(cur, results):
+    if results.empty:
+        return
+    execute_values(
+        cur,
+        """
+        INSERT INTO match_result (client_id, unit_id, requirement_id, rank, score)
+        VALUES %s
+        ON CONFLICT (client_id, unit_id) DO UPDATE SET
+            requirement_id = EXCLUDED.requirement_id,
+            rank = EXCLUDED.rank,
+            score = EXCLUDED.score,
+            computed_at = NOW()
+        """,
+        _rows(results),
+        page_size=1000,
+    )
+
+
+def rematch(full=False, workers=REMATCH_WORKERS, k=MATCH_TOP_K, log=print):
+    """
+    Run one incremental (or full) re-match.
+
+    Args:
+        full (bool): Ignore the watermark and rescore every open requirement.
+        workers (int): Size of the scoring process pool.
+        k (int): Suggestions kept per client.
+        log (callable): Progress messages.
+
+    Returns:
+        dict: Counts of rescored clients, changed units and written rows.
+    """
+    started = time.perf_counter()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT NOW()")
+            run_at = cur.fetchone()[0]
+            cur.execute(
+                "SELECT requirements_at, units_at FROM match_watermark WHERE job = %s",
+                (REMATCH_JOB,),
+            )
+            watermark = None if full else cur.fetchone()
+
+        units = load_units(conn)
+        if watermark is None:
+            log("No watermark (or --full): rescoring every open requirement")
+            changed_requirements = load_open_requirements(conn)
+            changed_units = units.iloc[0:0]
+            delta_requirements = changed_requirements.iloc[0:0]
+        else:
+            requirements_at, units_at = watermark
+            changed_requirements = load_open_requirements(conn, requirements_at - WATERMARK_OVERLAP)
+            changed_units = load_units(conn, units_at - WATERMARK_OVERLAP)
+            delta_requirements = pd.DataFrame()
+            if not changed_units.empty:
+                delta_requirements = load_open_requirements(conn)
+                delta_requirements = delta_requirements[
+                    ~delta_requirements["client_id"].isin(changed_requirements["client_id"])
+                ]
+        log(
+            f"{len(units):,} available units; {len(changed_requirements):,} changed requirements; "
+            f"{len(changed_units):,} changed units to merge into {len(delta_requirements):,} clients"
+        )
+
+        available_changes = changed_units[changed_units["is_available"].fillna(False).astype(bool)]
+        with ProcessPoolExecutor(
+            max_workers=max(workers, 1),
+            initializer=_init_worker,
+            initargs=(
+                units if not changed_requirements.empty else None,
+                available_changes if not delta_requirements.empty else None,
+            ),
+        ) as pool:
+            rescored = _score(pool, "full", changed_requirements, k)
+            delta = _score(pool, "changed", delta_requirements, k)
+        log(f"Scored in {time.perf_counter() - started:.1f}s")
+
+        with conn.cursor() as cur:
+            if watermark is None:
+                cur.execute("TRUNCATE match_result")
+            else:
+                # Changed clients get a fresh list; changed units are rescored everywhere
+                cur.execute(
+                    "DELETE FROM match_result WHERE client_id = ANY(%s) OR unit_id = ANY(%s)",
+                    (
+                        [int(c) for c in changed_requirements["client_id"]],
+                        [int(u) for u in changed_units["unit_id"]],
+                    ),
+                )
+                # Clients whose move-in window closed (or whose requirements went away)
+                cur.execute(
+                    """
+                    DELETE FROM match_result m
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM client_requirements r
+                        WHERE r.id = m.requirement_id
+                          AND COALESCE(r.move_in_date_max, r.move_in_date + %s) >= %s
+                    )
+                    """,
+                    (MOVE_IN_WINDOW_DAYS, run_at.date()),
+                )
+            _insert(cur, rescored)
+            _insert(cur, delta)
+            if not delta.empty:
+                # Re-rank the merged lists and keep the best k per client
+                cur.execute(
+                    """
+                    WITH ranked AS (
+                        SELECT client_id, unit_id,
+                               ROW_NUMBER() OVER (PARTITION BY client_id ORDER BY score DESC, unit_id) AS new_rank
+                        FROM match_result
+                        WHERE client_id = ANY(%(clients)s)
+                    ),
+                    trimmed AS (
+                        DELETE FROM match_result m USING ranked
+                        WHERE m.client_id = ranked.client_id AND m.unit_id = ranked.unit_id
+                          AND ranked.new_rank > %(k)s
+                    )
+                    UPDATE match_result m SET rank = ranked.new_rank
+                    FROM ranked
+                    WHERE m.client_id = ranked.client_id AND m.unit_id = ranked.unit_id
+                      AND ranked.new_rank <= %(k)s AND m.rank <> ranked.new_rank
+                    """,
+                    {"clients": [int(c) for c in delta["client_id"].unique()], "k": k},
+                )
+            cur.execute(
+                """
+                INSERT INTO match_watermark (job, requirements_at, units_at, finished_at)
+                VALUES (%(job)s, %(at)s, %(at)s, NOW())
+                ON CONFLICT (job) DO UPDATE SET
+                    requirements_at = EXCLUDED.requirements_at,
+                    units_at = EXCLUDED.units_at,
+                    finished_at = EXCLUDED.finished_at
+                """,
+                {"job": REMATCH_JOB, "at": run_at},
+            )
+        conn.commit()
+
+    return {
+        "clients_rescored": len(changed_requirements),
+        "units_changed": len(changed_units),
+        "clients_merged": int(delta["client_id"].nunique()) if not delta.empty else 0,
+        "rows_written": len(rescored) + len(delta),
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def load_stored_matches(client_id, conn=None):
+    """
+    Suggestions stored by the last re-match for one client, best first.
+
+    Returns:
+        pd.DataFrame: ``match_result`` rows joined with unit and building
+        details; empty when the client has none.
+    """
+    query = """
+        SELECT m.rank, m.score::float AS score, m.computed_at, m.requirement_id, u.id AS unit_id, b.name AS building_name,
+               u.unit_number, u.price, u.beds, u.baths, u.sqft, u.available_date,
+               b.zip, b.neighborhood, b.amenities
+        FROM match_result m
+        JOIN unit u ON u.id = m.unit_id
+        JOIN building b ON b.id = u.building_id
+        WHERE m.client_id = %(client_id)s AND u.is_available
+        ORDER BY m.rank
+    """
+    if conn is None:
+        with get_connection() as conn:
+            return pd.read_sql(query, conn, params={"client_id": client_id})
+    return pd.read_sql(query, conn, params={"client_id": client_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore client requirements against units changed since the last run.")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and rescore everything")
+    parser.add_argument("--workers", type=int, default=REMATCH_WORKERS)
+    parser.add_argument("--top-k", type=int, default=MATCH_TOP_K)
+    args = parser.parse_args()
+    summary = rematch(args.full, args.workers, args.top_k)
+    print(
+        f"Rescored {summary['clients_rescored']:,} clients, merged {summary['units_changed']:,} changed units "
+        f"into {summary['clients_merged']:,} clients, wrote {summary['rows_written']:,} rows "
+        f"in {summary['seconds']}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+from datetime import date, datetime, time
+
+import pandas as pd
+from psycopg2.extras import Json
+
+from utils.db import get_connection
+from utils.query_cache import get_query_cache, row_tag
+
+# Option lists shared by the Client Requirement form and the bulk import
+PET_OPTIONS = [
+    (-1, '------'), (4, "No Pet"), (0, "Has Pets"), (1, "Has Cats Only"), (2, "Has Dogs Only"), (3, "Has Dangerous Pets")
+]
+WASHER_DRYER_OPTIONS = [
+    (0, "Any"), (1, "Yes"), (3, "No"), (4, "Select Units")
+]
+PARKING_OPTIONS = [
+    (0, "------"), (1, "Yes"), (3, "No"), (4, "Select Units"), (5, "Assigned Parking"),
+    (6, "Attached Parking"), (7, "Garage Parking"), (8, "Offsite Parking")
+]
+AMENITY_OPTIONS = ['air condition', 'gym', 'laundry', 'park', 'parking', 'pool', 'storage']
+PREFERENCE_OPTIONS = ["Rental", "Condo"]
+
+# Column -> SQL type for the fields the form collects and the bulk import accepts
+REQUIREMENT_COLUMNS = {
+    "client_id": "bigint",
+    "move_in_date": "date",
+    "move_in_date_max": "date",
+    "budget": "numeric",
+    "budget_max": "numeric",
+    "beds": "smallint",
+    "baths": "numeric",
+    "sqft": "integer",
+    "sqft_max": "integer",
+    "parking": "text",
+    "pets": "text",
+    "washer_dryer": "text",
+    "zip": "text[]",
+    "neighborhood": "text[]",
+    "amenities": "text[]",
+    "comment": "text",
+    "pets_comment": "text",
+    "parking_comment": "text",
+    "moving_reason": "text",
+    "work_location": "text",
+    "commuting": "text",
+    "people_living": "smallint",
+    "building_must_haves": "text",
+    "unit_must_haves": "text",
+    "special_needs": "text",
+    "preference": "text",
+    "personality": "text",
+    "another_broker": "boolean",
+    "another_broker_comment": "text",
+    "confirm_tour": "boolean",
+    "tour_person": "text",
+    "lease_term": "smallint",
+    "section8": "boolean",
+    "monthly_income": "numeric",
+    "credit_score": "integer",
+    "cosigner": "boolean",
+    "cosigner_comment": "text",
+    "neighborhood_specific": "boolean",
+    "tour_date": "date",
+}
+
+# Everything a save may write: the importable fields plus the weekly availability
+STORED_COLUMNS = {**REQUIREMENT_COLUMNS, "availability": "jsonb"}
+WRITABLE_COLUMNS = [column for column in STORED_COLUMNS if column != "client_id"]
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_AVAILABILITY = (time(9, 0), time(17, 0))
+REQUIREMENT_CACHE_TTL = 300
+
+# Served by client_requirements_client_latest_idx (sql/009)
+LATEST_REQUIREMENT_QUERY = """
+    SELECT * FROM client_requirements WHERE client_id = %s ORDER BY id DESC LIMIT 1
+"""
+
+# Latest requirement of clients free on a weekday during a time window and
+# wanting the given zips/neighborhoods/amenities. Served by the GIN indexes
+# and client_availability_day_idx (sql/010).
+AVAILABLE_CLIENTS_QUERY = """
+    SELECT r.*, a.start_time AS available_from, a.end_time AS available_until
+    FROM client_availability a
+    JOIN client_requirements r ON r.id = a.requirement_id
+    WHERE a.day = %(day)s
+      AND a.start_time < %(end)s AND a.end_time > %(start)s
+      AND (%(zip)s::text[] = '{}' OR r.zip && %(zip)s::text[])
+      AND (%(neighborhood)s::text[] = '{}' OR r.neighborhood && %(neighborhood)s::text[])
+      AND (%(amenities)s::text[] = '{}' OR r.amenities @> %(amenities)s::text[])
+      AND NOT EXISTS (
+          SELECT 1 FROM client_requirements newer
+          WHERE newer.client_id = r.client_id AND newer.id > r.id
+      )
+    ORDER BY r.client_id
+"""
+
+
+def _clean_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _clock(value, default):
+    return _time(value, default).strftime("%H:%M")
+
+
+def normalize_availability(availability):
+    """
+    Canonical JSON form of the weekly availability.
+
+    Accepts the form's dict of ``datetime.time`` values as well as the ISO
+    strings it becomes after a trip through the outbox.
+
+    Returns:
+        dict: ``{day: {"available": bool, "start": "HH:MM", "end": "HH:MM"}}``
+        for every day in ``WEEKDAYS``.
+    """
+    availability = availability or {}
+    return {
+        day: {
+            "available": bool((availability.get(day) or {}).get("available", False)),
+            "start": _clock((availability.get(day) or {}).get("start"), DEFAULT_AVAILABILITY[0]),
+            "end": _clock((availability.get(day) or {}).get("end"), DEFAULT_AVAILABILITY[1]),
+        }
+        for day in WEEKDAYS
+    }
+
+
+def adapt_requirement_values(values):
+    """
+    Wrap requirement values in explicit psycopg2 adapters.
+
+    List fields become clean lists of strings (sent as ``text[]``) and the
+    availability dict becomes ``Json`` (sent as ``jsonb``), instead of relying
+    on whatever the driver does with arbitrary Python objects.
+    """
+    adapted = dict(values)
+    for column, sql_type in STORED_COLUMNS.items():
+        if column not in adapted:
+            continue
+        if sql_type == "text[]":
+            adapted[column] = _clean_list(adapted[column])
+        elif sql_type == "jsonb":
+            adapted[column] = Json(normalize_availability(adapted[column]))
+    return adapted
+
+
+def apply_requirement(conn, payload, idem_key):
+    """
+    Outbox handler: upsert a client's requirements (the caller commits).
+
+    ``payload`` is ``{"client_id": ..., "changes": {column: value}}``. The
+    client's latest row is updated with just those columns; a client without
+    one gets a new row. Older payloads holding the full form are treated as
+    changing every column.
+    """
+    changes = payload.get("changes", payload)
+    changes = adapt_requirement_values(
+        {column: value for column, value in changes.items() if column in WRITABLE_COLUMNS}
+    )
+    cast = {column: f"%({column})s::{sql_type}" for column, sql_type in STORED_COLUMNS.items()}
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT id FROM client_requirements WHERE client_id = %s ORDER BY id DESC LIMIT 1 FOR UPDATE",
+            (payload["client_id"],),
+        )
+        row = cur.fetchone()
+        if row is None:
+            columns = ["client_id", *changes]
+            cur.execute(
+                f"INSERT INTO client_requirements ({', '.join(columns)}) "
+                f"VALUES ({', '.join(cast[column] for column in columns)})",
+                {**changes, "client_id": payload["client_id"]},
+            )
+        elif changes:
+            cur.execute(
+                f"UPDATE client_requirements SET {', '.join(f'{column} = {cast[column]}' for column in changes)} "
+                "WHERE id = %(id)s",
+                {**changes, "id": row[0]},
+            )
+
+
+def load_latest_requirement(client_id, conn=None):
+    """
+    Most recent ``client_requirements`` row for a client.
+
+    Returns:
+        dict or None: Column -> value, or None when the client has none.
+    """
+    if conn is None:
+        with get_connection() as conn:
+            return load_latest_requirement(client_id, conn)
+    with conn.cursor() as cur:
+        cur.execute(LATEST_REQUIREMENT_QUERY, (client_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column.name for column in cur.description], row))
+
+
+def get_latest_requirement(client_id):
+    """
+    ``load_latest_requirement`` through the shared query cache.
+
+    The outbox evicts the client's entry when it applies a requirement save,
+    so the next read sees the saved values.
+    """
+    return get_query_cache().get_or_load(
+        LATEST_REQUIREMENT_QUERY,
+        (str(client_id),),
+        lambda: load_latest_requirement(client_id),
+        [row_tag("client_requirements", client_id)],
+        REQUIREMENT_CACHE_TTL,
+    )
+
+
+def _time(value, default):
+    if isinstance(value, time):
+        return value
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        return default
+
+
+def _date(value):
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def requirement_form_values(row):
+    """
+    Convert a ``client_requirements`` row into the values the form widgets use.
+
+    Args:
+        row (dict or None): A stored row; None gives the blank form.
+
+    Returns:
+        dict: Column -> widget value, in the same shape as the dict the form
+        saves, so the two can be compared with ``changed_columns``.
+    """
+    row = row or {}
+
+    def number(column, cast=int, default=0):
+        value = row.get(column)
+        return default if value is None else cast(value)
+
+    def text(column):
+        return row.get(column) or ""
+
+    def code(column, options, default):
+        value = row.get(column)
+        codes = [option_code for option_code, _ in options]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return default
+        return value if value in codes else default
+
+    availability = {}
+    stored = row.get("availability") or {}
+    for day in WEEKDAYS:
+        slot = stored.get(day) or {}
+        availability[day] = {
+            "available": bool(slot.get("available", False)),
+            "start": _time(slot.get("start"), DEFAULT_AVAILABILITY[0]),
+            "end": _time(slot.get("end"), DEFAULT_AVAILABILITY[1]),
+        }
+
+    values = {
+        "move_in_date": _date(row.get("move_in_date")),
+        "move_in_date_max": _date(row.get("move_in_date_max")),
+        "tour_date": _date(row.get("tour_date")),
+        "budget": number("budget"),
+        "budget_max": number("budget_max"),
+        "sqft": number("sqft"),
+        "sqft_max": number("sqft_max"),
+        "beds": number("beds"),
+        "baths": number("baths", float, 0.0),
+        "lease_term": number("lease_term"),
+        "pets": code("pets", PET_OPTIONS, -1),
+        "washer_dryer": code("washer_dryer", WASHER_DRYER_OPTIONS, 0),
+        "parking": code("parking", PARKING_OPTIONS, 0),
+        "amenities": [a for a in (row.get("amenities") or []) if a in AMENITY_OPTIONS],
+        "zip": list(row.get("zip") or []),
+        "neighborhood": list(row.get("neighborhood") or []),
+        "neighborhood_specific": bool(row.get("neighborhood_specific")),
+        "preference": row.get("preference") if row.get("preference") in PREFERENCE_OPTIONS else PREFERENCE_OPTIONS[0],
+        "people_living": number("people_living", default=1) or 1,
+        "section8": bool(row.get("section8")),
+        "monthly_income": number("monthly_income"),
+        "credit_score": number("credit_score"),
+        "cosigner": bool(row.get("cosigner")),
+        "another_broker": bool(row.get("another_broker")),
+        "confirm_tour": bool(row.get("confirm_tour")),
+        "availability": availability,
+    }
+    for column in (
+        "pets_comment", "parking_comment", "special_needs", "building_must_haves", "unit_must_haves",
+        "personality", "work_location", "commuting", "moving_reason", "comment", "cosigner_comment",
+        "another_broker_comment", "tour_person",
+    ):
+        values[column] = text(column)
+    return values
+
+
+def changed_columns(form_data, previous):
+    """
+    Columns whose value in ``form_data`` differs from ``previous``.
+
+    Both dicts are in form shape (see ``requirement_form_values``). Codes are
+    compared as strings, since the form saves them as text.
+    """
+    changes = {}
+    for column in WRITABLE_COLUMNS:
+        if column not in form_data:
+            continue
+        new, old = form_data[column], previous.get(column)
+        if column in ("pets", "washer_dryer", "parking"):
+            new, old = str(new), str(old)
+        if new != old:
+            changes[column] = form_data[column]
+    return changes
+
+
+def find_available_clients(day, start, end, zip_codes=(), neighborhoods=(), amenities=(), conn=None):
+    """
+    Clients free on ``day`` at some point between ``start`` and ``end``.
+
+    Args:
+        day (str): One of ``WEEKDAYS``.
+        start, end (datetime.time): Window that must overlap their availability.
+        zip_codes, neighborhoods: Match clients wanting any of these.
+        amenities: Match clients wanting all of these.
+        conn: Optional open connection.
+
+    Returns:
+        pd.DataFrame: The clients' latest requirement rows plus
+        ``available_from``/``available_until`` for that day.
+    """
+    params = {
+        "day": WEEKDAYS.index(day) + 1,
+        "start": start,
+        "end": end,
+        "zip": _clean_list(zip_codes),
+        "neighborhood": _clean_list(neighborhoods),
+        "amenities": _clean_list(amenities),
+    }
+    if conn is None:
+        with get_connection() as conn:
+            return pd.read_sql(AVAILABLE_CLIENTS_QUERY, conn, params=params)
+    return pd.read_sql(AVAILABLE_CLIENTS_QUERY, conn, params=params)
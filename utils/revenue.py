@@ -0,0 +1,213 @@
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from utils.db import get_connection
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+REVENUE_KEY = ("client_id", "tour_id")
+
+APPLICATION_STATUSES = ["Not decided yet", "Application Denied", "Application Approved"]
+
+# Same bounds as the Revenue Entry form widgets
+REVENUE_RANGES = {
+    "lease_term": (1, 48),
+    "year": (2000, 2100),
+    "month": (1, 12),
+    "beds": (0, 8),
+    "baths": (1, 8),
+    "rent": (0, None),
+    "concession_free_months": (0, None),
+    "additional_concessions": (0, None),
+    "commission_percentage": (0, 100),
+}
+
+# Column -> SQL type, in table order. Used to cast the VALUES list so string
+# payloads replayed from the outbox land in the right types.
+REVENUE_COLUMNS = {
+    "client_id": "bigint",
+    "tour_id": "bigint",
+    "client_name": "text",
+    "sales_rep_id": "text",
+    "sales_rep_name": "text",
+    "tour_rep_id": "text",
+    "tour_rep_name": "text",
+    "building_id": "bigint",
+    "building_name": "text",
+    "unit_number": "text",
+    "move_in_date": "date",
+    "tour_date": "date",
+    "lease_term": "smallint",
+    "application_approved_date": "date",
+    "month": "smallint",
+    "year": "smallint",
+    "beds": "smallint",
+    "baths": "numeric",
+    "rent": "numeric",
+    "concession_free_months": "numeric",
+    "additional_concessions": "numeric",
+    "total_concession_value": "numeric",
+    "net_effective": "numeric",
+    "commission_percentage": "numeric",
+    "deal_value": "numeric",
+    "concession_text": "text",
+    "invoice_prepared": "boolean",
+    "invoice_prepared_date": "date",
+    "invoice_sent": "boolean",
+    "invoice_sent_date": "date",
+    "invoice_collected": "boolean",
+    "invoice_collected_date": "date",
+    "application_status": "text",
+    "signed_lease_date": "date",
+    "is_closed": "boolean",
+    "closed_date": "date",
+    "invoice_info_requested": "boolean",
+    "invoice_info_requested_date": "date",
+    "invoice_info_received": "boolean",
+    "invoice_info_received_date": "date",
+    "payment_to_lead_source": "boolean",
+    "payment_to_lead_source_date": "date",
+    "dispute_raised": "boolean",
+    "dispute_raised_date": "date",
+    "dispute_resolved": "boolean",
+    "dispute_resolved_date": "date",
+    "comments": "text",
+}
+
+BOOLEAN_COLUMNS = [column for column, sql_type in REVENUE_COLUMNS.items() if sql_type == "boolean"]
+
+_updates = ",\n        ".join(
+    f"{column} = EXCLUDED.{column}" for column in REVENUE_COLUMNS if column not in REVENUE_KEY
+)
+
+# Shared by the form upsert and the bulk import merge
+REVENUE_ON_CONFLICT = f"""
+    ON CONFLICT ON CONSTRAINT revenue_client_tour_key DO UPDATE SET
+        {_updates},
+        updated_at = NOW()
+"""
+
+UPSERT_REVENUE_QUERY = f"""
+    INSERT INTO revenue ({", ".join(REVENUE_COLUMNS)})
+    VALUES %s
+    {REVENUE_ON_CONFLICT}
+    RETURNING id
+"""
+
+ROW_TEMPLATE = "(" + ", ".join(
+    f"%({column})s::{sql_type}" for column, sql_type in REVENUE_COLUMNS.items()
+) + ")"
+
+# Rows per INSERT statement in bulk mode; all pages share one transaction
+BULK_PAGE_SIZE = 1000
+
+
+def _row(entry):
+    row = {column: entry.get(column) for column in REVENUE_COLUMNS}
+    for column in BOOLEAN_COLUMNS:
+        row[column] = bool(row[column])
+    return row
+
+
+def upsert_revenue(entries, conn=None):
+    """
+    Insert or update revenue entries keyed on ``(client_id, tour_id)``.
+
+    A single entry is one statement; a list (e.g. a month of closed deals) is
+    loaded with multi-row upserts of ``BULK_PAGE_SIZE`` rows inside one
+    transaction. If the same key appears more than once, the last entry wins.
+
+    Args:
+        entries (dict or list): One entry or a list of entries with keys from
+            ``REVENUE_COLUMNS``.
+        conn (connection): Optional connection to use; the caller then owns
+            the transaction. A pooled connection is borrowed and committed
+            otherwise.
+
+    Returns:
+        list: The ids of the inserted or updated rows.
+    """
+    if isinstance(entries, dict):
+        entries = [entries]
+    # ON CONFLICT can't touch the same row twice in one statement
+    rows = list({(e.get("client_id"), e.get("tour_id")): _row(e) for e in entries}.values())
+    if not rows:
+        return []
+
+    if conn is None:
+        with get_connection() as conn:
+            ids = _execute_upsert(conn, rows)
+            conn.commit()
+            return ids
+    return _execute_upsert(conn, rows)
+
+
+def _execute_upsert(conn, rows):
+    with conn.cursor() as cur:
+        returned = execute_values(
+            cur, UPSERT_REVENUE_QUERY, rows, template=ROW_TEMPLATE,
+            page_size=BULK_PAGE_SIZE, fetch=True
+        )
+    return [row_id for (row_id,) in returned]
+
+
+def apply_revenue(conn, payload, idem_key):
+    """Outbox handler: upsert one queued revenue entry (the caller commits)."""
+    upsert_revenue(payload, conn=conn)
+
+
+def load_revenue_rollup(year=None):
+    """
+    Read the pre-aggregated ``revenue_rollup`` rows.
+
+    The rollup is maintained by triggers on ``revenue`` (sql/006_revenue_rollup.sql),
+    so this reads at most one row per month, rep and building instead of
+    aggregating every deal.
+
+    Args:
+        year (int): Only return this year; all years when None.
+
+    Returns:
+        pd.DataFrame: One row per (year, month, sales_rep, building).
+    """
+    query = """
+        SELECT year, month, sales_rep, building, deals, closed_deals, deal_value,
+               net_effective, total_concession_value,
+               commission_percentage_sum, commission_percentage_count
+        FROM revenue_rollup
+        WHERE %(year)s::smallint IS NULL OR year = %(year)s::smallint
+        ORDER BY year, month
+    """
+    with get_connection() as conn:
+        rollup = pd.read_sql(query, conn, params={"year": year})
+    # NUMERIC columns arrive as Decimal objects
+    money = ["deal_value", "net_effective", "total_concession_value", "commission_percentage_sum"]
+    rollup[money] = rollup[money].astype(float)
+    return rollup
+
+
+def summarize_rollup(rollup, by):
+    """
+    Combine rollup rows into one row per value of ``by``.
+
+    Sums add up directly; the average commission percentage is recomputed
+    from its stored sum and count so it stays exact across groups.
+
+    Args:
+        rollup (pd.DataFrame): Rows from ``load_revenue_rollup``.
+        by (list): Grouping columns, e.g. ``["year", "month"]`` or ``["sales_rep"]``.
+
+    Returns:
+        pd.DataFrame: Aggregated totals with an ``avg_commission_percentage`` column.
+    """
+    totals = rollup.groupby(by, as_index=False)[[
+        "deals", "closed_deals", "deal_value", "net_effective", "total_concession_value",
+        "commission_percentage_sum", "commission_percentage_count",
+    ]].sum()
+    totals["avg_commission_percentage"] = (
+        totals["commission_percentage_sum"] / totals["commission_percentage_count"].where(totals["commission_percentage_count"] > 0)
+    ).round(2)
+    return totals.drop(columns=["commission_percentage_sum", "commission_percentage_count"])
@@ -0,0 +1,162 @@
+"""
+Derived revenue fields.
+
+``total_concession_value``, ``net_effective`` and ``deal_value`` follow from
+the deal inputs, so they are computed here instead of typed in. The same
+numpy expression serves a single form entry and a DataFrame of deals, so live
+previews, bulk imports and recomputation always agree.
+
+    total_concession_value = rent * concession_free_months + additional_concessions
+    net_effective          = (rent * lease_term - total_concession_value) / lease_term
+    deal_value             = rent * commission_percentage / 100
+
+Commission is a percentage of one month's gross rent, matching the form's
+default of 100%. All values are rounded to cents.
+
+Usage:
+    python -m utils.revenue_calc [--batch-size 5000] [--dry-run]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from utils.db import get_connection
+
+DERIVED_FIELDS = ("total_concession_value", "net_effective", "deal_value")
+INPUT_FIELDS = ("rent", "lease_term", "concession_free_months", "additional_concessions", "commission_percentage")
+RECOMPUTE_BATCH_SIZE = 5000
+
+
+def _derive(rent, lease_term, free_months, additional, commission_pct):
+    # Works element-wise on arrays and on 0-d arrays alike
+    rent = np.asarray(rent, dtype=np.float64)
+    lease_term = np.asarray(lease_term, dtype=np.float64)
+    free_months = np.nan_to_num(np.asarray(free_months, dtype=np.float64))
+    additional = np.nan_to_num(np.asarray(additional, dtype=np.float64))
+    commission_pct = np.asarray(commission_pct, dtype=np.float64)
+
+    total_concession = np.round(rent * free_months + additional, 2)
+    gross = rent * lease_term
+    with np.errstate(divide="ignore", invalid="ignore"):
+        net_effective = np.where(lease_term > 0, (gross - total_concession) / lease_term, np.nan)
+    net_effective = np.round(net_effective, 2)
+    deal_value = np.round(rent * commission_pct / 100, 2)
+    return total_concession, net_effective, deal_value
+
+
+def _number(value):
+    return np.nan if value is None or value == "" else float(value)
+
+
+def derive_revenue_fields(entry):
+    """
+    Compute the derived fields for one revenue entry.
+
+    Args:
+        entry (dict): Has the keys in ``INPUT_FIELDS``; missing concessions
+            count as 0.
+
+    Returns:
+        dict: ``total_concession_value``, ``net_effective`` and ``deal_value``;
+        a value is None when its inputs are missing or the lease term is 0.
+    """
+    results = _derive(*(_number(entry.get(field)) for field in INPUT_FIELDS))
+    return {
+        field: (None if np.isnan(value) else float(value))
+        for field, value in zip(DERIVED_FIELDS, results)
+    }
+
+
+def derive_revenue_frame(df):
+    """
+    Compute the derived fields for every row of a DataFrame of deals.
+
+    Args:
+        df (pd.DataFrame): Has the columns in ``INPUT_FIELDS``.
+
+    Returns:
+        pd.DataFrame: ``df`` with the derived columns added or overwritten
+        (float, NaN where ``derive_revenue_fields`` would give None).
+    """
+    inputs = [
+        pd.to_numeric(df[field], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        for field in INPUT_FIELDS
+    ]
+    for field, values in zip(DERIVED_FIELDS, _derive(*inputs)):
+        df[field] = values
+    return df
+
+
+def recompute_revenue(batch_size=RECOMPUTE_BATCH_SIZE, dry_run=False):
+    """
+    Recompute the derived fields of every stored revenue row.
+
+    Reads the table in keyset batches of ``batch_size`` rows, derives the
+    fields vectorized, and updates only the rows whose stored values differ.
+
+    Returns:
+        tuple: ``(rows_checked, rows_updated)``.
+    """
+    checked = updated = 0
+    last_id = 0
+    with get_connection() as conn:
+        while True:
+            batch = pd.read_sql(
+                f"""
+                SELECT id, {", ".join(INPUT_FIELDS)}, {", ".join(DERIVED_FIELDS)}
+                FROM revenue WHERE id > %(last_id)s ORDER BY id LIMIT %(limit)s
+                """,
+                conn,
+                params={"last_id": last_id, "limit": batch_size},
+            )
+            if batch.empty:
+                break
+            last_id = int(batch["id"].iloc[-1])
+            checked += len(batch)
+
+            stored = batch[list(DERIVED_FIELDS)].apply(pd.to_numeric, errors="coerce")
+            derived = derive_revenue_frame(batch.copy())[list(DERIVED_FIELDS)]
+            same = (stored.round(2) == derived) | (stored.isna() & derived.isna())
+            changed = batch.loc[~same.all(axis=1), ["id"]].join(derived)
+            if changed.empty or dry_run:
+                updated += len(changed)
+                continue
+
+            rows = [
+                tuple(None if pd.isna(v) else v for v in row)
+                for row in changed[["id", *DERIVED_FIELDS]].itertuples(index=False)
+            ]
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    UPDATE revenue SET
+                        total_concession_value = v.total_concession_value,
+                        net_effective = v.net_effective,
+                        deal_value = v.deal_value,
+                        updated_at = NOW()
+                    FROM (VALUES %s) AS v (id, total_concession_value, net_effective, deal_value)
+                    WHERE revenue.id = v.id
+                    """,
+                    rows,
+                    template="(%s::bigint, %s::numeric, %s::numeric, %s::numeric)",
+                    page_size=len(rows),
+                )
+            conn.commit()
+            updated += len(changed)
+    return checked, updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute derived revenue fields for every stored deal.")
+    parser.add_argument("--batch-size", type=int, default=RECOMPUTE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count rows that would change")
+    args = parser.parse_args()
+    checked, updated = recompute_revenue(args.batch_size, args.dry_run)
+    print(f"Checked {checked} revenue rows, {'would update' if args.dry_run else 'updated'} {updated}.")
+
+
+if __name__ == "__main__":
+    main()
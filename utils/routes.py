@@ -0,0 +1,153 @@
+import math
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Door-to-door city speed used to turn distance into travel time
+TRAVEL_SPEED_KMH = float(os.getenv("TRAVEL_SPEED_KMH", "20"))
+# Parking, walking to the leasing office, etc. on every leg
+TRAVEL_OVERHEAD_MINUTES = int(os.getenv("TRAVEL_OVERHEAD_MINUTES", "5"))
+
+
+def distance_matrix(coordinates):
+    """
+    Great-circle (haversine) distances between every pair of points.
+
+    Args:
+        coordinates (list): ``(latitude, longitude)`` pairs in degrees.
+
+    Returns:
+        np.ndarray: Symmetric ``n x n`` matrix of kilometres.
+    """
+    points = np.radians(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+    lat, lon = points[:, 0][:, None], points[:, 1][:, None]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def travel_minutes(km):
+    """Estimated minutes to drive ``km`` between two buildings, overhead included."""
+    return int(math.ceil(km / TRAVEL_SPEED_KMH * 60)) + TRAVEL_OVERHEAD_MINUTES
+
+
+def _path_length(dist, order):
+    return float(sum(dist[a, b] for a, b in zip(order, order[1:])))
+
+
+def _nearest_neighbor(dist, start):
+    n = len(dist)
+    order = [start]
+    left = set(range(n)) - {start}
+    while left:
+        here = order[-1]
+        nearest = min(left, key=lambda stop: dist[here, stop])
+        order.append(nearest)
+        left.remove(nearest)
+    return order
+
+
+def _two_opt(dist, order, keep_first=False):
+    # Reverse any segment that shortens the open path until none does; a
+    # segment may run to either end of the path (i = -1 moves the first stop)
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(0 if keep_first else -1, n - 1):
+            for j in range(i + 2, n + 1):
+                if i == -1 and j == n:
+                    continue
+                a = order[i] if i >= 0 else None
+                b, c = order[i + 1], order[j - 1]
+                d = order[j] if j < n else None
+                before = (dist[a, b] if a is not None else 0) + (dist[c, d] if d is not None else 0)
+                after = (dist[a, c] if a is not None else 0) + (dist[b, d] if d is not None else 0)
+                if after < before - 1e-9:
+                    order[i + 1:j] = reversed(order[i + 1:j])
+                    improved = True
+    return order
+
+
+def optimize_route(coordinates, start=None):
+    """
+    Order stops to keep the total distance of an open tour short.
+
+    Builds a nearest-neighbor path from every possible first stop (or just
+    ``start``), improves each with 2-opt and keeps the shortest. Instant for
+    the dozen or so buildings of a tour.
+
+    Args:
+        coordinates (list): ``(latitude, longitude)`` per stop.
+        start (int): Index of a stop that must come first, e.g. where the
+            rep starts; any stop when None.
+
+    Returns:
+        tuple: ``(order, km)`` with stop indexes in visiting order and the
+        path length in kilometres.
+    """
+    n = len(coordinates)
+    if n <= 2:
+        order = list(range(n))
+        if start is not None and n == 2 and start == 1:
+            order = [1, 0]
+        dist = distance_matrix(coordinates) if n else None
+        return order, (_path_length(dist, order) if n else 0.0)
+    dist = distance_matrix(coordinates)
+    best, best_km = None, math.inf
+    for first in ([start] if start is not None else range(n)):
+        order = _two_opt(dist, _nearest_neighbor(dist, first), keep_first=start is not None)
+        km = _path_length(dist, order)
+        if km < best_km - 1e-9:
+            best, best_km = order, km
+    return best, best_km
+
+
+def _located(building):
+    return bool(building) and building.get("latitude") is not None and building.get("longitude") is not None
+
+
+def tour_legs(buildings):
+    """
+    Travel minutes between consecutive buildings, in the given order.
+
+    Args:
+        buildings (list): Catalog records (with ``latitude``/``longitude``) or
+            None for custom buildings.
+
+    Returns:
+        list: ``len(buildings) - 1`` values; None for a leg touching a
+        building without a known location.
+    """
+    legs = []
+    for a, b in zip(buildings, buildings[1:]):
+        if _located(a) and _located(b):
+            km = distance_matrix([(a["latitude"], a["longitude"]), (b["latitude"], b["longitude"])])[0, 1]
+            legs.append(travel_minutes(km))
+        else:
+            legs.append(None)
+    return legs
+
+
+def order_tour(buildings):
+    """
+    Route order for a tour's buildings, keeping the ones without coordinates.
+
+    Args:
+        buildings (list): Catalog records (with ``latitude``/``longitude``) or
+            None for custom buildings, in the order the rep entered them.
+
+    Returns:
+        tuple: ``(order, legs)``. ``order`` lists indexes into ``buildings``:
+        the located ones in route order, then the rest in their original
+        order. ``legs`` is ``tour_legs`` for that order.
+    """
+    located = [i for i, building in enumerate(buildings) if _located(building)]
+    unlocated = [i for i in range(len(buildings)) if i not in located]
+    route, _ = optimize_route([(buildings[i]["latitude"], buildings[i]["longitude"]) for i in located])
+    order = [located[i] for i in route] + unlocated
+    return order, tour_legs([buildings[i] for i in order])
@@ -0,0 +1,94 @@
+from psycopg2.extras import execute_values
+
+from utils.db import get_connection
+
+SCHEDULE_COLUMNS = (
+    "client_id", "building_id", "building", "unit_number", "price", "tour_date", "tour_time",
+    "tour_type", "status", "booked_via", "touring_rep", "selected_by",
+    "leasing_agent", "leasing_agent_email", "leasing_agent_phone", "comment",
+)
+
+# Creates the tour and all of its building rows in a single statement. Every
+# value is bound by name, so dict ordering no longer matters. The tour-level
+# values travel in each row too: execute_values fills in the only %s, so
+# nothing has to be mogrified into the SQL beforehand.
+INSERT_TOUR_QUERY = """
+    WITH v (
+        client_id, building_id, building_name, unit_number, price, tour_date, tour_time,
+        tour_type, status, booked_via, touring_rep, selected_by,
+        leasing_agent_name, leasing_agent_email, leasing_agent_phone, comment, close_confidence
+    ) AS (VALUES %s),
+    new_tour AS (
+        INSERT INTO tour (client_id, close_confidence, created_at)
+        SELECT client_id, close_confidence, NOW() FROM v LIMIT 1
+        RETURNING id
+    )
+    INSERT INTO client_schedule (
+        tour_id, client_id, building_id, building_name, unit_number, price, tour_date, tour_time,
+        tour_type, status, booked_via, touring_rep, selected_by,
+        leasing_agent_name, leasing_agent_email, leasing_agent_phone,
+        comment, close_confidence, created_at
+    )
+    SELECT new_tour.id, v.client_id, v.building_id, v.building_name, v.unit_number, v.price,
+           v.tour_date, v.tour_time, v.tour_type, v.status, v.booked_via, v.touring_rep,
+           v.selected_by, v.leasing_agent_name, v.leasing_agent_email, v.leasing_agent_phone,
+           v.comment, v.close_confidence, NOW()
+    FROM new_tour, v
+    RETURNING tour_id, id
+"""
+
+ROW_TEMPLATE = """(
+    %(client_id)s::bigint, %(building_id)s::bigint, %(building)s, %(unit_number)s,
+    %(price)s::numeric, %(tour_date)s::date, %(tour_time)s::time,
+    %(tour_type)s, %(status)s, %(booked_via)s, %(touring_rep)s, %(selected_by)s,
+    %(leasing_agent)s, %(leasing_agent_email)s, %(leasing_agent_phone)s, %(comment)s,
+    %(close_confidence)s::integer
+)"""
+
+
+def insert_tour(client_id, schedule_data, close_conf, conn=None):
+    """
+    Insert a tour and all of its buildings in one round trip and one transaction.
+
+    Args:
+        client_id (str): The client being toured.
+        schedule_data (list): One dict per building, as collected by the
+            schedule page (keys in ``SCHEDULE_COLUMNS``).
+        close_conf (int): Close confidence score for the whole tour.
+        conn (connection): Optional connection to use; the caller then owns
+            the transaction. A pooled connection is borrowed and committed
+            otherwise.
+
+    Returns:
+        tuple: ``(tour_id, schedule_ids)``, schedule ids in insertion order.
+    """
+    if not schedule_data:
+        raise ValueError("A tour needs at least one building")
+    rows = [{column: building.get(column) for column in SCHEDULE_COLUMNS} for building in schedule_data]
+    for row in rows:
+        row["client_id"] = client_id
+        row["close_confidence"] = close_conf
+
+    if conn is None:
+        with get_connection() as conn:
+            result = _execute_insert(conn, rows)
+            conn.commit()
+            return result
+    return _execute_insert(conn, rows)
+
+
+def _execute_insert(conn, rows):
+    with conn.cursor() as cur:
+        # page_size large enough to keep the whole tour to one statement
+        returned = execute_values(
+            cur, INSERT_TOUR_QUERY, rows, template=ROW_TEMPLATE, page_size=len(rows), fetch=True
+        )
+    tour_id = returned[0][0]
+    # RETURNING order is not guaranteed; serial ids are assigned in insertion order
+    schedule_ids = sorted(schedule_id for _, schedule_id in returned)
+    return tour_id, schedule_ids
+
+
+def apply_tour(conn, payload, idem_key):
+    """Outbox handler: insert a queued tour (the caller commits)."""
+    insert_tour(payload["client_id"], payload["buildings"], payload["close_confidence"], conn=conn)
@@ -0,0 +1,369 @@
+import os
+import threading
+import time as clock
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
+import streamlit as st
+
+from utils.db import get_connection
+from utils.requirements import WEEKDAYS, normalize_availability
+
+# Length of one building visit and the gap left between consecutive buildings
+TOUR_SLOT_MINUTES = int(os.getenv("TOUR_SLOT_MINUTES", "30"))
+TOUR_TRAVEL_MINUTES = int(os.getenv("TOUR_TRAVEL_MINUTES", "15"))
+TOUR_DAY_START = time(9, 0)
+TOUR_DAY_END = time(19, 0)
+SLOT_STEP_MINUTES = 15
+SLOT_SUGGESTIONS = 5
+SLOT_SEARCH_DAYS = 14
+
+TOUR_INDEX_TTL = int(os.getenv("TOUR_INDEX_TTL", "30"))
+# Status changes and cancellations are only picked up by a full reload
+TOUR_INDEX_FULL_RELOAD = int(os.getenv("TOUR_INDEX_FULL_RELOAD", "300"))
+# Tours booked in this process stay in the index this long even if the
+# database doesn't have them yet (they may still be waiting in the outbox)
+LOCAL_BOOKING_TTL = 900
+DAY_MINUTES = 24 * 60
+
+
+def to_minutes(value):
+    """``datetime.time`` or ``"HH:MM[:SS]"`` -> minutes since midnight."""
+    if not isinstance(value, time):
+        value = time.fromisoformat(str(value))
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    # A slot ending at midnight shows as 23:59 rather than overflowing the day
+    minutes = min(minutes, DAY_MINUTES - 1)
+    return time(minutes // 60, minutes % 60)
+
+
+def slot_end(start, minutes=TOUR_SLOT_MINUTES):
+    """End minute of a visit starting at ``start``, clipped to the end of its day."""
+    return min(start + minutes, DAY_MINUTES)
+
+
+def runs_past_midnight(tour_time, minutes=TOUR_SLOT_MINUTES):
+    """Whether a visit at ``tour_time`` would end on the next day."""
+    return to_minutes(tour_time) + minutes > DAY_MINUTES
+
+
+def rep_key(rep):
+    return " ".join(str(rep or "").lower().split())
+
+
+def booking_label(building, client_id):
+    return f"{building or 'Building'} (client {client_id})"
+
+
+class _Day:
+    """One rep's bookings on one day, sorted by start minute."""
+
+    __slots__ = ("starts", "bookings")
+
+    def __init__(self):
+        self.starts = []
+        self.bookings = []  # (start, end, label), same order as starts
+
+    def add(self, start, end, label):
+        booking = (start, end, label)
+        if booking in self.bookings:
+            return
+        pos = bisect_left(self.starts, start)
+        self.starts.insert(pos, start)
+        self.bookings.insert(pos, booking)
+
+    def overlapping(self, start, end):
+        # Bookings starting before ``end``; of those, the ones still running at ``start``
+        pos = bisect_left(self.starts, end)
+        return [b for b in self.bookings[:pos] if b[1] > start]
+
+    def next_free(self, start, minutes):
+        """Earliest start >= ``start`` where ``minutes`` fit without an overlap."""
+        while True:
+            clash = self.overlapping(start, start + minutes)
+            if not clash:
+                return start
+            start = max(end for _, end, _ in clash)
+
+
+class TourSlotIndex:
+    """
+    In-memory interval index of upcoming tours, per touring rep and day.
+
+    Loaded from ``client_schedule`` for the next ``SLOT_SEARCH_DAYS`` days and
+    shared by every session. New rows are fetched by id every ``ttl``
+    seconds; the whole window is reloaded every ``full_reload`` seconds to
+    drop cancelled tours. Days outside the window are loaded when first asked
+    about and reloaded once ``ttl`` has passed. Each booking occupies
+    ``TOUR_SLOT_MINUTES`` from its ``tour_time``.
+    """
+
+    def __init__(self, ttl=TOUR_INDEX_TTL, full_reload=TOUR_INDEX_FULL_RELOAD):
+        self.ttl = ttl
+        self.full_reload = full_reload
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._days = {}  # (rep key, date) -> _Day
+        self._local = []  # (added at, rep, day, start, end, label)
+        self._window = None  # (first, last) day of the last full load
+        self._extra = {}  # day outside the window -> when it was loaded
+        self._watermark = None
+        self._loaded_at = 0.0
+        self._full_loaded_at = 0.0
+
+    def _fetch(self, full, first=None, last=None):
+        """Tours from ``first`` to ``last``, by default the search window."""
+        first = first or date.today()
+        last = last or date.today() + timedelta(days=SLOT_SEARCH_DAYS)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT id, touring_rep, tour_date, tour_time, building_name, client_id
+                    FROM client_schedule
+                    WHERE tour_date BETWEEN %(first)s AND %(last)s
+                      AND COALESCE(status, '') <> 'Cancelled'
+                      AND NULLIF(TRIM(touring_rep), '') IS NOT NULL
+                      AND tour_time IS NOT NULL
+                      AND (%(full)s OR id > %(since)s)
+                    """,
+                    {
+                        "first": first,
+                        "last": last,
+                        "full": full,
+                        "since": self._watermark or 0,
+                    },
+                )
+                return cur.fetchall()
+
+    @staticmethod
+    def _add_rows(days, rows):
+        for _, rep, tour_date, tour_time, building, client_id in rows:
+            start = to_minutes(tour_time)
+            label = booking_label(building, client_id)
+            days.setdefault((rep_key(rep), tour_date), _Day()).add(start, slot_end(start), label)
+
+    def refresh(self, full=False):
+        full = full or self._watermark is None
+        window = (date.today(), date.today() + timedelta(days=SLOT_SEARCH_DAYS))
+        rows = self._fetch(full, *window)
+        with self._lock:
+            days = {} if full else self._days
+            watermark = None if full else self._watermark
+            self._add_rows(days, rows)
+            for row in rows:
+                if watermark is None or row[0] > watermark:
+                    watermark = row[0]
+            if full:
+                # Days outside the window were dropped with the old index
+                self._window = window
+                self._extra = {}
+                cutoff = clock.monotonic() - LOCAL_BOOKING_TTL
+                self._local = [booking for booking in self._local if booking[0] > cutoff]
+                for _, rep, day, start, end, label in self._local:
+                    days.setdefault((rep, day), _Day()).add(start, end, label)
+            self._days = days
+            self._watermark = watermark
+            now = clock.monotonic()
+            self._loaded_at = now
+            if full:
+                self._full_loaded_at = now
+
+    def ensure_fresh(self):
+        """Refresh from the database if the TTL (or the full-reload interval) has passed."""
+        with self._refresh_lock:
+            now = clock.monotonic()
+            if not self._full_loaded_at or now - self._full_loaded_at > self.full_reload:
+                self.refresh(full=True)
+            elif now - self._loaded_at > self.ttl:
+                self.refresh()
+
+    def load_days(self, first, last):
+        """
+        Make sure tours from ``first`` to ``last`` are loaded.
+
+        Days in the search window come with the regular refresh; the others
+        are fetched here, when missing or older than ``ttl``.
+        """
+        with self._refresh_lock:
+            window_first, window_last = self._window
+            now = clock.monotonic()
+            missing = [
+                day for day in _dates(first, last)
+                if not window_first <= day <= window_last
+                and (day not in self._extra or now - self._extra[day] > self.ttl)
+            ]
+            if not missing:
+                return
+            rows = self._fetch(True, missing[0], missing[-1])
+            fetched = {day for day in _dates(missing[0], missing[-1]) if not window_first <= day <= window_last}
+            with self._lock:
+                days = {key: bookings for key, bookings in self._days.items() if key[1] not in fetched}
+                self._add_rows(days, [row for row in rows if row[2] in fetched])
+                for _, rep, day, start, end, label in self._local:
+                    if day in fetched:
+                        days.setdefault((rep, day), _Day()).add(start, end, label)
+                self._days = days
+                self._extra.update(dict.fromkeys(fetched, now))
+
+    def _day(self, rep, day):
+        return self._days.get((rep_key(rep), day)) or _Day()
+
+    def add(self, rep, day, tour_time, label, minutes=TOUR_SLOT_MINUTES):
+        """Record a tour booked in this process before it reaches the database."""
+        start = to_minutes(tour_time)
+        end = slot_end(start, minutes)
+        key = rep_key(rep)
+        with self._lock:
+            self._local.append((clock.monotonic(), key, day, start, end, label))
+            self._days.setdefault((key, day), _Day()).add(start, end, label)
+
+    def conflicts(self, rep, day, tour_time, minutes=TOUR_SLOT_MINUTES):
+        """
+        Tours of ``rep`` overlapping a visit at ``tour_time`` on ``day``.
+
+        Returns:
+            list: ``(start, end, label)`` tuples, times as ``datetime.time``.
+        """
+        if not rep_key(rep):
+            return []
+        self.ensure_fresh()
+        self.load_days(day, day)
+        start = to_minutes(tour_time)
+        with self._lock:
+            clash = self._day(rep, day).overlapping(start, slot_end(start, minutes))
+        return [(to_time(s), to_time(e), label) for s, e, label in clash]
+
+    def suggest_slots(self, rep, availability=None, minutes=TOUR_SLOT_MINUTES, from_date=None,
+                      limit=SLOT_SUGGESTIONS, days=SLOT_SEARCH_DAYS):
+        """
+        Next start times when ``rep`` is free and the client is available.
+
+        Args:
+            rep (str): Touring rep.
+            availability (dict): Client's weekly availability as saved on the
+                requirements page; None or no available day means working hours.
+            minutes (int): Length of the visit (or whole tour) to fit.
+            from_date (date): First day to search, default today.
+            limit (int): Number of suggestions.
+            days (int): How many days ahead to search.
+
+        Returns:
+            list: ``(date, time)`` tuples, earliest first.
+        """
+        self.ensure_fresh()
+        windows = client_windows(availability)
+        from_date = from_date or date.today()
+        self.load_days(from_date, from_date + timedelta(days=days - 1))
+        now = datetime.now()
+        found = []
+        with self._lock:
+            for offset in range(days):
+                day = from_date + timedelta(days=offset)
+                window = windows[day.weekday()]
+                if window is None:
+                    continue
+                start, end = window
+                if day == now.date():
+                    start = max(start, _round_up(now.hour * 60 + now.minute))
+                bookings = self._day(rep, day)
+                while start + minutes <= end and len(found) < limit:
+                    free = bookings.next_free(start, minutes)
+                    if free != start:
+                        start = _round_up(free)
+                        continue
+                    found.append((day, to_time(start)))
+                    start += max(minutes, SLOT_STEP_MINUTES)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def plan_tour(self, rep, day, durations, availability=None, earliest=None, travel_minutes=None):
+        """
+        Fit a multi-building tour into ``rep``'s free time on ``day``.
+
+        Buildings are visited in the given order. Each one starts at the
+        earliest free, step-aligned time after the previous visit plus the
+        travel gap, so the sequence can wait around existing bookings.
+
+        Args:
+            rep (str): Touring rep.
+            day (date): Tour date.
+            durations (list): Visit length in minutes for each building.
+            availability (dict): Client's weekly availability.
+            earliest (time): Don't start before this time.
+            travel_minutes (callable): ``travel_minutes(i, j)`` between stops
+                ``i`` and ``j``; ``TOUR_TRAVEL_MINUTES`` when omitted.
+
+        Returns:
+            list or None: Start ``datetime.time`` per building, or None when
+            the tour doesn't fit in the day.
+        """
+        window = client_windows(availability)[day.weekday()]
+        if window is None or not durations:
+            return None
+        self.ensure_fresh()
+        self.load_days(day, day)
+        start, end = window
+        if earliest is not None:
+            start = max(start, _round_up(to_minutes(earliest)))
+        times = []
+        with self._lock:
+            bookings = self._day(rep, day)
+            for i, minutes in enumerate(durations):
+                if i:
+                    gap = travel_minutes(i - 1, i) if travel_minutes else TOUR_TRAVEL_MINUTES
+                    start = _round_up(times[-1] + durations[i - 1] + gap)
+                while True:
+                    free = bookings.next_free(start, minutes)
+                    if free == start:
+                        break
+                    start = _round_up(free)
+                if start + minutes > end:
+                    return None
+                times.append(start)
+        return [to_time(t) for t in times]
+
+
+def _dates(first, last):
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def _round_up(minutes):
+    return -(-minutes // SLOT_STEP_MINUTES) * SLOT_STEP_MINUTES
+
+
+def client_windows(availability):
+    """
+    Tourable window per weekday (Monday = 0) in minutes, clipped to working hours.
+
+    Days the client marked unavailable are None. Without any available day
+    (nothing saved yet) every day uses the working hours.
+    """
+    day_start, day_end = to_minutes(TOUR_DAY_START), to_minutes(TOUR_DAY_END)
+    slots = normalize_availability(availability)
+    if not any(slot["available"] for slot in slots.values()):
+        return [(day_start, day_end)] * 7
+    windows = []
+    for day in WEEKDAYS:
+        slot = slots[day]
+        start = max(_round_up(to_minutes(slot["start"])), day_start)
+        end = min(to_minutes(slot["end"]), day_end)
+        windows.append((start, end) if slot["available"] and end > start else None)
+    return windows
+
+
+def within_availability(availability, day, tour_time, minutes=TOUR_SLOT_MINUTES):
+    """Whether a visit at ``tour_time`` on ``day`` fits the client's availability."""
+    window = client_windows(availability)[day.weekday()]
+    start = to_minutes(tour_time)
+    return window is not None and window[0] <= start and start + minutes <= window[1]
+
+
+@st.cache_resource(show_spinner=False)
+def get_tour_slot_index():
+    """Process-wide ``TourSlotIndex``."""
+    return TourSlotIndex()